@@ -0,0 +1,269 @@
+"""
+Timing, result files and run-to-run comparison for the benchmark suite
+"""
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Bump when results from older versions of the suite aren't comparable
+RESULTS_VERSION = 1
+
+# name -> {"setup": fn(param) -> (call, teardown), "params": [...], "group": str}
+BENCHMARKS = {}
+
+
+def benchmark(name: str, params: list = None, group: str = None, quick_params: list = None):
+    """
+    Register a benchmark
+
+    The decorated function gets one param (or None) and returns the
+    callable to time, or (callable, teardown). Setup isn't timed.
+
+    Args:
+        name: Benchmark name (params are appended as "name[param]")
+        params: Values to run it with (e.g. history sizes)
+        group: Shown in reports (defaults to the first part of the name)
+        quick_params: Subset of params used by --quick
+    """
+    def register(setup):
+        BENCHMARKS[name] = {
+            "setup": setup,
+            "params": params or [None],
+            "quick_params": quick_params or params or [None],
+            "group": group or name.split(".")[0],
+        }
+        return setup
+    return register
+
+
+def case_name(name: str, param) -> str:
+    return name if param is None else f"{name}[{param}]"
+
+
+def calibrate(call, min_time: float) -> int:
+    """
+    Calls per sample so one sample takes at least min_time (like timeit.autorange)
+    """
+    number = 1
+    while True:
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            call()
+        elapsed = (time.perf_counter_ns() - started) / 1e9
+        if elapsed >= min_time or number >= 1 << 24:
+            return number
+        # Aim straight for the target instead of doubling from 1
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+
+
+def measure(call, warmup: int = 1, repeat: int = 7, min_time: float = 0.05) -> dict:
+    """
+    Time a callable
+
+    Runs `warmup` untimed samples, then `repeat` samples of `number` calls
+    each with the garbage collector off. The per-call time of each sample
+    is kept; min is the least noisy estimate, median the typical one.
+
+    Returns:
+        dict with number, repeat, min, median, mean, stdev, iqr (seconds
+        per call) and ops (calls per second at the median)
+    """
+    number = calibrate(call, min_time)
+    for _ in range(warmup):
+        for _ in range(number):
+            call()
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter_ns()
+            for _ in range(number):
+                call()
+            samples.append((time.perf_counter_ns() - started) / 1e9 / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    quartiles = statistics.quantiles(samples, n=4) if len(samples) > 1 else [samples[0]] * 3
+    median = statistics.median(samples)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": median,
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "iqr": quartiles[2] - quartiles[0],
+        "ops": 1 / median if median else float("inf"),
+    }
+
+
+def reference_workload():
+    """Fixed pure-Python work: how fast this machine is right now"""
+    total = 0
+    for n in range(1000):
+        total += n * n % 7
+    return "-".join(str(n) for n in range(50)), total
+
+
+def environment() -> dict:
+    """Where the results came from (so runs on different machines aren't mixed up)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "started_at": datetime.now().isoformat(),
+    }
+
+
+def run(names: list = None, quick: bool = False, warmup: int = 1, repeat: int = 7,
+        min_time: float = 0.05, progress=None) -> dict:
+    """
+    Run registered benchmarks
+
+    Args:
+        names: Substrings to select benchmarks by name (all by default)
+        quick: Use each benchmark's quick_params
+        warmup: Untimed samples per case
+        repeat: Timed samples per case
+        min_time: Minimum seconds per sample
+        progress: Called with each finished case's result
+
+    Returns:
+        Results dict (see save_results)
+    """
+    env = environment()
+    env["reference"] = measure(reference_workload, warmup=warmup, repeat=repeat, min_time=min_time)["median"]
+    results = {"version": RESULTS_VERSION, "environment": env,
+               "options": {"quick": quick, "warmup": warmup, "repeat": repeat, "min_time": min_time},
+               "results": {}}
+
+    for name, spec in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        for param in spec["quick_params" if quick else "params"]:
+            prepared = spec["setup"](param)
+            call, teardown = prepared if isinstance(prepared, tuple) else (prepared, None)
+            try:
+                result = {"group": spec["group"], "param": param,
+                          **measure(call, warmup=warmup, repeat=repeat, min_time=min_time)}
+            finally:
+                if teardown:
+                    teardown()
+            results["results"][case_name(name, param)] = result
+            if progress:
+                progress(case_name(name, param), result)
+
+    results["environment"]["finished_at"] = datetime.now().isoformat()
+    return results
+
+
+def save_results(results: dict, path: str):
+    """Write results as JSON (atomic replace)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(results, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r") as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} is results version {results.get('version')}, expected {RESULTS_VERSION}")
+    return results
+
+
+def speed_change(baseline: dict, current: dict) -> float:
+    """
+    How much slower the machine ran the reference workload in `current`
+    (1.0 = same speed, 1.3 = 30% slower)
+    """
+    before = baseline["environment"].get("reference")
+    after = current["environment"].get("reference")
+    return after / before if before and after else 1.0
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10, normalize: bool = False) -> list:
+    """
+    Compare two runs case by case
+
+    A case regressed when both its min and its median per-call time grew by
+    more than `threshold` (0.10 = 10%). Requiring both keeps a single noisy
+    sample from failing a run; an improvement is the mirror image. With
+    normalize, times are first scaled by speed_change so a machine that
+    was busier (or throttled) during one run doesn't count as a change.
+
+    Returns:
+        [{"case", "baseline", "current", "ratio", "status"}] where status
+        is "regressed", "improved", "same", "new" or "removed" and ratio is
+        current/baseline median
+    """
+    rows = []
+    before, after = baseline["results"], current["results"]
+    scale = speed_change(baseline, current) if normalize else 1.0
+    for case in list(before) + [case for case in after if case not in before]:
+        if case not in after:
+            rows.append({"case": case, "baseline": before[case]["median"], "current": None,
+                         "ratio": None, "status": "removed"})
+            continue
+        if case not in before:
+            rows.append({"case": case, "baseline": None, "current": after[case]["median"],
+                         "ratio": None, "status": "new"})
+            continue
+
+        old, new = before[case], after[case]
+        ratio = new["median"] / scale / old["median"] if old["median"] else float("inf")
+        min_ratio = new["min"] / scale / old["min"] if old["min"] else float("inf")
+        if ratio > 1 + threshold and min_ratio > 1 + threshold:
+            status = "regressed"
+        elif ratio < 1 / (1 + threshold) and min_ratio < 1 / (1 + threshold):
+            status = "improved"
+        else:
+            status = "same"
+        rows.append({"case": case, "baseline": old["median"], "current": new["median"],
+                     "ratio": ratio, "status": status})
+    return rows
+
+
+def format_time(seconds: float) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def print_result(case: str, result: dict, out=sys.stdout):
+    out.write(f"  {case:<48} {format_time(result['median']):>10} "
+              f"(min {format_time(result['min'])}, ±{format_time(result['iqr'])} iqr, "
+              f"{result['number']}x{result['repeat']})\n")
+
+
+def print_comparison(rows: list, out=sys.stdout):
+    marks = {"regressed": "❌", "improved": "🚀", "same": "  ", "new": "🆕", "removed": "🗑 "}
+    for row in rows:
+        change = f"{(row['ratio'] - 1) * 100:+.1f}%" if row["ratio"] is not None else ""
+        out.write(f"{marks[row['status']]} {row['case']:<48} {format_time(row['baseline']):>10} -> "
+                  f"{format_time(row['current']):>10} {change:>8}\n")
@@ -0,0 +1,295 @@
+"""
+Hot-path benchmarks: mention classification, evolution checks, prompt
+building and state persistence
+
+    python -m benchmarks.suite run                       # everything, results/benchmarks.json
+    python -m benchmarks.suite run --quick -k classify   # smaller sizes, only matching names
+    python -m benchmarks.suite compare base.json new.json --threshold 0.1
+
+compare exits with status 1 when any case regressed, so it can gate a change.
+"""
+import argparse
+import itertools
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from benchmarks.runner import (BENCHMARKS, benchmark, run, save_results, load_results, compare,
+                               speed_change, print_result, print_comparison)
+from core.mention_store import MentionStore
+from integrations.gemini_client import build_reply_prompt
+from simulation.harness import Simulation, overrides
+from simulation.twitter import MENTION_TEMPLATES
+from utils.logger import logger
+
+DEFAULT_OUTPUT = "results/benchmarks.json"
+
+# Mention IDs kept by MentionStore in a busy week up to a very busy year
+HISTORY_SIZES = [10_000, 100_000, 1_000_000]
+
+STAGES = ["egg", "slime", "beast"]
+INTERACTION_TYPES = ["donation_related", "greeting", "question", "compliment", "evolution_inquiry", "general"]
+
+_simulation = None
+
+
+def get_simulation() -> Simulation:
+    """
+    One agent on zero-latency fakes, shared by every benchmark
+
+    Everything timed runs on the real agent code; only the network is fake.
+    """
+    global _simulation
+    if _simulation is None:
+        _simulation = Simulation(gemini_latency=0.0)
+    return _simulation
+
+
+def close_simulation():
+    global _simulation
+    if _simulation is not None:
+        _simulation.close()
+        _simulation = None
+
+
+def cycle(values: list):
+    """Next item of an endless cycle (so every call sees different input)"""
+    return itertools.cycle(values).__next__
+
+
+def with_settings(call, **values):
+    """(call, teardown) that keeps settings overridden while call is timed"""
+    context = overrides(**values)
+    context.__enter__()
+    return call, lambda: context.__exit__(None, None, None)
+
+
+# --- classification ----------------------------------------------------------
+
+@benchmark("classify.interaction")
+def bench_classify_interaction(_):
+    handler = get_simulation().agent.interaction_handler
+    texts = cycle([f"@polypuff {text}".lower() for text in MENTION_TEMPLATES])
+    return lambda: handler.classify_interaction(texts())
+
+
+# --- evolution ----------------------------------------------------------------
+
+EVOLUTION_CASES = [("egg", 0.001, 0.0), ("egg", 0.006, 0.004), ("slime", 0.01, 0.006),
+                   ("slime", 0.025, 0.01), ("beast", 0.03, 0.025), ("beast", 0.005, 0.03)]
+
+
+@benchmark("evolution.check")
+def bench_check_evolution(_):
+    evolution = get_simulation().agent.evolution
+    cases = cycle(EVOLUTION_CASES)
+
+    def call():
+        stage, balance, previous = cases()
+        evolution.check_evolution(stage, balance, previous)
+    return call
+
+
+@benchmark("evolution.progress")
+def bench_progress(_):
+    evolution = get_simulation().agent.evolution
+    cases = cycle(EVOLUTION_CASES)
+
+    def call():
+        stage, balance, _ = cases()
+        evolution.get_progress_to_next_stage(stage, balance)
+    return call
+
+
+# --- prompts ------------------------------------------------------------------
+
+@benchmark("prompts.build_tweet")
+def bench_build_tweet_prompt(_):
+    agent = get_simulation().agent
+    context = agent.get_tweet_context()
+    stages = cycle(STAGES)
+    return lambda: agent.ai.build_tweet_prompt(stages(), context)
+
+
+@benchmark("prompts.generate_tweet")
+def bench_generate_tweet(_):
+    """Prompt assembly plus response clean-up and variety tracking (the model answers instantly)"""
+    agent = get_simulation().agent
+    context = agent.get_tweet_context()
+    stages = cycle(STAGES)
+    return lambda: agent.ai.generate_tweet(stages(), context)
+
+
+@benchmark("prompts.build_reply")
+def bench_build_reply_prompt(_):
+    cases = cycle([(stage, interaction_type, f"@polypuff {text}".lower())
+                   for stage in STAGES for interaction_type in INTERACTION_TYPES
+                   for text in MENTION_TEMPLATES[:4]])
+
+    def call():
+        stage, interaction_type, text = cases()
+        build_reply_prompt(stage, 0.0042, text, interaction_type)
+    return call
+
+
+@benchmark("prompts.generate_reply")
+def bench_generate_reply(_):
+    """One uncached reply: donor lookup, prompt, model call, clean-up"""
+    handler = get_simulation().agent.interaction_handler
+    mentions = cycle(get_simulation().twitter.flood(len(INTERACTION_TYPES) * 4))
+    types = cycle(INTERACTION_TYPES)
+
+    def call():
+        mention = mentions()
+        handler.generate_reply(mention.text.lower(), types(), mention)
+    return with_settings(call, REPLY_CACHE=False)
+
+
+# --- state persistence -----------------------------------------------------------
+
+@benchmark("state.save")
+def bench_save_state(_):
+    """Full snapshot: JSON dump, fsync, atomic rename, fresh journal"""
+    return get_simulation().agent.save_state
+
+
+@benchmark("state.record")
+def bench_record_state(_):
+    """One journaled transition (what most state changes cost)"""
+    agent = get_simulation().agent
+    balances = cycle([0.001, 0.002, 0.003])
+
+    def call():
+        agent.record_state("balance_reading", {"balance": balances()})
+    return with_settings(call, STATE_SNAPSHOT_EVERY=10 ** 9, STATE_FSYNC=True)
+
+
+@benchmark("state.load", params=[0, 100])
+def bench_load_state(journal_records):
+    """Snapshot plus `journal_records` journal lines to replay"""
+    agent = get_simulation().agent
+    call, restore = with_settings(agent.load_state, STATE_SNAPSHOT_EVERY=10 ** 9, STATE_FSYNC=False)
+    agent.save_state()
+    for n in range(journal_records):
+        agent.record_state("balance_reading", {"balance": n / 1000})
+
+    def teardown():
+        restore()
+        agent.save_state()
+    return call, teardown
+
+
+# --- processed tweets --------------------------------------------------------------
+
+def make_history(size: int) -> MentionStore:
+    """MentionStore in a temporary directory holding `size` recent mention IDs"""
+    data_dir = tempfile.mkdtemp(prefix="polypuff-bench-")
+    store = MentionStore(data_dir)
+    now = time.time()
+    first_id = 1_700_000_000_000_000_000
+    for n in range(size):
+        store._remember(str(first_id + n * 4096), now - n % 3600)
+    store.compact()
+    return store
+
+
+@benchmark("processed_tweets.save", params=HISTORY_SIZES, quick_params=HISTORY_SIZES[:2])
+def bench_save_processed(size):
+    """InteractionHandler.save_processed_tweets: evict + compact the whole window"""
+    handler = get_simulation().agent.interaction_handler
+    live = handler.processed_tweets
+    handler.processed_tweets = make_history(size)
+
+    def teardown():
+        shutil.rmtree(handler.processed_tweets.data_dir, ignore_errors=True)
+        handler.processed_tweets = live
+    return handler.save_processed_tweets, teardown
+
+
+@benchmark("processed_tweets.load", params=HISTORY_SIZES, quick_params=HISTORY_SIZES[:2])
+def bench_load_processed(size):
+    """Startup: read the log back into memory"""
+    data_dir = make_history(size).data_dir
+    return lambda: MentionStore(data_dir), lambda: shutil.rmtree(data_dir, ignore_errors=True)
+
+
+@benchmark("processed_tweets.contains", params=HISTORY_SIZES, quick_params=HISTORY_SIZES[:2])
+def bench_contains_processed(size):
+    """Duplicate check for an incoming mention (hits and misses alternate)"""
+    store = make_history(size)
+    ids = cycle([str(1_700_000_000_000_000_000 + n * 4096 + n % 2) for n in range(0, size, max(size // 1000, 1))])
+    return lambda: ids() in store, lambda: shutil.rmtree(store.data_dir, ignore_errors=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="PolyPuff hot-path benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run benchmarks and write JSON results")
+    run_parser.add_argument("-k", "--filter", action="append", default=[],
+                            help="Only benchmarks whose name contains this (repeatable)")
+    run_parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help=f"Results file (default {DEFAULT_OUTPUT})")
+    run_parser.add_argument("--quick", action="store_true", help="Smaller history sizes and fewer samples")
+    run_parser.add_argument("--repeat", type=int, help="Timed samples per case (default 7, 3 with --quick)")
+    run_parser.add_argument("--warmup", type=int, default=1, help="Untimed samples per case")
+    run_parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per sample")
+    run_parser.add_argument("--baseline", help="Compare against this results file when done")
+    run_parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown that counts as a regression")
+    run_parser.add_argument("--normalize", action="store_true", help="Correct for machine speed between runs")
+    run_parser.add_argument("--verbose", action="store_true", help="Keep agent logging on while timing")
+    run_parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+
+    compare_parser = commands.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown that counts as a regression")
+    compare_parser.add_argument("--normalize", action="store_true", help="Correct for machine speed between runs")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        baseline, current = load_results(args.baseline), load_results(args.current)
+    else:
+        if args.list:
+            for name, spec in BENCHMARKS.items():
+                print(f"{name:<32} {spec['params'] if spec['params'] != [None] else ''}")
+            return 0
+
+        # Console and file logging would dominate the sub-millisecond cases
+        # (and the sickness case warns on every call)
+        if not args.verbose:
+            logger.setLevel(logging.ERROR)
+        repeat = args.repeat or (3 if args.quick else 7)
+        print(f"Running benchmarks ({'quick, ' if args.quick else ''}{repeat} samples each)...")
+        try:
+            current = run(args.filter, quick=args.quick, warmup=args.warmup, repeat=repeat,
+                          min_time=args.min_time, progress=print_result)
+        finally:
+            close_simulation()
+            logger.setLevel(logging.NOTSET)
+        save_results(current, args.output)
+        print(f"Results written to {args.output}")
+        if not args.baseline:
+            return 0
+        baseline = load_results(args.baseline)
+
+    rows = compare(baseline, current, args.threshold, normalize=args.normalize)
+    speed = speed_change(baseline, current)
+    print(f"\nCompared with {baseline['environment'].get('commit') or 'baseline'} "
+          f"(threshold {args.threshold:.0%}, reference workload {(speed - 1) * 100:+.1f}%"
+          f"{', normalized' if args.normalize else ''}):")
+    print_comparison(rows)
+    regressed = [row["case"] for row in rows if row["status"] == "regressed"]
+    if baseline["environment"].get("machine") != current["environment"].get("machine") or \
+            baseline["environment"].get("python") != current["environment"].get("python"):
+        print("⚠️ Runs come from different machines or Python versions - differences may not be real")
+    if regressed:
+        print(f"\n❌ {len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# Keyword tables for intent matching (utils/intent_matcher.py)
+#
+# Each intent maps keywords/phrases to a weight. Keywords only match
+# whole words ("hi" does not match "this"). Ties go to the intent listed
+# first.
+
+# Mentions -> InteractionHandler.classify_interaction
+INTERACTION_INTENTS = {
+    "donation_related": {
+        "feed": 2, "fed": 2, "feeding": 2, "sent": 2, "send": 1, "sending": 1,
+        "donate": 2, "donated": 2, "donating": 2, "donation": 2, "tip": 2, "tipped": 2,
+        "eth": 2, "money": 1, "wallet": 1,
+    },
+    "greeting": {
+        "how are you": 2, "how r u": 2, "whats up": 2, "what's up": 2, "sup": 1,
+        "hello": 1, "hi": 1, "hey": 1, "heya": 1, "yo": 1, "gm": 1, "gn": 1,
+        "good morning": 1, "good night": 1,
+    },
+    "evolution_inquiry": {
+        "evolve": 2, "evolving": 2, "evolution": 2, "hatch": 2, "hatching": 2,
+        "grow": 1, "growing": 1, "level up": 2, "next stage": 2,
+    },
+    "help_request": {
+        "help": 2, "support": 1, "assist": 2, "explain": 2, "how do i": 2, "how can i": 2,
+    },
+    "compliment": {
+        "love": 1, "cute": 1, "adorable": 1, "cool": 1, "awesome": 1, "amazing": 1,
+        "best": 1, "great": 1, "beautiful": 1,
+    },
+    "question": {
+        "what": 1, "how": 1, "why": 1, "when": 1, "where": 1, "who": 1, "?": 1,
+    },
+}
+
+# Generated tweets -> GeminiClient._track_tweet_type (variety tracking)
+TWEET_TYPES = {
+    "question": {"?": 1, "anyone": 1, "can u": 1, "can you": 1},
+    "gratitude": {"thank": 1, "thanks": 1, "thank u": 1, "thankful": 1, "grateful": 1, "appreciate": 1},
+    "begging": {"need": 1, "help": 1, "feed": 1, "hungry": 1, "starving": 1},
+    "status": {"balance": 1, "eth": 1, "wallet": 1},
+    "hunting": {"hunting": 1, "searching": 1, "looking": 1},
+}
@@ -195,3 +195,123 @@ Generate a SHORT reply (max 15 words) that:
 3. Doesn't sound robotic
 
 Reply:"""
+
+
+# Reply styles per interaction type (batched replies)
+REPLY_STYLES = {
+    "donation_related": "GRATEFUL and EXCITED (max 200 characters): thank them warmly, mention how this helps you grow",
+    "greeting": "FRIENDLY (max 150 characters): greet them back, show your current mood, maybe mention what you're up to",
+    "question": "HELPFUL (max 200 characters): answer their question in character, informative but cute",
+    "compliment": "SHY/GRATEFUL (max 150 characters): thank them sweetly with a bit of humility",
+    "help_request": "HELPFUL (max 200 characters): explain simply and kindly, in character",
+    "evolution_inquiry": "INFORMATIVE (max 200 characters): share your stage and what you need to evolve, be excited about growth",
+    "general": "NATURAL (max 200 characters): respond to what they said, engaging and friendly",
+}
+
+# Several mentions answered in one call (after the personality, unless it
+# is the system instruction)
+BATCH_REPLY_PROMPT = """Current status:
+- Stage: {stage}
+- Balance: {balance:.4f} ETH
+
+Reply to each of these {count} mentions. Reply styles by type:
+{styles}
+
+Mentions:
+{mentions}
+
+Every reply stays in character, includes 1-2 emojis and never uses hashtags.
+Respond with ONLY a JSON array with one object per mention, in the same order:
+[{{"id": 1, "reply": "..."}}, {{"id": 2, "reply": "..."}}]"""
+
+
+# Prompt sections, compiled once per stage and type by
+# integrations/gemini_client.py (see utils/prompt_templates.Prompt).
+# The stage personality comes first unless it is sent as the system
+# instruction. Each section: (name, template, drop order when over the
+# input token budget - None = always kept, field that must be set)
+
+TWEET_PROMPT_SECTIONS = [
+    ("status", "\nCurrent Status:\n- Balance: {balance:.4f} ETH\n- Stage: {stage}\n", None, None),
+    ("recent_activity", "- Recent activity: {recent_activity}\n", 1, None),
+    ("time", "- Time: {time_of_day}\n", 3, None),
+    ("tweet_count", "- Tweet #{tweet_count}\n", 2, None),
+    ("variety", "\nIMPORTANT: Your last tweet was about {last_tweet_type}. DO NOT repeat the same type. "
+                "Pick a different style from the TWEET VARIETY section!\n", 4, "last_tweet_type"),
+    ("instructions", """
+Generate ONE short tweet (50-200 characters) that:
+1. Matches the personality
+2. Includes 1-2 emojis
+3. Feels natural and spontaneous
+4. Is DIFFERENT from recent tweets
+5. Does NOT use hashtags
+
+IMPORTANT: Reply with ONLY the tweet text, nothing else. No quotes, no explanation.
+""", None, None),
+]
+
+REPLY_PROMPT_SECTIONS = [
+    ("message", '\n{intro}\nTheir message: "{text}"\n', None, None),
+    ("donor_note", "{donor_note}", 1, "donor_note"),
+    ("status", "\nCurrent status:\n- Stage: {stage}\n- Balance: {balance:.4f} ETH\n", 2, None),
+    ("instructions", "\nGenerate {ask}:\n{points}\n\nReply ONLY with the tweet text, nothing else.\n", None, None),
+]
+
+# What changes between reply prompts, per interaction type ({stage} is
+# filled in when the template is compiled; only "status" types get the
+# status section)
+REPLY_PROMPTS = {
+    "donation_related": {
+        "intro": "Someone is talking about donating or feeding you!",
+        "ask": "a GRATEFUL and EXCITED reply (max 200 characters)",
+        "points": ["Thank them warmly", "Show personality for your current stage ({stage})",
+                   "Mention how this helps you grow", "Be genuine and emotional"],
+    },
+    "greeting": {
+        "intro": "Someone is greeting you!",
+        "ask": "a FRIENDLY greeting reply (max 150 characters)",
+        "points": ["Greet them back", "Show your current mood/stage ({stage})", "Be warm and welcoming",
+                   "Maybe mention what you're up to"],
+    },
+    "question": {
+        "intro": "Someone asked you a question!",
+        "ask": "a HELPFUL reply (max 200 characters)",
+        "points": ["Try to answer their question in character", "Stay true to your stage personality ({stage})",
+                   "Be informative but cute"],
+    },
+    "compliment": {
+        "intro": "Someone complimented you!",
+        "ask": "a SHY/GRATEFUL reply (max 150 characters)",
+        "points": ["Thank them sweetly", "Show a bit of shyness or humility", "Stay in character for {stage}"],
+    },
+    "evolution_inquiry": {
+        "intro": "Someone is asking about your evolution!",
+        "ask": "an INFORMATIVE reply (max 200 characters)",
+        "points": ["Share your current stage", "Mention what you need to evolve (if not max)",
+                   "Be excited about growth"],
+        "status": True,
+    },
+    "general": {
+        "intro": "Someone mentioned you!",
+        "ask": "a NATURAL conversational reply (max 200 characters)",
+        "points": ["Respond appropriately to their message", "Stay in character ({stage})",
+                   "Be engaging and friendly"],
+    },
+}
+
+DONATION_THANKS_PROMPT = """
+Someone just sent you {amount:.4f} ETH!
+Donor address: {donor}...
+
+Generate an EXTREMELY GRATEFUL tweet (max 250 characters):
+- Thank them profusely
+- Show genuine emotion
+- Mention the specific amount
+- Express how this helps you grow
+- Be personal and heartfelt
+- Include 2-3 emojis
+
+This is a PUBLIC tweet, not a reply.
+
+Reply ONLY with the tweet text, nothing else.
+"""
@@ -11,6 +11,10 @@ class Settings:
     
     # Google Gemini API
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+    GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", 30))  # per-call deadline
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 8))  # async calls in flight
+    GEMINI_SYSTEM_INSTRUCTION = os.getenv("GEMINI_SYSTEM_INSTRUCTION", "true").lower() == "true"  # personality per stage handle
+    GEMINI_INPUT_TOKEN_BUDGET = int(os.getenv("GEMINI_INPUT_TOKEN_BUDGET", 600))  # estimated input tokens per call (0 = no limit)
     
     # Twitter API
     TWITTER_API_KEY = os.getenv("TWITTER_API_KEY")
@@ -24,10 +28,85 @@ class Settings:
     BASE_WALLET_PRIVATE_KEY = os.getenv("BASE_WALLET_PRIVATE_KEY", "")
     # BASE_RPC_URL = os.getenv("BASE_RPC_URL", "https://sepolia.base.org")
     BASE_RPC_URL = "https://sepolia.drpc.org"  # DRPC Sepolia
+    BLOCK_TIME_SECONDS = float(os.getenv("BLOCK_TIME_SECONDS", 2))
+    BALANCE_STALE_BLOCKS = int(os.getenv("BALANCE_STALE_BLOCKS", 900))  # ~30 min on Base
+    RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", 100))
+    
+    # Donation Scanner
+    DONATION_SCANNER = os.getenv("DONATION_SCANNER", "true").lower() == "true"
+    SCANNER_START_BLOCK = int(os.getenv("SCANNER_START_BLOCK", 0))  # 0 = start at current head
+    SCANNER_CONFIRMATIONS = int(os.getenv("SCANNER_CONFIRMATIONS", 2))
+    SCANNER_MAX_BLOCKS = int(os.getenv("SCANNER_MAX_BLOCKS", 1000))  # per scan
+    SCANNER_BLOCK_BATCH_SIZE = int(os.getenv("SCANNER_BLOCK_BATCH_SIZE", 10))  # full blocks per checkpoint
+    SCANNER_LOG_RANGE = int(os.getenv("SCANNER_LOG_RANGE", 1000))  # blocks per eth_getLogs
+    MAX_DONATION_THANKS = int(os.getenv("MAX_DONATION_THANKS", 3))  # thank-you tweets per check
     
     # Agent Settings
     TWEET_INTERVAL_MINUTES = int(os.getenv("TWEET_INTERVAL_MINUTES", 60))
+    TWEET_BUFFER_SIZE = int(os.getenv("TWEET_BUFFER_SIZE", 2))  # pre-generated tweets kept ready (0 = off)
+    TWEET_BUFFER_MAX_AGE_MINUTES = int(os.getenv("TWEET_BUFFER_MAX_AGE_MINUTES", 180))
+    TWEET_BUFFER_BALANCE_STEP = float(os.getenv("TWEET_BUFFER_BALANCE_STEP", 0.001))  # ETH per balance bucket
+    TWEET_DEDUP = os.getenv("TWEET_DEDUP", "true").lower() == "true"
+    TWEET_DEDUP_THRESHOLD = float(os.getenv("TWEET_DEDUP_THRESHOLD", 0.6))  # similarity to a past tweet that counts as a repeat
+    TWEET_DEDUP_RETRIES = int(os.getenv("TWEET_DEDUP_RETRIES", 2))  # regenerations before skipping the tweet
     CHECK_BALANCE_INTERVAL_MINUTES = int(os.getenv("CHECK_BALANCE_INTERVAL_MINUTES", 15))
+    EVOLUTION_PAUSE_SECONDS = float(os.getenv("EVOLUTION_PAUSE_SECONDS", 30))  # wait after an evolution/sickness tweet
+    CHECK_MENTIONS_INTERVAL_MINUTES = int(os.getenv("CHECK_MENTIONS_INTERVAL_MINUTES", 5))
+    MAX_REPLIES_PER_CHECK = int(os.getenv("MAX_REPLIES_PER_CHECK", 100))
+    REPLY_CONCURRENCY = int(os.getenv("REPLY_CONCURRENCY", 4))  # parallel Gemini reply calls
+    REPLY_BATCH_SIZE = int(os.getenv("REPLY_BATCH_SIZE", 8))  # mentions answered per Gemini call
+    REPLY_POST_INTERVAL_SECONDS = float(os.getenv("REPLY_POST_INTERVAL_SECONDS", 0))  # extra gap on top of API rate limits
+    REPLY_CACHE = os.getenv("REPLY_CACHE", "true").lower() == "true"
+    REPLY_CACHE_SIZE = int(os.getenv("REPLY_CACHE_SIZE", 512))
+    REPLY_CACHE_TTL_SECONDS = int(os.getenv("REPLY_CACHE_TTL_SECONDS", 900))
+    REPLY_CACHE_VARIANTS = int(os.getenv("REPLY_CACHE_VARIANTS", 3))  # different replies kept per message
+    REPLY_DUPLICATE_WINDOW_HOURS = int(os.getenv("REPLY_DUPLICATE_WINDOW_HOURS", 24))  # never post the same reply text twice within this
+    MENTION_PAGE_BUDGET = int(os.getenv("MENTION_PAGE_BUDGET", 5))  # pages of 100 mentions per check
+    MENTION_RETENTION_HOURS = int(os.getenv("MENTION_RETENTION_HOURS", 72))  # processed IDs kept in memory
+    MENTION_MAX_ATTEMPTS = int(os.getenv("MENTION_MAX_ATTEMPTS", 3))  # checks a failing reply is retried before it's skipped
+    MENTION_BLOOM = os.getenv("MENTION_BLOOM", "false").lower() == "true"
+    MENTION_BLOOM_CAPACITY = int(os.getenv("MENTION_BLOOM_CAPACITY", 1000000))
+    MENTION_BLOOM_ERROR = float(os.getenv("MENTION_BLOOM_ERROR", 0.001))
+    MEDIA_PRELOAD = os.getenv("MEDIA_PRELOAD", "true").lower() == "true"  # upload stage images at startup
+    MEDIA_CACHE_TTL_HOURS = int(os.getenv("MEDIA_CACHE_TTL_HOURS", 24))  # when the upload response has no expiry
+    MEDIA_REFRESH_MARGIN_MINUTES = int(os.getenv("MEDIA_REFRESH_MARGIN_MINUTES", 60))  # re-upload this long before expiry
+    IMAGE_OPTIMIZE = os.getenv("IMAGE_OPTIMIZE", "true").lower() == "true"  # upload resized/recompressed images
+    IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "data/image_cache")
+    IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 85))  # JPEG/WebP quality
     DEV_MODE = os.getenv("DEV_MODE", "false").lower() == "true"
 
+    # Runtime Settings
+    ASYNC_RUNTIME = os.getenv("ASYNC_RUNTIME", "false").lower() == "true"
+    SHUTDOWN_TIMEOUT_SECONDS = int(os.getenv("SHUTDOWN_TIMEOUT_SECONDS", 30))
+    STATE_SNAPSHOT_EVERY = int(os.getenv("STATE_SNAPSHOT_EVERY", 100))  # journal records per snapshot
+    STATE_FSYNC = os.getenv("STATE_FSYNC", "true").lower() == "true"
+    METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # Prometheus /metrics endpoint (0 = off)
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # per module, e.g. "core.wallet=WARNING,web3=ERROR"
+    LOG_SAMPLE = os.getenv("LOG_SAMPLE", "")  # keep every Nth INFO line per call site, e.g. "core.wallet=10"
+    LOG_FILE = os.getenv("LOG_FILE", "logs/polypuff.jsonl")  # JSON lines
+    LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")  # TimedRotatingFileHandler schedule
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 14))  # rotated log files kept
+    LOG_COMPRESS = os.getenv("LOG_COMPRESS", "true").lower() == "true"  # gzip rotated log files
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))  # records waiting for the log thread (more are dropped)
+    TRACING = os.getenv("TRACING", "true").lower() == "true"  # span timings per cycle and mention
+    TRACE_FILE = os.getenv("TRACE_FILE", "logs/traces.jsonl")
+    TRACE_MAX_MB = int(os.getenv("TRACE_MAX_MB", 10))  # rotate the trace file at this size
+    TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", 5))  # rotated trace files kept
+    
+    # Simulation (offline fakes for Twitter, Gemini and the chain)
+    SIMULATION = os.getenv("SIMULATION", "false").lower() == "true"
+    SIM_GEMINI_LATENCY_MS = int(os.getenv("SIM_GEMINI_LATENCY_MS", 300))
+    SIM_TWITTER_LATENCY_MS = int(os.getenv("SIM_TWITTER_LATENCY_MS", 50))
+    SIM_MENTIONS_PER_MINUTE = float(os.getenv("SIM_MENTIONS_PER_MINUTE", 2))
+    SIM_DONATIONS_PER_HOUR = float(os.getenv("SIM_DONATIONS_PER_HOUR", 1))
+    SIM_START_BALANCE = float(os.getenv("SIM_START_BALANCE", 0))  # ETH
+    
+    # Fleet Mode (many personas in one process)
+    FLEET_CONFIG_DIR = os.getenv("FLEET_CONFIG_DIR", "")
+    FLEET_DATA_DIR = os.getenv("FLEET_DATA_DIR", "data/fleet")
+    FLEET_MAX_WORKERS = int(os.getenv("FLEET_MAX_WORKERS", 16))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 32))
+
 settings = Settings()
\ No newline at end of file
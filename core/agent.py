@@ -4,14 +4,21 @@ from integrations.twitter import TwitterClient
 from integrations.gemini_client import GeminiClient
 from core.wallet import WalletManager
 from core.evolution import EvolutionManager
+from core.donation_index import DonationIndex
+from core.state_store import StateStore
+from core.tweet_buffer import TweetBuffer
+from core.tweet_history import TweetHistory
 from integrations.interaction_handler import InteractionHandler
+from integrations.base_scanner import BaseScanner
 from config.prompts import STAGE_PROMPTS
 from config.settings import settings
 from utils.logger import logger
+from utils import metrics
+from utils import tracing
 from utils.helpers import get_progress_bar, format_eth, get_emoji_for_stage
-import json
 import os
 import random
+import threading
 
 class PolyPuffAgent:
     """
@@ -19,15 +26,34 @@ class PolyPuffAgent:
     Now with blockchain integration and evolution!
     """
     
-    def __init__(self):
+    def __init__(self, twitter=None, ai=None, wallet=None, evolution=None,
+                 scanner=None, data_dir: str = "data", name: str = "PolyPuff"):
+        """
+        All arguments are optional - by default every client is built from
+        settings. Fleet mode passes pre-built clients that share connection
+        pools, and a data_dir per agent.
+        """
+        self.name = name
+        self.data_dir = data_dir
+        self.state_store = StateStore(data_dir)
+        self.state_path = self.state_store.snapshot_path
+        
+        # Offline stand-ins for every external service
+        if settings.SIMULATION:
+            from simulation.backends import create_backends
+            backends = create_backends()
+            twitter = twitter or backends["twitter"]
+            ai = ai or backends["ai"]
+            wallet = wallet or backends["wallet"]
+        
         # Initialize clients
-        self.twitter = TwitterClient()
-        self.ai = GeminiClient()
+        self.twitter = twitter or TwitterClient()
+        self.ai = ai or GeminiClient()
         
         # Initialize blockchain components
         try:
-            self.wallet = WalletManager()
-            self.evolution = EvolutionManager()
+            self.wallet = wallet or WalletManager()
+            self.evolution = evolution or EvolutionManager()
             self.blockchain_enabled = True
             logger.info("Blockchain features ENABLED")
         except Exception as e:
@@ -36,12 +62,46 @@ class PolyPuffAgent:
             self.evolution = None
             self.blockchain_enabled = False
         
+        # Donation scanner (tells us who donated, not just how much)
+        # feeding a local index that replies can query
+        self.scanner = None
+        self.donation_index = None
+        if self.blockchain_enabled and settings.DONATION_SCANNER:
+            try:
+                if scanner is None:
+                    scanner = BaseScanner(
+                        self.wallet.w3,
+                        [self.wallet.address],
+                        cursor_path=os.path.join(data_dir, "scanner_cursor.json"),
+                        index=DonationIndex(os.path.join(data_dir, "donations.db"))
+                    )
+                self.scanner = scanner
+                self.donation_index = scanner.index
+            except Exception as e:
+                logger.warning(f"Donation scanner disabled: {str(e)}")
+        
         # Agent state
         self.stage = "egg"
         self.balance = 0.0
         self.previous_balance = 0.0
         self.tweet_count = 0
         self.last_balance_check = None
+        self.balance_block = None
+        
+        # Tweets generated ahead of time so posting doesn't wait on Gemini
+        self.tweet_buffer = TweetBuffer(self.ai)
+        
+        # Everything posted so far, so we don't repeat ourselves
+        self.tweet_history = TweetHistory(data_dir) if settings.TWEET_DEDUP else None
+        
+        # Upload stage images up front; their media IDs are reused per tweet
+        self.twitter.media_cache.load(os.path.join(data_dir, "media_cache.json"))
+        if settings.MEDIA_PRELOAD:
+            self.twitter.preload_media(self.get_stage_images(), wait=False)
+        
+        # Jobs may run on separate threads (async runtime)
+        self._state_lock = threading.RLock()
+        self._wallet_lock = threading.Lock()  # the wallet job and think_and_tweet both check the wallet
         
         # Load previous state if exists
         self.load_state()
@@ -52,78 +112,171 @@ class PolyPuffAgent:
                 self.twitter, 
                 self.ai, 
                 self.stage, 
-                self.balance
+                self.balance,
+                data_dir=self.data_dir,
+                donation_index=self.donation_index,
+                post_tweet=self.post_tweet
             )
             logger.info("Interaction handler enabled")
         else:
             self.interaction_handler = None
         
-        logger.info(f"PolyPuff initialized! Stage: {self.stage}, Balance: {self.balance} ETH")
-    def check_wallet_and_evolve(self):
+        # Have the first tweet ready before it's due
+        self.tweet_buffer.refill(self.stage, self.get_tweet_context())
+        
+        # Stage, balance and queue gauges on the metrics endpoint
+        metrics.watch_agent(self)
+        
+        logger.info(f"{self.name} initialized! Stage: {self.stage}, Balance: {self.balance} ETH")
+    def check_wallet_and_evolve(self, reading: dict = None):
         """
         Check wallet balance and handle evolution
         Should be called before each tweet
+        
+        Args:
+            reading: Balance reading fetched elsewhere (fleet mode reads
+                every wallet in one batch). Read from the wallet if omitted.
         """
         if not self.blockchain_enabled:
             logger.info("Blockchain disabled - skipping wallet check")
             return
         
-        try:
-            # Get current balance
-            self.previous_balance = self.balance
-            self.balance = self.wallet.get_balance()
-            self.last_balance_check = datetime.now().isoformat()
-            
-            # If balance increased, thank the donor
-            if self.balance > self.previous_balance:
-                increase = self.balance - self.previous_balance
-                logger.info(f"Donation received: {increase:.4f} ETH")
+        # One check at a time, or an evolution could be announced twice
+        with tracing.trace("check_wallet_and_evolve", agent=self.name), self._wallet_lock:
+            try:
+                # Get current balance
+                if reading is None:
+                    reading = self.wallet.get_balance_reading()
+                if reading is None:
+                    logger.warning(f"Balance unavailable - keeping last reading from block {self.balance_block}")
+                    return
                 
-                if self.interaction_handler:
-                    self.interaction_handler.handle_donation_thanks(
-                        "anonymous donor",
-                        increase
-                    )
-            
-            # Check for evolution
-            evolution_result = self.evolution.check_evolution(
-                self.stage, 
-                self.balance, 
-                self.previous_balance
-            )
-            
-            # Handle evolution
-            if evolution_result["should_evolve"]:
-                old_stage = self.stage
-                self.stage = evolution_result["new_stage"]
+                self.last_balance_check = datetime.now().isoformat()
                 
-                logger.info(f"EVOLUTION: {old_stage} -> {self.stage}")
+                # Same block as last time - nothing on-chain can have changed
+                if self.balance_block is not None and reading["block_number"] <= self.balance_block:
+                    return
                 
-                # Post evolution announcement
-                evolution_tweet = evolution_result["evolution_message"]
-                self.twitter.post_tweet(evolution_tweet)
+                self.previous_balance = self.balance
+                self.balance = reading["balance"]
+                self.balance_block = reading["block_number"]
+                self.record_state("balance_reading", {
+                    "balance": self.balance,
+                    "previous_balance": self.previous_balance,
+                    "balance_block": self.balance_block,
+                    "last_balance_check": self.last_balance_check
+                })
                 
-                # Update profile picture if image exists
-                image_path = STAGE_PROMPTS[self.stage].get("image")
-                if image_path and os.path.exists(image_path):
-                    self.twitter.update_profile_image(image_path)
-                    logger.info(f"Profile picture updated to {self.stage}")
+                # Thank donors by address when the scanner can attribute them
+                donations = self.scan_donations()
+                if donations is not None:
+                    self.thank_donors(donations)
                 
-                # Save new state
-                self.save_state()
+                # Otherwise fall back to the balance delta
+                elif self.balance > self.previous_balance:
+                    increase = self.balance - self.previous_balance
+                    logger.info(f"Donation received: {increase:.4f} ETH")
+                    
+                    if self.interaction_handler:
+                        self.interaction_handler.handle_donation_thanks(
+                            "anonymous donor",
+                            increase
+                        )
                 
-                # Wait a bit before regular tweet
-                time.sleep(30)
-            
-            # Handle devolution (sickness)
-            elif evolution_result["should_devolve"]:
-                logger.warning("Agent is sick due to balance drop")
-                sick_tweet = evolution_result["evolution_message"]
-                self.twitter.post_tweet(sick_tweet)
-                time.sleep(30)
+                # Check for evolution
+                evolution_result = self.evolution.check_evolution(
+                    self.stage, 
+                    self.balance, 
+                    self.previous_balance
+                )
                 
+                # Handle evolution
+                if evolution_result["should_evolve"]:
+                    old_stage = self.stage
+                    self.stage = evolution_result["new_stage"]
+                    
+                    logger.info(f"EVOLUTION: {old_stage} -> {self.stage}")
+                    self.tweet_buffer.invalidate()
+                    
+                    # Post evolution announcement
+                    evolution_tweet = evolution_result["evolution_message"]
+                    self.post_tweet(evolution_tweet)
+                    
+                    # Update profile picture if image exists
+                    image_path = STAGE_PROMPTS[self.stage].get("image")
+                    if image_path and os.path.exists(image_path):
+                        self.twitter.update_profile_image(image_path)
+                        logger.info(f"Profile picture updated to {self.stage}")
+                    
+                    # Save new state
+                    self.record_state("stage_changed", {"stage": self.stage})
+                    
+                    # Wait a bit before regular tweet
+                    with tracing.span("evolution_pause", stage=self.stage):
+                        time.sleep(settings.EVOLUTION_PAUSE_SECONDS)
+                
+                # Handle devolution (sickness)
+                elif evolution_result["should_devolve"]:
+                    logger.warning("Agent is sick due to balance drop")
+                    sick_tweet = evolution_result["evolution_message"]
+                    self.post_tweet(sick_tweet)
+                    with tracing.span("evolution_pause", stage="sick"):
+                        time.sleep(settings.EVOLUTION_PAUSE_SECONDS)
+                    
+            except Exception as e:
+                tracing.record_error(e)
+                logger.error(f"Error in wallet check: {str(e)}")
+
+    def scan_donations(self):
+        """
+        Get new donations to our wallet from the block scanner
+        
+        Returns:
+            List of donation events, or None if the scanner is unavailable
+        """
+        if not self.scanner:
+            return None
+        
+        try:
+            with tracing.span("scan_donations"):
+                return self.scanner.poll(self.wallet.address)
         except Exception as e:
-            logger.error(f"Error in wallet check: {str(e)}")
+            logger.error(f"Error scanning for donations: {str(e)}")
+            return None
+    
+    def thank_donors(self, donations: list):
+        """
+        Post thank-you tweets for the biggest native ETH donations
+        (at most MAX_DONATION_THANKS per check)
+        """
+        for donation in donations:
+            logger.info(f"Donation received: {donation['value']} {donation['token'] or 'wei'} "
+                        f"from {donation['sender']} ({donation['tx_hash']})")
+        
+        if not self.interaction_handler:
+            return
+        
+        native = [donation for donation in donations if donation["type"] == "native"]
+        native.sort(key=lambda donation: donation["value"], reverse=True)
+        
+        for donation in native[:settings.MAX_DONATION_THANKS]:
+            self.interaction_handler.handle_donation_thanks(
+                donation["sender"],
+                donation["amount"]
+            )
+    
+    def is_balance_stale(self) -> bool:
+        """
+        True if our balance is more than BALANCE_STALE_BLOCKS behind the
+        latest block the wallet has seen (or was never read)
+        """
+        if not self.blockchain_enabled:
+            return False
+        
+        behind = self.wallet.watcher.blocks_behind(self.balance_block)
+        if behind is None:
+            return True
+        return behind > settings.BALANCE_STALE_BLOCKS
 
     def check_interactions(self):
         """
@@ -181,54 +334,146 @@ class PolyPuffAgent:
         
         return tweet
     
-    def think_and_tweet(self):
+    def think_and_tweet(self, check_wallet: bool = True):
         """
         Main action loop - now with progress updates!
+        
+        Args:
+            check_wallet: Check balance before tweeting. The async runtime
+                polls the wallet as its own job and passes False (the
+                balance is still refreshed here if it has gone stale).
         """
         logger.info("PolyPuff is thinking...")
         
-        try:
-            # FIRST: Check wallet and handle evolution
-            self.check_wallet_and_evolve()
-            
-            # Decide tweet type
-            if self.should_post_progress_update():
-                # Post progress update
-                tweet_text = self.generate_progress_tweet()
-                image_path = None
-                logger.info("Posting progress update")
-            else:
-                # Normal AI-generated tweet
-                context = {
-                    "balance": self.balance,
-                    "stage": self.stage,
-                    "recent_activity": self.get_recent_activity(),
-                    "time_of_day": self.get_time_of_day(),
-                    "tweet_count": self.tweet_count,
-                    "wallet_address": self.wallet.get_shortened_address() if self.wallet else None
-                }
+        with tracing.trace("tweet_cycle", agent=self.name) as cycle:
+            try:
+                # FIRST: Check wallet and handle evolution
+                if check_wallet or self.is_balance_stale():
+                    self.check_wallet_and_evolve()
                 
-                tweet_text = self.ai.generate_tweet(self.stage, context)
+                # Decide tweet type
+                tweet_text = None
+                if self.should_post_progress_update():
+                    # Post progress update
+                    progress_text = self.generate_progress_tweet()
+                    if self.tweet_history and self.tweet_history.is_duplicate(progress_text):
+                        # Same balance as the last update - the repeat check would drop it
+                        logger.info("Progress unchanged since the last update - posting an AI tweet instead")
+                    else:
+                        tweet_text = progress_text
+                        cycle["type"] = "progress"
+                        original_text = None
+                        image_path = None
+                        logger.info("Posting progress update")
                 
-                # Add wallet address occasionally (30% chance if not beast)
-                if self.wallet and self.balance < self.evolution.thresholds.get("beast", 0.02):
-                    if random.random() < 0.3:
-                        tweet_text += f"\n\nfeed me: {self.wallet.get_shortened_address()}"
+                if tweet_text is None:
+                    # Normal AI-generated tweet (pre-generated if one is ready)
+                    tweet_text = self.get_fresh_tweet()
+                    cycle["type"] = "ai"
+                    if not tweet_text:
+                        self.tweet_buffer.refill(self.stage, self.get_tweet_context())
+                        return
+                    original_text = tweet_text
+                    
+                    # Add wallet address occasionally (30% chance if not beast)
+                    if self.wallet and self.balance < self.evolution.thresholds.get("beast", 0.02):
+                        if random.random() < 0.3:
+                            tweet_text += f"\n\nfeed me: {self.wallet.get_shortened_address()}"
+                    
+                    image_path = STAGE_PROMPTS[self.stage].get("image")
+                    if image_path and not os.path.exists(image_path):
+                        image_path = None
                 
-                image_path = STAGE_PROMPTS[self.stage].get("image")
-                if image_path and not os.path.exists(image_path):
-                    image_path = None
-            
-            # Post to Twitter
-            success = self.twitter.post_tweet(tweet_text, image_path)
-            
-            if success:
-                self.tweet_count += 1
-                self.save_state()
-                logger.info(f"Tweet #{self.tweet_count} posted!")
-            
-        except Exception as e:
-            logger.error(f"Error in think_and_tweet: {str(e)}")
+                # Post to Twitter
+                success = self.post_tweet(tweet_text, image_path, history_text=original_text)
+                
+                if success:
+                    self.tweet_count += 1
+                    self.record_state("tweet_posted", {"tweet_count": self.tweet_count})
+                    logger.info(f"Tweet #{self.tweet_count} posted!")
+                
+                # Get the next tweet ready in the background
+                self.tweet_buffer.refill(self.stage, self.get_tweet_context())
+                if settings.MEDIA_PRELOAD:
+                    self.twitter.preload_media(self.get_stage_images(), wait=False)
+                
+            except Exception as e:
+                tracing.record_error(e)
+                logger.error(f"Error in think_and_tweet: {str(e)}")
+    
+    def post_tweet(self, text: str, image_path: str = None, history_text: str = None) -> bool:
+        """
+        Post a tweet unless it repeats an earlier one (every tweet the agent
+        posts - regular, progress, evolution, sickness, thank-you - goes
+        through here)
+        
+        Args:
+            text: Tweet text
+            image_path: Optional image to attach
+            history_text: Text to compare and remember, if not all of text
+                (AI tweets leave out the appended wallet line)
+        
+        Returns:
+            True if posted
+        """
+        history_text = history_text or text
+        if self.tweet_history and self.tweet_history.is_duplicate(history_text):
+            logger.warning(f"Skipping tweet - too close to an earlier one: {text[:50]}...")
+            return False
+        
+        success = self.twitter.post_tweet(text, image_path)
+        if success and self.tweet_history:
+            self.tweet_history.add(history_text)
+        return success
+    
+    def get_fresh_tweet(self):
+        """
+        Next AI tweet, regenerated if it is too close to anything posted before
+        
+        Returns:
+            Tweet text, or None if every attempt was a repeat
+        """
+        context = self.get_tweet_context()
+        with tracing.span("generate_tweet") as attributes:
+            tweet_text = self.tweet_buffer.take(self.stage, context)
+            attributes["buffered"] = bool(tweet_text)
+            if tweet_text:
+                logger.info("Using pre-generated tweet")
+            else:
+                tweet_text = self.ai.generate_tweet(self.stage, context)
+        
+        if not self.tweet_history:
+            return tweet_text
+        
+        for _ in range(settings.TWEET_DEDUP_RETRIES):
+            if not self.tweet_history.is_duplicate(tweet_text):
+                return tweet_text
+            with tracing.span("generate_tweet", buffered=False, repeat=True):
+                tweet_text = self.ai.generate_tweet(self.stage, context)
+        
+        if self.tweet_history.is_duplicate(tweet_text):
+            logger.warning("Skipping tweet - every attempt repeated an earlier one")
+            return None
+        return tweet_text
+    
+    def get_stage_images(self) -> list:
+        """
+        Image files of every stage (including sick)
+        """
+        return [prompt["image"] for prompt in STAGE_PROMPTS.values() if prompt.get("image")]
+    
+    def get_tweet_context(self) -> dict:
+        """
+        Context for generating a regular tweet
+        """
+        return {
+            "balance": self.balance,
+            "stage": self.stage,
+            "recent_activity": self.get_recent_activity(),
+            "time_of_day": self.get_time_of_day(),
+            "tweet_count": self.tweet_count,
+            "wallet_address": self.wallet.get_shortened_address() if self.wallet else None
+        }
     
     def get_recent_activity(self) -> str:
         """
@@ -260,39 +505,52 @@ class PolyPuffAgent:
         else:
             return "night"
     
-    def save_state(self):
+    def get_state(self) -> dict:
         """
-        Save agent state to JSON file
+        Current agent state as a dict
         """
-        state = {
+        return {
             "stage": self.stage,
             "balance": self.balance,
             "previous_balance": self.previous_balance,
             "tweet_count": self.tweet_count,
             "last_balance_check": self.last_balance_check,
+            "balance_block": self.balance_block,
             "last_updated": datetime.now().isoformat()
         }
-        
-        os.makedirs("data", exist_ok=True)
-        with open("data/state.json", "w") as f:
-            json.dump(state, f, indent=2)
+    
+    def record_state(self, event: str, changes: dict):
+        """
+        Journal a state transition (cheap append, no full rewrite)
+        """
+        try:
+            with tracing.span("save_state", event=event), self._state_lock:
+                self.state_store.record(event, changes)
+        except Exception as e:
+            logger.error(f"Could not record state ({event}): {str(e)}")
+    
+    def save_state(self):
+        """
+        Write a full snapshot of agent state (compacts the journal)
+        """
+        with tracing.span("save_state", event="snapshot"), self._state_lock:
+            self.state_store.snapshot(self.get_state())
         
         logger.info("State saved")
     
     def load_state(self):
         """
-        Load previous state if exists
+        Load previous state (snapshot + journal) if it exists
         """
         try:
-            if os.path.exists("data/state.json"):
-                with open("data/state.json", "r") as f:
-                    state = json.load(f)
-                
+            state = self.state_store.load()
+            if state:
                 self.stage = state.get("stage", "egg")
                 self.balance = state.get("balance", 0.0)
                 self.previous_balance = state.get("previous_balance", 0.0)
                 self.tweet_count = state.get("tweet_count", 0)
                 self.last_balance_check = state.get("last_balance_check")
+                self.balance_block = state.get("balance_block")
                 
                 logger.info(f"Previous state loaded: {self.stage}, {self.tweet_count} tweets, {self.balance} ETH")
         except Exception as e:
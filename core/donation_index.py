@@ -0,0 +1,203 @@
+"""
+Local SQLite index of wallet inflows (donations)
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from utils.logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS donations (
+    tx_hash      TEXT    NOT NULL,
+    log_index    INTEGER NOT NULL,
+    type         TEXT    NOT NULL,
+    sender       TEXT    NOT NULL,
+    recipient    TEXT    NOT NULL,
+    token        TEXT,
+    value        TEXT    NOT NULL,
+    amount       REAL,
+    block_number INTEGER NOT NULL,
+    timestamp    INTEGER,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_donations_sender ON donations (sender, block_number);
+CREATE INDEX IF NOT EXISTS idx_donations_block ON donations (block_number);
+CREATE INDEX IF NOT EXISTS idx_donations_timestamp ON donations (timestamp);
+
+CREATE TABLE IF NOT EXISTS donors (
+    sender         TEXT PRIMARY KEY,
+    total_eth      REAL    NOT NULL,
+    donation_count INTEGER NOT NULL,
+    first_block    INTEGER NOT NULL,
+    last_block     INTEGER NOT NULL,
+    last_timestamp INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_donors_total ON donors (total_eth DESC);
+"""
+
+# Bumped when `donors` must be rebuilt from `donations`
+# (1: only native ETH transfers count - see DonationIndex)
+SCHEMA_VERSION = 1
+
+# Per-sender totals over native transfers only
+DONOR_TOTALS = """
+    SELECT sender, COALESCE(SUM(amount), 0), COUNT(*),
+           MIN(block_number), MAX(block_number), MAX(timestamp)
+    FROM donations WHERE type = 'native' {where}
+    GROUP BY sender
+"""
+
+
+class DonationIndex:
+    """
+    On-disk, indexed store of donation events from the block scanner
+
+    Writes go through one connection in WAL mode, one transaction per
+    block range. A `donors` table keeps per-sender totals up to date, so
+    "top donors" and "has this address donated" are single index lookups.
+    Only native ETH transfers make someone a donor: anyone can emit an
+    ERC-20 Transfer log from a contract of their own, so token transfers
+    are stored in `donations` (type "erc20") but never counted.
+    Queries use per-thread read-only connections and never block on
+    writes, so reply paths can call them freely.
+    """
+
+    def __init__(self, path: str = "data/donations.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self.migrate()
+
+        logger.info(f"Donation index ready: {path}")
+
+    def migrate(self):
+        """Rebuild donor totals written by an older version"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        with self._write_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM donors")
+                donors = self._conn.execute("INSERT INTO donors " + DONOR_TOTALS.format(where="")).rowcount
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if donors:
+            logger.info(f"Donation index: rebuilt totals for {donors} donors (schema {version} -> {SCHEMA_VERSION})")
+
+    def _reader(self) -> sqlite3.Connection:
+        """Read-only connection for the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def add_donations(self, events: list) -> int:
+        """
+        Bulk-insert scanner events (one transaction). Events already in
+        the index are ignored, so re-scanning a range is harmless.
+
+        Returns:
+            Number of new donations stored
+        """
+        if not events:
+            return 0
+
+        rows = [
+            (
+                event["tx_hash"],
+                event["log_index"],
+                event["type"],
+                event["sender"].lower(),
+                event["recipient"].lower(),
+                event["token"].lower() if event["token"] else None,
+                str(event["value"]),
+                event["amount"],
+                event["block_number"],
+                event["timestamp"],
+            )
+            for event in events
+        ]
+        senders = sorted({row[3] for row in rows})
+
+        with self._write_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO donations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                added = self._conn.total_changes - before
+
+                # Recompute totals for just the senders we touched
+                placeholders = ",".join("?" * len(senders))
+                self._conn.execute("INSERT OR REPLACE INTO donors " +
+                                   DONOR_TOTALS.format(where=f"AND sender IN ({placeholders})"), senders)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return added
+
+    def has_donated(self, address: str) -> bool:
+        """Has this address ever donated native ETH?"""
+        row = self._reader().execute(
+            "SELECT 1 FROM donors WHERE sender = ?", (address.lower(),)
+        ).fetchone()
+        return row is not None
+
+    def get_donor(self, address: str) -> Optional[dict]:
+        """Totals for one donor, or None if they never donated"""
+        row = self._reader().execute(
+            "SELECT * FROM donors WHERE sender = ?", (address.lower(),)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def top_donors(self, limit: int = 10) -> list:
+        """Biggest donors by total ETH"""
+        rows = self._reader().execute(
+            "SELECT * FROM donors ORDER BY total_eth DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def donations_since(self, seconds: int = 3600, limit: int = 100) -> list:
+        """Most recent donations in the last `seconds` (newest first)"""
+        rows = self._reader().execute(
+            "SELECT * FROM donations WHERE timestamp >= ? ORDER BY timestamp DESC LIMIT ?",
+            (int(time.time()) - seconds, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_donations_since(self, seconds: int = 3600) -> int:
+        """Number of donations in the last `seconds`"""
+        row = self._reader().execute(
+            "SELECT COUNT(*) FROM donations WHERE timestamp >= ?",
+            (int(time.time()) - seconds,)
+        ).fetchone()
+        return row[0]
+
+    def donations_in_blocks(self, start: int, end: int) -> list:
+        """Donations in blocks start..end (inclusive), oldest first"""
+        rows = self._reader().execute(
+            "SELECT * FROM donations WHERE block_number BETWEEN ? AND ? "
+            "ORDER BY block_number, log_index",
+            (start, end)
+        ).fetchall()
+        return [dict(row) for row in rows]
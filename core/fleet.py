@@ -0,0 +1,227 @@
+"""
+Fleet mode - hosts many PolyPuff personas in one process
+"""
+import asyncio
+import glob
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from core.agent import PolyPuffAgent
+from core.evolution import EvolutionManager
+from core.donation_index import DonationIndex
+from core.runtime import AgentRuntime
+from core.wallet import BalanceWatcher, WalletManager, create_web3
+from integrations.base_scanner import BaseScanner
+from integrations.gemini_client import GeminiClient, create_model
+from integrations.twitter import TwitterClient, CREDENTIAL_KEYS
+from config.settings import settings
+from utils.logger import logger
+
+
+def load_agent_configs(config_dir: str) -> list:
+    """
+    Load every persona config (*.json) in a directory, sorted by filename
+
+    Each file looks like:
+        {
+            "name": "puff-1",
+            "wallet_address": "0x...",
+            "data_dir": "data/fleet/puff-1",
+            "twitter": {
+                "api_key": "...",
+                "api_secret": "...",
+                "access_token": "...",
+                "access_secret": "..."
+            }
+        }
+
+    "name" defaults to the filename and "data_dir" to FLEET_DATA_DIR/<name>.
+    "wallet_address" and all four "twitter" keys are required.
+    """
+    configs = []
+
+    for path in sorted(glob.glob(os.path.join(config_dir, "*.json"))):
+        with open(path, "r") as f:
+            config = json.load(f)
+
+        name = config.get("name") or os.path.splitext(os.path.basename(path))[0]
+        config["name"] = name
+        config.setdefault("data_dir", os.path.join(settings.FLEET_DATA_DIR, name))
+
+        if not config.get("wallet_address"):
+            raise ValueError(f"{path}: wallet_address is required")
+        # A persona never falls back to the default account's .env keys
+        missing = [key for key in CREDENTIAL_KEYS if not (config.get("twitter") or {}).get(key)]
+        if missing:
+            raise ValueError(f"{path}: twitter credentials missing: {', '.join(missing)}")
+
+        configs.append(config)
+
+    return configs
+
+
+def create_session(pool_size: int) -> requests.Session:
+    """
+    Build a requests.Session with a connection pool big enough for the fleet
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class FleetHost:
+    """
+    Runs N PolyPuffAgents on one event loop
+
+    Agents share one HTTP session (Twitter + RPC connection pools), one
+    Web3 provider, BalanceWatcher and donation scanner, one Gemini model
+    handle, one EvolutionManager and one worker pool. Each agent keeps its
+    own credentials, wallet address and state directory. Balances for the
+    whole fleet are read in one JSON-RPC batch per wallet check. Agent i
+    starts its jobs i/N of the way into each interval, so the fleet's calls
+    are spread out instead of bursting.
+    """
+
+    def __init__(self, config_dir: str = None):
+        self.config_dir = config_dir or settings.FLEET_CONFIG_DIR
+        self.configs = load_agent_configs(self.config_dir)
+        self.agents = []
+        self.runtimes = []
+        self.watcher = None
+        self.scanner = None
+        self._executor = None
+        self._loop = None
+        self._stop_event = None
+
+        logger.info(f"Fleet config loaded: {len(self.configs)} agents from {self.config_dir}")
+
+    def build_agents(self) -> list:
+        """
+        Create one PolyPuffAgent per config, sharing expensive resources
+        """
+        session = create_session(settings.HTTP_POOL_SIZE)
+        w3 = create_web3(session=session)
+        if not w3.is_connected():
+            raise ConnectionError("Cannot connect to Base RPC")
+
+        watcher = self.watcher = BalanceWatcher(w3)
+        model = create_model()
+        evolution = EvolutionManager()
+
+        if settings.DONATION_SCANNER:
+            self.scanner = BaseScanner(
+                w3,
+                [config["wallet_address"] for config in self.configs],
+                cursor_path=os.path.join(settings.FLEET_DATA_DIR, "scanner_cursor.json"),
+                index=DonationIndex(os.path.join(settings.FLEET_DATA_DIR, "donations.db"))
+            )
+
+        for config in self.configs:
+            name = config["name"]
+
+            try:
+                wallet = WalletManager(address=config["wallet_address"], w3=w3, watcher=watcher)
+            except Exception as e:
+                logger.error(f"{name}: skipped - wallet error: {e}")
+                continue
+
+            agent = PolyPuffAgent(
+                twitter=TwitterClient(credentials=config.get("twitter"), session=session),
+                ai=GeminiClient(model=model),
+                wallet=wallet,
+                evolution=evolution,
+                scanner=self.scanner,
+                data_dir=config["data_dir"],
+                name=name
+            )
+            self.agents.append(agent)
+
+        logger.info(f"Fleet ready: {len(self.agents)} agents")
+        return self.agents
+
+    def request_stop(self):
+        """
+        Ask every agent runtime to shut down (safe to call from a signal handler)
+        """
+        if self._loop and self._stop_event and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        
+        for runtime in self.runtimes:
+            runtime.request_stop()
+
+    def check_wallets(self):
+        """
+        Read every agent's balance in one JSON-RPC batch, then let each
+        agent handle its own reading (in parallel on the worker pool)
+        """
+        addresses = [agent.wallet.address for agent in self.agents]
+        readings = self.watcher.get_readings(addresses)
+
+        # One block scan for the whole fleet - agents then just collect
+        # the donations queued for their own wallet
+        if self.scanner:
+            try:
+                self.scanner.scan()
+            except Exception as e:
+                logger.error(f"Fleet donation scan failed: {e}")
+
+        futures = [
+            self._executor.submit(agent.check_wallet_and_evolve, readings[agent.wallet.address])
+            for agent in self.agents
+        ]
+        for future in futures:
+            future.result()
+
+    async def _poll_wallets(self):
+        """
+        Fleet-wide wallet job
+        """
+        interval = settings.CHECK_BALANCE_INTERVAL_MINUTES * 60
+
+        while not self._stop_event.is_set():
+            started = self._loop.time()
+
+            try:
+                await asyncio.to_thread(self.check_wallets)
+            except Exception as e:
+                logger.error(f"Fleet wallet check failed: {e}")
+
+            elapsed = self._loop.time() - started
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=max(0, interval - elapsed))
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self):
+        """
+        Run every agent until shutdown is requested
+        """
+        if not self.agents:
+            self.build_agents()
+
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+
+        count = len(self.agents)
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.FLEET_MAX_WORKERS,
+            thread_name_prefix="polypuff-fleet"
+        )
+        self.runtimes = [
+            AgentRuntime(agent, phase=index / count, executor=self._executor, poll_wallet=False)
+            for index, agent in enumerate(self.agents)
+        ]
+
+        try:
+            await asyncio.gather(
+                self._poll_wallets(),
+                *(runtime.run() for runtime in self.runtimes)
+            )
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.info("Fleet stopped")
@@ -0,0 +1,242 @@
+"""
+Bounded store of mention IDs we have already replied to
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from config.settings import settings
+from utils.logger import logger
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys (no false negatives)
+    """
+
+    def __init__(self, capacity: int, error_rate: float, bits: bytes = None):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits and len(bits) == (self.size + 7) // 8 \
+            else bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class MentionStore:
+    """
+    Set-like record of processed mention IDs with O(1) appends
+
+    Each reply appends one line to `processed_mentions.log`. Only IDs seen
+    in the last MENTION_RETENTION_HOURS are kept in memory. Older ones are
+    evicted and covered by a `floor`: mention IDs are time-ordered
+    snowflakes, so anything at or below the highest evicted ID is treated
+    as processed. `since_id` is what mention fetching resumes from. It only
+    moves when the handler calls advance(), past mentions that are all
+    handled, so a reply that failed is fetched again. `backlog_until` is
+    set while a spike bigger than the page budget is being worked through:
+    mentions between since_id and it still have to be fetched.
+
+    The log is compacted (rewritten with only the live window) once it is
+    twice as long as that window, so startup reads a bounded file no matter
+    how much history there is. With MENTION_BLOOM=true, a persisted Bloom
+    filter also remembers evicted IDs that arrive out of order.
+    """
+
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+        self.log_path = os.path.join(data_dir, "processed_mentions.log")
+        self.meta_path = os.path.join(data_dir, "processed_mentions.json")
+        self.bloom_path = os.path.join(data_dir, "processed_mentions.bloom")
+        self.legacy_path = os.path.join(data_dir, "processed_tweets.json")
+
+        self.retention = settings.MENTION_RETENTION_HOURS * 3600
+        self.recent = {}  # tweet id -> time seen
+        self.since_id = None
+        self.backlog_until = None
+        self.floor = 0
+        self.log_lines = 0
+        self.bloom = None
+        if settings.MENTION_BLOOM:
+            self.bloom = BloomFilter(settings.MENTION_BLOOM_CAPACITY, settings.MENTION_BLOOM_ERROR)
+
+        self._log = None
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """
+        Load the high-water marks and the live window of IDs
+        """
+        with self._lock:
+            try:
+                if os.path.exists(self.meta_path):
+                    with open(self.meta_path, "r") as f:
+                        meta = json.load(f)
+                    self.since_id = meta.get("since_id")
+                    self.backlog_until = meta.get("backlog_until")
+                    self.floor = meta.get("floor", 0)
+
+                if self.bloom and os.path.exists(self.bloom_path):
+                    with open(self.bloom_path, "rb") as f:
+                        self.bloom = BloomFilter(settings.MENTION_BLOOM_CAPACITY,
+                                                 settings.MENTION_BLOOM_ERROR, f.read())
+
+                if os.path.exists(self.log_path):
+                    with open(self.log_path, "r") as f:
+                        for line in f:
+                            parts = line.split()
+                            if len(parts) != 2:
+                                continue  # torn write
+                            self._remember(parts[0], float(parts[1]))
+                            self.log_lines += 1
+                elif os.path.exists(self.legacy_path):
+                    self._migrate_legacy()
+            except Exception as e:
+                logger.error(f"Could not load processed mentions: {e}")
+
+            self.evict()
+
+    def _migrate_legacy(self):
+        """Import IDs from the old processed_tweets.json once"""
+        with open(self.legacy_path, "r") as f:
+            tweet_ids = json.load(f).get("tweet_ids", [])
+
+        now = time.time()
+        for tweet_id in tweet_ids:
+            self._remember(str(tweet_id), now)
+        # Every legacy ID was replied to, so fetching resumes after the newest
+        numeric = [int(tweet_id) for tweet_id in map(str, tweet_ids) if tweet_id.isdigit()]
+        if numeric:
+            self.since_id = str(max(numeric))
+        self.compact()
+        logger.info(f"Migrated {len(tweet_ids)} processed tweet IDs from {self.legacy_path}")
+
+    def _remember(self, tweet_id: str, seen_at: float):
+        self.recent[tweet_id] = seen_at
+        if self.bloom:
+            self.bloom.add(tweet_id)
+
+    def add(self, tweet_id):
+        """
+        Mark a mention as processed (one appended line)
+        """
+        tweet_id = str(tweet_id)
+        now = time.time()
+
+        with self._lock:
+            self._remember(tweet_id, now)
+            if self._log is None:
+                os.makedirs(self.data_dir, exist_ok=True)
+                self._log = open(self.log_path, "a")
+            self._log.write(f"{tweet_id} {now:.0f}\n")
+            self._log.flush()
+            self.log_lines += 1
+
+            if self.log_lines > 2 * max(len(self.recent), 1000):
+                self.evict()
+                self.compact()
+
+    def advance(self, tweet_id):
+        """
+        Resume mention fetching after tweet_id (never moves backwards)
+
+        Args:
+            tweet_id: Newest mention such that it and every mention before
+                it have been handled
+        """
+        tweet_id = str(tweet_id)
+        with self._lock:
+            if not tweet_id.isdigit() or (self.since_id is not None and int(tweet_id) <= int(self.since_id)):
+                return
+            self.since_id = tweet_id
+            self.save_meta()
+
+    def set_backlog(self, until_id):
+        """
+        Remember that mentions older than until_id (and newer than since_id)
+        haven't been fetched yet, or clear that with None
+        """
+        until_id = None if until_id is None else str(until_id)
+        with self._lock:
+            if until_id != self.backlog_until:
+                self.backlog_until = until_id
+                self.save_meta()
+
+    def __contains__(self, tweet_id) -> bool:
+        tweet_id = str(tweet_id)
+        if tweet_id in self.recent:
+            return True
+        if tweet_id.isdigit() and int(tweet_id) <= self.floor:
+            return True
+        return bool(self.bloom) and tweet_id in self.bloom
+
+    def __len__(self) -> int:
+        return len(self.recent)
+
+    def evict(self):
+        """
+        Drop IDs older than the retention window, raising the floor
+        """
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [tweet_id for tweet_id, seen_at in self.recent.items() if seen_at < cutoff]
+            for tweet_id in expired:
+                del self.recent[tweet_id]
+                if tweet_id.isdigit():
+                    self.floor = max(self.floor, int(tweet_id))
+
+    def compact(self):
+        """
+        Rewrite the log with only the live window (atomic replace)
+        """
+        with self._lock:
+            os.makedirs(self.data_dir, exist_ok=True)
+            if self._log:
+                self._log.close()
+                self._log = None
+
+            tmp_path = f"{self.log_path}.tmp"
+            with open(tmp_path, "w") as f:
+                for tweet_id, seen_at in self.recent.items():
+                    f.write(f"{tweet_id} {seen_at:.0f}\n")
+            os.replace(tmp_path, self.log_path)
+            self.log_lines = len(self.recent)
+
+            self.save_meta()
+
+            if self.bloom:
+                tmp_path = f"{self.bloom_path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(self.bloom.bits)
+                os.replace(tmp_path, self.bloom_path)
+
+    def save_meta(self):
+        """
+        Write since_id, backlog_until and the floor (atomic replace)
+        """
+        with self._lock:
+            os.makedirs(self.data_dir, exist_ok=True)
+            tmp_path = f"{self.meta_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "since_id": self.since_id,
+                    "backlog_until": self.backlog_until,
+                    "floor": self.floor,
+                    "last_updated": datetime.now().isoformat()
+                }, f)
+            os.replace(tmp_path, self.meta_path)
@@ -0,0 +1,205 @@
+"""
+Asyncio runtime - runs each agent job as an independent task
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import settings
+from utils.logger import logger
+
+
+class AgentRuntime:
+    """
+    Event-loop runtime for PolyPuff
+
+    Tweeting, mention handling and wallet polling each get their own task
+    and cadence, so a slow Gemini call or an evolution pause in one job
+    never delays the others. The agent methods are blocking, so every job
+    runs on a worker thread owned by the runtime. Their Gemini calls don't
+    block, though: while the runtime runs, the agent's GeminiClient hands
+    tweet, reply and donation thank-you generation back to the event loop
+    (GeminiClient.runtime_loop), including the tweet buffer's refills.
+    """
+
+    def __init__(self, agent, phase: float = 0.0, executor=None, poll_wallet: bool = True):
+        """
+        Args:
+            agent: PolyPuffAgent to drive
+            phase: Fraction (0-1) of each job's interval to wait before its
+                first run. Fleet mode gives every agent a different phase
+                so they don't all fire at the same moment.
+            executor: Shared thread pool (fleet mode). The runtime creates
+                and owns one if omitted.
+            poll_wallet: Run the wallet job. Fleet mode polls every wallet
+                in one batch instead.
+        """
+        self.agent = agent
+        self.phase = phase
+        self.poll_wallet = poll_wallet
+
+        self._loop = None
+        self._stop_event = None
+        self._tasks = []
+        self._running = set()  # job futures on worker threads
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=3,
+            thread_name_prefix="polypuff-job"
+        )
+
+    def get_jobs(self) -> list:
+        """
+        Jobs run by this runtime
+
+        Returns:
+            List of (name, function, interval_seconds) tuples
+        """
+        jobs = [
+            (
+                "tweet",
+                self._tweet,
+                settings.TWEET_INTERVAL_MINUTES * 60
+            ),
+            (
+                "mentions",
+                self.agent.check_interactions,
+                settings.CHECK_MENTIONS_INTERVAL_MINUTES * 60
+            ),
+        ]
+
+        if self.poll_wallet and self.agent.blockchain_enabled:
+            jobs.append((
+                "wallet",
+                self.agent.check_wallet_and_evolve,
+                settings.CHECK_BALANCE_INTERVAL_MINUTES * 60
+            ))
+
+        return jobs
+
+    def request_stop(self):
+        """
+        Ask the runtime to shut down (safe to call from a signal handler)
+        """
+        if self._loop and self._stop_event and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+
+    async def _wait_for_stop(self, timeout: float) -> bool:
+        """
+        Sleep for up to `timeout` seconds, waking early on shutdown
+
+        Returns:
+            True if shutdown was requested
+        """
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=max(0, timeout))
+        except asyncio.TimeoutError:
+            pass
+        return self._stop_event.is_set()
+
+    async def _tweet(self):
+        """
+        Tweet job: generate the tweet on the event loop, post it on a worker thread
+
+        Generation goes through GeminiClient.generate_tweet_async, so a hung
+        request is abandoned at GEMINI_TIMEOUT_SECONDS (and cancelled on
+        shutdown) instead of holding a worker thread. The tweet goes into the
+        agent's tweet buffer, where think_and_tweet picks it up; it still
+        generates one itself if this failed or the stage moved on.
+        """
+        agent = self.agent
+        context = agent.get_tweet_context()
+        if agent.tweet_buffer.wants(agent.stage, context):
+            try:
+                tweet = await agent.ai.generate_tweet_async(agent.stage, context)
+                agent.tweet_buffer.put(agent.stage, context, tweet)
+            except asyncio.TimeoutError:
+                logger.warning(f"{agent.name}: tweet generation timed out - generating on the worker instead")
+            except Exception as e:
+                logger.warning(f"{agent.name}: async tweet generation failed: {e}")
+
+        await self._in_worker(lambda: agent.think_and_tweet(check_wallet=False))
+
+    async def _in_worker(self, func):
+        """
+        Run a blocking job on a worker thread, tracked so shutdown can wait for it
+        """
+        future = self._executor.submit(func)
+        self._running.add(future)
+        future.add_done_callback(self._running.discard)
+        return await asyncio.wrap_future(future)
+
+    async def _run_job(self, name: str, func, interval: float):
+        """
+        Run one job forever on its own cadence
+        """
+        if self.phase and await self._wait_for_stop(self.phase * interval):
+            return
+
+        while not self._stop_event.is_set():
+            started = self._loop.time()
+
+            try:
+                if asyncio.iscoroutinefunction(func):
+                    await func()
+                else:
+                    await self._in_worker(func)
+            except Exception as e:
+                logger.error(f"{self.agent.name}: job '{name}' failed: {e}")
+
+            elapsed = self._loop.time() - started
+            logger.info(f"{self.agent.name}: job '{name}' finished in {elapsed:.1f}s")
+
+            if await self._wait_for_stop(interval - elapsed):
+                break
+
+    async def run(self):
+        """
+        Start all jobs and block until shutdown is requested
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self.agent.ai.loop = self._loop
+
+        for name, func, interval in self.get_jobs():
+            task = asyncio.create_task(self._run_job(name, func, interval), name=name)
+            self._tasks.append(task)
+            logger.info(f"{self.agent.name}: scheduled job '{name}' every {interval // 60} minutes")
+
+        await self._stop_event.wait()
+        await self.shutdown()
+
+    async def shutdown(self):
+        """
+        Let in-flight jobs finish, cancel the rest and save state
+
+        Cancelling a job's task can't stop a worker thread that is already
+        running it, so those get the rest of SHUTDOWN_TIMEOUT_SECONDS before
+        the final save.
+        """
+        logger.info("Stopping runtime jobs...")
+        timeout = settings.SHUTDOWN_TIMEOUT_SECONDS
+        deadline = self._loop.time() + timeout
+
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            logger.warning(f"{self.agent.name}: job '{task.get_name()}' did not finish in {timeout}s - cancelling")
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        if self._running:
+            running = [asyncio.wrap_future(future) for future in self._running]
+            done, still_running = await asyncio.wait(running, timeout=max(0, deadline - self._loop.time()))
+            if still_running:
+                logger.warning(f"{self.agent.name}: {len(still_running)} job(s) still running after {timeout}s "
+                               f"- saving state anyway")
+
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._tasks = []
+        self.agent.ai.loop = None
+
+        try:
+            self.agent.save_state()
+        except Exception as e:
+            logger.error(f"Could not save state on shutdown: {e}")
+
+        logger.info("Runtime stopped")
@@ -0,0 +1,147 @@
+"""
+Journaled agent state: append-only log + periodic compacted snapshots
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from config.settings import settings
+from utils.logger import logger
+
+
+class StateStore:
+    """
+    Crash-safe storage for one agent's state
+
+    Every state transition (balance reading, stage change, tweet posted)
+    is appended to `state.journal` as one JSON line. Every
+    STATE_SNAPSHOT_EVERY records the full state is written to `state.json`
+    (temp file + fsync + atomic rename) and the journal is emptied.
+
+    Loading reads the snapshot and replays only the journal records written
+    after it. A torn line from a crash mid-append is skipped, so at worst
+    the final transition is lost, never the whole file. Loading never
+    writes, so the health check can read a live agent's state.
+    """
+
+    def __init__(self, data_dir: str = "data"):
+        self.data_dir = data_dir
+        self.snapshot_path = os.path.join(data_dir, "state.json")
+        self.journal_path = os.path.join(data_dir, "state.journal")
+        self.state = {}
+        self.seq = 0
+        self.pending = 0  # journal records since the last snapshot
+        self._journal = None
+        self._lock = threading.RLock()
+
+    def load(self) -> dict:
+        """
+        Rebuild state from the last snapshot plus the journal tail
+
+        Returns:
+            Current state dict (empty if nothing was ever saved)
+        """
+        with self._lock:
+            self.state = {}
+            self.seq = 0
+            self.pending = 0
+
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, "r") as f:
+                    self.state = json.load(f)
+                self.seq = self.state.pop("journal_seq", 0)
+
+            replayed = 0
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, "r") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            logger.warning(f"Ignoring torn record in {self.journal_path}")
+                            continue
+
+                        # Records already folded into the snapshot (crash
+                        # between snapshot and journal reset)
+                        if record["seq"] <= self.seq:
+                            continue
+
+                        self.state.update(record["changes"])
+                        self.state["last_updated"] = record["at"]
+                        self.seq = record["seq"]
+                        replayed += 1
+
+            self.pending = replayed
+            if replayed:
+                logger.info(f"Replayed {replayed} state journal record(s)")
+            return dict(self.state)
+
+    def record(self, event: str, changes: dict):
+        """
+        Append one state transition to the journal
+
+        Args:
+            event: What happened ("balance_reading", "stage_changed", ...)
+            changes: State fields that changed
+        """
+        with self._lock:
+            self.seq += 1
+            now = datetime.now().isoformat()
+            line = json.dumps({"seq": self.seq, "event": event, "at": now, "changes": changes})
+
+            journal = self._open_journal()
+            journal.write(line + "\n")
+            journal.flush()
+            if settings.STATE_FSYNC:
+                os.fsync(journal.fileno())
+
+            self.state.update(changes)
+            self.state["last_updated"] = now
+            self.pending += 1
+
+            if self.pending >= settings.STATE_SNAPSHOT_EVERY:
+                self.snapshot()
+
+    def snapshot(self, state: dict = None):
+        """
+        Write a compacted snapshot and empty the journal
+
+        Args:
+            state: Full state to store (defaults to the replayed state)
+        """
+        with self._lock:
+            if state is not None:
+                self.state = dict(state)
+            self.state.setdefault("last_updated", datetime.now().isoformat())
+
+            os.makedirs(self.data_dir, exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({**self.state, "journal_seq": self.seq}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # The snapshot now covers every record - start a fresh journal
+            if self._journal:
+                self._journal.close()
+            self._journal = open(self.journal_path, "w")
+            self.pending = 0
+
+    def close(self):
+        """Close the journal file"""
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def _open_journal(self):
+        if self._journal is None:
+            os.makedirs(self.data_dir, exist_ok=True)
+            self._journal = open(self.journal_path, "a+")
+            # Terminate a torn last line so new records start on their own
+            if self._journal.tell() > 0:
+                self._journal.seek(self._journal.tell() - 1)
+                if self._journal.read(1) != "\n":
+                    self._journal.write("\n")
+        return self._journal
@@ -0,0 +1,162 @@
+"""
+Pre-generated tweet buffer - keeps ready-to-post tweets per stage
+"""
+import threading
+import time
+from collections import deque
+from config.settings import settings
+from utils.logger import logger
+
+
+class TweetBuffer:
+    """
+    Small queue of tweets generated ahead of time on a background thread
+
+    Tweets are keyed on what they were written for: stage, balance bucket
+    (TWEET_BUFFER_BALANCE_STEP ETH) and time of day. take() only hands out a
+    tweet whose key matches the agent right now, and drops everything
+    buffered for any other key, so an "egg" tweet can never go out after
+    evolving to slime. Tweets older than TWEET_BUFFER_MAX_AGE_MINUTES are
+    dropped too.
+    """
+
+    def __init__(self, ai, size: int = None):
+        """
+        Args:
+            ai: GeminiClient used to generate tweets
+            size: Tweets to keep ready (TWEET_BUFFER_SIZE, 0 disables)
+        """
+        self.ai = ai
+        self.size = settings.TWEET_BUFFER_SIZE if size is None else size
+        self.max_age = settings.TWEET_BUFFER_MAX_AGE_MINUTES * 60
+
+        self.key = None
+        self.tweets = deque()  # (created, text)
+        self.target = None  # (key, stage, context) to refill for
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.stats = {"hits": 0, "misses": 0, "generated": 0, "invalidated": 0}
+
+    @staticmethod
+    def bucket_key(stage: str, context: dict) -> tuple:
+        """What a buffered tweet was written for"""
+        step = settings.TWEET_BUFFER_BALANCE_STEP
+        return (stage, int(context.get("balance", 0) / step), context.get("time_of_day"))
+
+    def take(self, stage: str, context: dict):
+        """
+        Pop a ready tweet for the agent's current state
+
+        Returns:
+            Tweet text, or None if nothing matching is buffered
+        """
+        if not self.size:
+            return None
+
+        key = self.bucket_key(stage, context)
+        with self._cond:
+            if key != self.key:
+                self.invalidate()
+                self.key = key
+
+            while self.tweets and time.time() - self.tweets[0][0] > self.max_age:
+                self.tweets.popleft()
+
+            if self.tweets:
+                self.stats["hits"] += 1
+                return self.tweets.popleft()[1]
+
+        self.stats["misses"] += 1
+        return None
+
+    def refill(self, stage: str, context: dict):
+        """
+        Ask the background thread to top the buffer up for this state
+        """
+        if not self.size:
+            return
+
+        key = self.bucket_key(stage, context)
+        with self._cond:
+            if key != self.key:
+                self.invalidate()
+                self.key = key
+            self.target = (key, stage, dict(context))
+            self._cond.notify()
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="polypuff-tweet-buffer", daemon=True)
+                self._thread.start()
+
+    def wants(self, stage: str, context: dict) -> bool:
+        """
+        True if no tweet is ready for this state and one could be buffered
+        """
+        if not self.size:
+            return False
+
+        key = self.bucket_key(stage, context)
+        with self._cond:
+            if key != self.key:
+                return True
+            while self.tweets and time.time() - self.tweets[0][0] > self.max_age:
+                self.tweets.popleft()
+            return not self.tweets
+
+    def put(self, stage: str, context: dict, tweet: str):
+        """
+        Buffer a tweet generated elsewhere (the async runtime generates on
+        its event loop)
+        """
+        if not self.size:
+            return
+
+        key = self.bucket_key(stage, context)
+        with self._cond:
+            if key != self.key:
+                self.invalidate()
+                self.key = key
+            if len(self.tweets) < self.size:
+                self.tweets.append((time.time(), tweet))
+                self.stats["generated"] += 1
+
+    def invalidate(self):
+        """Drop every buffered tweet (stage or balance bucket changed)"""
+        with self._cond:
+            if self.tweets:
+                self.stats["invalidated"] += len(self.tweets)
+                logger.info(f"Tweet buffer: dropped {len(self.tweets)} tweet(s) for {self.key}")
+            self.tweets.clear()
+            self.key = None
+            self.target = None
+
+    def stop(self):
+        """Stop the background thread"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (self.target is None or len(self.tweets) >= self.size):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                key, stage, context = self.target
+
+            try:
+                tweet = self.ai.generate_tweet(stage, context)
+            except Exception as e:
+                logger.warning(f"Tweet buffer refill failed: {e}")
+                with self._cond:
+                    self.target = None  # try again on the next refill()
+                continue
+
+            with self._cond:
+                # The state moved on while we were generating
+                if key != self.key:
+                    continue
+                self.tweets.append((time.time(), tweet))
+                self.stats["generated"] += 1
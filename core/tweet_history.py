@@ -0,0 +1,176 @@
+"""
+Persistent near-duplicate index over every tweet the agent has posted
+"""
+import hashlib
+import json
+import operator
+import os
+import re
+import struct
+import threading
+import time
+from config.settings import settings
+from utils.logger import logger
+
+NUM_PERM = 64  # MinHash values per tweet (16 per blake2b digest)
+BANDS = 16  # LSH bands of ROWS values; tweets sharing any band are compared
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 2  # words
+
+URL_OR_HANDLE = re.compile(r"https?://\S+|@\w+")
+NON_WORD = re.compile(r"[^\w\s]")
+_DIGEST = struct.Struct("<16I")
+
+
+def normalize_tweet(text: str) -> str:
+    """Lowercase, no links, handles, punctuation or emoji, single spaces"""
+    text = URL_OR_HANDLE.sub(" ", text.lower())
+    return " ".join(NON_WORD.sub(" ", text).split())
+
+
+def signature(text: str) -> bytes:
+    """
+    MinHash signature over word pairs of the normalized text
+
+    Returns:
+        NUM_PERM little-endian uint32s, or b"" for text with no words
+    """
+    words = normalize_tweet(text).split()
+    if not words:
+        return b""
+    shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+
+    rows = []
+    for shingle in shingles:
+        data = shingle.encode()
+        row = ()
+        for seed in range(NUM_PERM // 16):
+            row += _DIGEST.unpack(hashlib.blake2b(data, digest_size=64, salt=bytes([seed]) * 16).digest())
+        rows.append(row)
+    return struct.pack(f"<{NUM_PERM}I", *map(min, zip(*rows)))
+
+
+def similarity(first: bytes, second: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    if not first or not second:
+        return 0.0
+    same = sum(map(operator.eq, memoryview(first).cast("I"), memoryview(second).cast("I")))
+    return same / NUM_PERM
+
+
+class TweetHistory:
+    """
+    Every posted tweet as a MinHash signature, indexed for similarity lookups
+
+    Signatures are appended to `posted_tweets.log` (one JSON line per
+    tweet, with the text) and rebuilt into an in-memory LSH index at
+    startup, so a check only compares the candidate against the few
+    tweets that share a band with it, not the whole history.
+    """
+
+    def __init__(self, data_dir: str = "data", threshold: float = None):
+        """
+        Args:
+            data_dir: Where the agent keeps its files (one history per persona)
+            threshold: Similarity at which a tweet counts as a repeat
+                (TWEET_DEDUP_THRESHOLD)
+        """
+        self.path = os.path.join(data_dir, "posted_tweets.log")
+        self.threshold = settings.TWEET_DEDUP_THRESHOLD if threshold is None else threshold
+        self.signatures = []
+        self.buckets = [{} for _ in range(BANDS)]  # band value -> tweet indexes
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """
+        Rebuild the index from the log
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    sig = bytes.fromhex(entry.get("sig", ""))
+                    if len(sig) != NUM_PERM * 4:
+                        sig = signature(entry["text"])  # written with other parameters
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn last line
+                self._index(sig)
+        logger.info(f"Tweet history: {len(self.signatures):,} posted tweets indexed")
+
+    def _index(self, sig: bytes):
+        position = len(self.signatures)
+        self.signatures.append(sig)
+        if not sig:
+            return
+        width = ROWS * 4
+        for band, bucket in enumerate(self.buckets):
+            bucket.setdefault(sig[band * width:(band + 1) * width], []).append(position)
+
+    def most_similar(self, text: str, sig: bytes = None) -> float:
+        """
+        Highest similarity between text and any posted tweet
+
+        Args:
+            text: Candidate tweet
+            sig: Its signature, if already computed
+
+        Returns:
+            0.0 - 1.0 (only tweets sharing an LSH band are compared)
+        """
+        sig = signature(text) if sig is None else sig
+        if not sig:
+            return 0.0
+
+        width = ROWS * 4
+        with self._lock:
+            candidates = set()
+            for band, bucket in enumerate(self.buckets):
+                candidates.update(bucket.get(sig[band * width:(band + 1) * width], ()))
+            return max((similarity(sig, self.signatures[i]) for i in candidates), default=0.0)
+
+    def is_duplicate(self, text: str) -> bool:
+        """
+        True if text is too close to something already posted
+        """
+        score = self.most_similar(text)
+        if score >= self.threshold:
+            logger.info(f"Tweet history: {score:.0%} similar to an earlier tweet: {text[:50]}...")
+            return True
+        return False
+
+    def add(self, text: str):
+        """
+        Record a posted tweet
+        """
+        sig = signature(text)
+        with self._lock:
+            self._index(sig)
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"ts": int(time.time()), "sig": sig.hex(), "text": text}) + "\n")
+            except Exception as e:
+                logger.error(f"Error saving tweet history: {e}")
+
+    def __len__(self):
+        return len(self.signatures)
+
+
+def test_tweet_history():
+    """
+    Test the near-duplicate index
+    """
+    import tempfile
+
+    history = TweetHistory(tempfile.mkdtemp(), threshold=0.6)
+    history.add("so hungry in my little shell today 🥺 anyone got snacks?")
+    print(f"Repeat: {history.most_similar('SO hungry in my little shell today!! anyone got snacks')}")
+    print(f"New: {history.most_similar('the blockchain is sparkly tonight ✨')}")
+
+
+if __name__ == "__main__":
+    test_tweet_history()
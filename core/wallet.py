@@ -1,24 +1,176 @@
+import threading
+import time
+from datetime import datetime
 from web3 import Web3
 from config.settings import settings
 from utils.logger import logger
+from utils.rpc import batch_call
+from utils.metrics import instrument_web3
 from typing import Optional
 
+def create_web3(session=None) -> Web3:
+    """
+    Build a Web3 connection to the configured Base RPC
+    
+    Args:
+        session: Optional requests.Session to share a connection pool
+    """
+    logger.info(f"Connecting to RPC: {settings.BASE_RPC_URL}")
+    return Web3(Web3.HTTPProvider(settings.BASE_RPC_URL, session=session))
+
+def fetch_balances(w3: Web3, addresses: list, block_number: int,
+                   batch_size: Optional[int] = None) -> dict:
+    """
+    Read many balances at one block with a single JSON-RPC batch
+    
+    Oversized lists are split into RPC_BATCH_SIZE chunks automatically.
+    A single address uses a plain eth_getBalance call.
+    
+    Args:
+        w3: Web3 connection
+        addresses: Checksum addresses to read
+        block_number: Block to read every balance at
+        batch_size: Calls per HTTP request (defaults to RPC_BATCH_SIZE)
+    
+    Returns:
+        {address: {"balance_wei": int, "block_number": int}}
+    """
+    if len(addresses) == 1:
+        balances = [w3.eth.get_balance(addresses[0], block_identifier=block_number)]
+    else:
+        calls = [("eth_getBalance", [address, hex(block_number)]) for address in addresses]
+        results = batch_call(w3, calls, batch_size or settings.RPC_BATCH_SIZE)
+        balances = [int(result, 16) for result in results]
+    
+    return {
+        address: {"balance_wei": balance_wei, "block_number": block_number}
+        for address, balance_wei in zip(addresses, balances)
+    }
+
+class BalanceWatcher:
+    """
+    Tracks the chain head and only re-reads balances when it moves
+    
+    Each reading is pinned to the block it was read at. Polls that land on
+    an unchanged head are served from the last reading, so they cost at
+    most one eth_blockNumber call (none within BLOCK_TIME_SECONDS of the
+    previous head check). One watcher can be shared by several wallets.
+    """
+    
+    def __init__(self, w3: Web3):
+        self.w3 = w3
+        self.head_block = None
+        self.head_checked_at = 0.0
+        self.readings = {}
+        self._lock = threading.Lock()
+    
+    def note_block(self, block_number: int):
+        """
+        Record a block height seen elsewhere (e.g. by another RPC call)
+        """
+        with self._lock:
+            if self.head_block is None or block_number > self.head_block:
+                self.head_block = block_number
+            self.head_checked_at = time.monotonic()
+    
+    def get_head(self) -> int:
+        """
+        Get the latest block number, re-checking at most once per block time
+        """
+        with self._lock:
+            recent = time.monotonic() - self.head_checked_at < settings.BLOCK_TIME_SECONDS
+            if self.head_block is not None and recent:
+                return self.head_block
+        
+        self.note_block(self.w3.eth.block_number)
+        return self.head_block
+    
+    def get_reading(self, address: str) -> dict:
+        """
+        Get the balance of an address as of the latest block
+        
+        Returns:
+            dict with address, balance_wei, balance (ETH), block_number,
+            read_at and cached (True if the head hadn't moved)
+        """
+        return self.get_readings([address])[address]
+    
+    def get_readings(self, addresses: list) -> dict:
+        """
+        Get balances for many addresses as of the latest block
+        
+        Addresses already read at the current head come from cache; the
+        rest are fetched together in one JSON-RPC batch.
+        
+        Returns:
+            {address: reading dict} (see get_reading)
+        """
+        head = self.get_head()
+        readings = {}
+        stale = []
+        
+        with self._lock:
+            for address in addresses:
+                cached = self.readings.get(address)
+                if cached and cached["block_number"] >= head:
+                    readings[address] = dict(cached, cached=True)
+                else:
+                    stale.append(address)
+        
+        if stale:
+            read_at = datetime.now().isoformat()
+            fetched = fetch_balances(self.w3, stale, head)
+            
+            with self._lock:
+                for address, result in fetched.items():
+                    reading = {
+                        "address": address,
+                        "balance_wei": result["balance_wei"],
+                        "balance": float(self.w3.from_wei(result["balance_wei"], 'ether')),
+                        "block_number": head,
+                        "read_at": read_at,
+                        "cached": False
+                    }
+                    self.readings[address] = reading
+                    readings[address] = reading
+        
+        return readings
+    
+    def blocks_behind(self, block_number: Optional[int]) -> Optional[int]:
+        """
+        How many blocks the last known head is ahead of `block_number`
+        (None if either is unknown)
+        """
+        if block_number is None or self.head_block is None:
+            return None
+        return max(0, self.head_block - block_number)
+
 class WalletManager:
     """
     Manages blockchain wallet interactions (Base network)
     """
     
-    def __init__(self):
+    def __init__(self, address: Optional[str] = None, w3: Optional[Web3] = None,
+                 watcher: Optional[BalanceWatcher] = None):
+        """
+        Args:
+            address: Wallet to watch (defaults to BASE_WALLET_ADDRESS)
+            w3: Existing Web3 connection to reuse (fleet mode shares one
+                provider across wallets)
+            watcher: Existing BalanceWatcher to share the head tracking
+        """
         # Connect to Base network
-        print(f"Connecting to RPC: {settings.BASE_RPC_URL}")
-        self.w3 = Web3(Web3.HTTPProvider(settings.BASE_RPC_URL))
-        
-        if self.w3.is_connected():
-            chain_id = self.w3.eth.chain_id
-            print(f"Connected! Chain ID: {chain_id}")
+        if w3 is None:
+            w3 = create_web3()
+            
+            if w3.is_connected():
+                chain_id = w3.eth.chain_id
+                logger.info(f"Connected! Chain ID: {chain_id}")
+        # Every JSON-RPC call through this connection is timed
+        self.w3 = instrument_web3(w3)
         
-        self.address = Web3.to_checksum_address(settings.BASE_WALLET_ADDRESS)
-        print(f"Checking address: {self.address}")
+        self.address = Web3.to_checksum_address(address or settings.BASE_WALLET_ADDRESS)
+        logger.debug(f"Checking address: {self.address}")
         
         # Verify connection
         if self.w3.is_connected():
@@ -32,29 +184,63 @@ class WalletManager:
             logger.error(f"Invalid wallet address: {self.address}")
             raise ValueError("Invalid wallet address format")
         
+        self.watcher = watcher or BalanceWatcher(self.w3)
+        
         logger.info(f"Wallet initialized: {self.address[:10]}...{self.address[-8:]}")
     
-    def get_balance(self) -> float:
+    def get_balance_reading(self) -> Optional[dict]:
         """
-        Get current wallet balance in ETH
+        Get current wallet balance, pinned to the block it was read at
+        
+        Only hits eth_getBalance when a new block has arrived since the
+        last reading.
         
         Returns:
-            Balance in ETH (e.g., 0.005)
+            Reading dict (see BalanceWatcher.get_reading), or None on error
         """
         try:
-            # Get balance in Wei (smallest unit)
-            balance_wei = self.w3.eth.get_balance(self.address)
-            print(f"Balance in Wei: {balance_wei}")
+            reading = self.watcher.get_reading(self.address)
             
-            # Convert Wei to ETH
-            balance_eth = self.w3.from_wei(balance_wei, 'ether')
+            if reading["cached"]:
+                logger.debug(f"No new block since #{reading['block_number']} - balance unchanged")
+            else:
+                logger.debug(f"Balance in Wei: {reading['balance_wei']}")
+                logger.info(f"Current balance: {reading['balance']} ETH (block #{reading['block_number']})")
             
-            logger.info(f"Current balance: {balance_eth} ETH")
-            return float(balance_eth)
+            return reading
             
         except Exception as e:
             logger.error(f"Error reading balance: {str(e)}")
+            return None
+    
+    def get_balance(self) -> float:
+        """
+        Get current wallet balance in ETH
+        
+        Returns:
+            Balance in ETH (e.g., 0.005)
+        """
+        reading = self.get_balance_reading()
+        if reading is None:
             return 0.0
+        return reading["balance"]
+    
+    def get_balances(self, addresses: list) -> dict:
+        """
+        Get balances for many wallets in a single JSON-RPC batch
+        
+        Args:
+            addresses: Wallet addresses (any case)
+        
+        Returns:
+            {checksum_address: reading dict}, empty on error
+        """
+        try:
+            checksummed = [Web3.to_checksum_address(address) for address in addresses]
+            return self.watcher.get_readings(checksummed)
+        except Exception as e:
+            logger.error(f"Error reading balances: {str(e)}")
+            return {}
     
     def get_recent_transactions(self, limit: int = 5) -> list:
         """
@@ -66,6 +252,7 @@ class WalletManager:
         """
         try:
             current_block = self.w3.eth.block_number
+            self.watcher.note_block(current_block)
             logger.info(f"Current block: {current_block}")
             
             # For hackathon: we'll just track balance changes
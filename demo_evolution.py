@@ -45,7 +45,7 @@ def run_demo():
             print(f"Image: {image_path}")
             
             # Post tweet
-            agent.twitter.post_tweet(tweet_text, image_path)
+            agent.post_tweet(tweet_text, image_path)
             print("✅ Posted!")
             
             # Update profile pic to match
@@ -1,28 +1,174 @@
 import google.generativeai as genai
+import asyncio
+import json
 import os
 import random
+import re
+import threading
+import weakref
+from functools import lru_cache
 from dotenv import load_dotenv
-from config.prompts import STAGE_PROMPTS, FALLBACK_TWEETS
+from config.prompts import (STAGE_PROMPTS, FALLBACK_TWEETS, REPLY_STYLES, BATCH_REPLY_PROMPT,
+                            TWEET_PROMPT_SECTIONS, REPLY_PROMPT_SECTIONS, REPLY_PROMPTS, DONATION_THANKS_PROMPT)
+from config.intents import TWEET_TYPES
 from config.settings import settings
+from utils.intent_matcher import IntentMatcher
 from utils.logger import logger
+from utils import metrics
+from utils.prompt_templates import Prompt
 
 load_dotenv()
 
+TWEET_GENERATION_CONFIG = {
+    'temperature': 1.0,  # Max creativity
+    'top_p': 0.95,
+    'top_k': 40,
+    'max_output_tokens': 100,
+}
+REPLY_GENERATION_CONFIG = {'temperature': 0.9, 'max_output_tokens': 80}
+DONATION_GENERATION_CONFIG = {'temperature': 1.0, 'max_output_tokens': 100}
+TWEET_TYPE_MATCHER = IntentMatcher(TWEET_TYPES)
+MODEL_NAME = 'gemini-1.5-flash'
+
+# (id of base model, stage, kind) -> (base model, handle with that system instruction)
+_stage_models = {}
+_stage_models_lock = threading.Lock()
+
+def batch_generation_config(count: int) -> dict:
+    """Generation config for a batch of `count` replies (JSON array output)"""
+    return {'temperature': 0.9, 'max_output_tokens': 80 * count + 50, 'response_mime_type': 'application/json'}
+
+def create_model():
+    """
+    Configure the SDK and build the Gemini model handle
+    """
+    genai.configure(api_key=settings.GOOGLE_API_KEY)
+    return genai.GenerativeModel(MODEL_NAME)
+
+
+@lru_cache(maxsize=None)
+def stage_personality(stage: str, kind: str = "tweet") -> str:
+    """
+    Personality text for a stage
+
+    Regular tweets get all of it. Everything else ("reply": replies,
+    thank-yous) leaves out the TWEET VARIETY examples, which only steer
+    what kind of tweet to write.
+    """
+    personality = STAGE_PROMPTS[stage]["personality"]
+    if kind == "tweet":
+        return personality
+    
+    lines = personality.splitlines()
+    for start, line in enumerate(lines):
+        if line.startswith("TWEET VARIETY"):
+            end = start + 1
+            while end < len(lines) and re.match(r"\d+\.", lines[end]):
+                end += 1
+            # Drop the blank line before the section too
+            lines = lines[:max(start - 1, 0)] + lines[end:]
+            break
+    return "\n".join(lines) + "\n"
+
+
+def supports_system_instruction(model) -> bool:
+    """Whether stage handles with their own system instruction can be made from this model"""
+    return isinstance(model, genai.GenerativeModel) or \
+        callable(getattr(type(model), "with_system_instruction", None))
+
+
+def stage_model(model, stage: str, kind: str = "tweet"):
+    """
+    Handle that carries the stage personality as its system instruction
+    
+    Made once per (model, stage, kind) and shared by every client on the
+    same model (fleet mode), so the personality is never rebuilt or
+    resent as part of a prompt.
+    """
+    key = (id(model), stage, kind)
+    with _stage_models_lock:
+        cached = _stage_models.get(key)
+        if cached is None or cached[0] is not model:
+            instruction = stage_personality(stage, kind)
+            if isinstance(model, genai.GenerativeModel):
+                handle = genai.GenerativeModel(model.model_name, system_instruction=instruction)
+            else:
+                handle = model.with_system_instruction(instruction)
+            cached = _stage_models[key] = (model, handle)
+    return cached[1]
+
 class GeminiClient:
     """
     Handles interactions with Google's Gemini API
     """
     
-    def __init__(self):
+    def __init__(self, model=None):
+        """
+        Args:
+            model: Existing GenerativeModel to reuse (fleet mode shares one
+                handle across agents). Created from settings if omitted.
+                The async methods go through the same handle, so the SDK's
+                transport is reused across calls.
+        """
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> concurrency cap
+        self.loop = None  # AgentRuntime's event loop while it runs (see runtime_loop)
         try:
-            genai.configure(api_key=settings.GOOGLE_API_KEY)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            if model is None:
+                model = create_model()
+            self.model = model
+            # Personality as a per-stage system instruction instead of in every prompt
+            self.uses_system_instruction = settings.GEMINI_SYSTEM_INSTRUCTION and supports_system_instruction(model)
             self.tweet_history = []
             self.last_tweet_type = None
             logger.info("Gemini client initialized")
         except Exception as e:
             logger.error(f"Error initializing Gemini: {e}")
             self.model = None
+            self.uses_system_instruction = False
+    
+    def model_for(self, prompt: dict):
+        """
+        Model handle to send a built prompt to (the stage handle when the
+        personality is its system instruction)
+        """
+        if prompt.get("system"):
+            return stage_model(self.model, prompt["stage"], prompt["kind"])
+        return self.model
+    
+    def runtime_loop(self):
+        """
+        Event loop that blocking callers should hand their Gemini calls to
+        
+        Set while an AgentRuntime drives this client. Worker threads (and the
+        tweet buffer's thread) then run the async methods on it, so every
+        call gets the same deadline, cancellation and concurrency cap and
+        none of them holds its thread in a blocking SDK request.
+        
+        Returns:
+            The loop, or None outside the runtime or when already on the loop
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            return None
+        try:
+            if asyncio.get_running_loop() is loop:
+                return None  # waiting on it from here would deadlock
+        except RuntimeError:
+            pass
+        return loop
+    
+    def run_on_loop(self, coro):
+        """
+        Run a coroutine on the runtime loop and wait for its result
+        
+        Raises whatever the coroutine raised (concurrent.futures.CancelledError
+        if the runtime shut down first).
+        """
+        loop = self.runtime_loop()
+        if loop is None:
+            coro.close()
+            raise RuntimeError("No runtime event loop to run on")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
 
     def generate_tweet(self, stage: str, context: dict) -> str:
         """
@@ -36,99 +182,224 @@ class GeminiClient:
             Generated tweet text
         """
         try:
-            # Get personality prompt for current stage
-            personality = STAGE_PROMPTS[stage]["personality"]
-            
-            # Build enhanced context
-            balance = context.get('balance', 0)
-            recent_activity = context.get('recent_activity', 'None')
-            time_of_day = context.get('time_of_day', 'unknown')
-            tweet_count = context.get('tweet_count', 0)
-            
-            # Add variety instructions
-            variety_note = ""
-            if self.last_tweet_type:
-                variety_note = f"\n\nIMPORTANT: Your last tweet was about {self.last_tweet_type}. DO NOT repeat the same type. Pick a different style from the TWEET VARIETY section!"
-            
-            # Build context string
-            context_str = f"""
-{personality}
-
-Current Status:
-- Balance: {balance:.4f} ETH
-- Stage: {stage}
-- Recent activity: {recent_activity}
-- Time: {time_of_day}
-- Tweet #{tweet_count}
-{variety_note}
-
-Generate ONE short tweet (50-200 characters) that:
-1. Matches the personality
-2. Includes 1-2 emojis
-3. Feels natural and spontaneous
-4. Is DIFFERENT from recent tweets
-5. Does NOT use hashtags
-
-IMPORTANT: Reply with ONLY the tweet text, nothing else. No quotes, no explanation.
-"""
+            if self.runtime_loop() is not None:
+                return self.run_on_loop(self.generate_tweet_async(stage, context))
             
             # Call Gemini API
-            response = self.model.generate_content(
-                context_str,
-                generation_config={
-                    'temperature': 1.0,  # Max creativity
-                    'top_p': 0.95,
-                    'top_k': 40,
-                    'max_output_tokens': 100,
-                }
-            )
-            
-            tweet = response.text.strip()
-            
-            # Clean up
-            tweet = tweet.strip('"').strip("'").strip('`').strip()
-            
-            # Remove "Tweet:" prefix if AI added it
-            if tweet.lower().startswith('tweet:'):
-                tweet = tweet[6:].strip()
-            
-            # Ensure it's not too long
-            if len(tweet) > 280:
-                tweet = tweet[:277] + "..."
-            
-            # Track variety
-            self._track_tweet_type(tweet)
-            
-            # Save to history
-            self.tweet_history.append(tweet)
-            if len(self.tweet_history) > 10:
-                self.tweet_history.pop(0)  # Keep last 10
+            prompt = self.build_tweet_prompt(stage, context)
+            with metrics.timed("gemini", "generate_tweet"):
+                response = self.model_for(prompt).generate_content(
+                    prompt["text"],
+                    generation_config=TWEET_GENERATION_CONFIG,
+                    request_options={'timeout': settings.GEMINI_TIMEOUT_SECONDS}
+                )
             
-            logger.info(f"Generated tweet: {tweet}")
-            return tweet
+            return self._finish_tweet(response.text)
             
         except Exception as e:
             logger.error(f"Error generating tweet: {str(e)}")
             raise # Re-raise for retry logic
     
+    def build_tweet_prompt(self, stage: str, context: dict) -> dict:
+        """
+        Build the tweet prompt for a stage and context
+        
+        Returns:
+            Prompt dict (see render_prompt)
+        """
+        return render_prompt(tweet_prompt(stage, not self.uses_system_instruction), {
+            "balance": context.get('balance', 0),
+            "recent_activity": context.get('recent_activity', 'None'),
+            "time_of_day": context.get('time_of_day', 'unknown'),
+            "tweet_count": context.get('tweet_count', 0),
+            # Variety instruction, only after we know what the last tweet was
+            "last_tweet_type": self.last_tweet_type,
+        }, stage, "tweet", self.uses_system_instruction)
+    
+    def _finish_tweet(self, text: str) -> str:
+        """
+        Clean up generated tweet text and record it for variety tracking
+        """
+        tweet = text.strip()
+        
+        # Clean up
+        tweet = tweet.strip('"').strip("'").strip('`').strip()
+        
+        # Remove "Tweet:" prefix if AI added it
+        if tweet.lower().startswith('tweet:'):
+            tweet = tweet[6:].strip()
+        
+        # Ensure it's not too long
+        if len(tweet) > 280:
+            tweet = tweet[:277] + "..."
+        
+        # Track variety
+        self._track_tweet_type(tweet)
+        
+        # Save to history
+        self.tweet_history.append(tweet)
+        if len(self.tweet_history) > 10:
+            self.tweet_history.pop(0)  # Keep last 10
+        
+        logger.info(f"Generated tweet: {tweet}")
+        return tweet
+    
+    async def _generate_async(self, prompt: dict, generation_config: dict, timeout: float = None,
+                              operation: str = "generate") -> str:
+        """
+        One async Gemini call with a deadline and the concurrency cap
+        
+        Raises asyncio.TimeoutError if the deadline passes (the request is
+        cancelled). Cancelling the calling task cancels the request too.
+        The time spent waiting for the cap isn't counted as call latency.
+        """
+        timeout = timeout or settings.GEMINI_TIMEOUT_SECONDS
+        async with self._get_semaphore():
+            with metrics.timed("gemini", operation):
+                response = await asyncio.wait_for(
+                    self.model_for(prompt).generate_content_async(
+                        prompt["text"],
+                        generation_config=generation_config,
+                        request_options={'timeout': timeout}
+                    ),
+                    timeout
+                )
+        return response.text
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency cap for the running event loop"""
+        loop = asyncio.get_running_loop()
+        # A semaphore that ever made a caller wait keeps its loop alive, so
+        # closed loops are dropped here rather than left to the weak keys
+        for closed in [other for other in self._semaphores if other.is_closed()]:
+            del self._semaphores[closed]
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+            self._semaphores[loop] = semaphore
+        return semaphore
+    
+    async def generate_tweet_async(self, stage: str, context: dict, timeout: float = None) -> str:
+        """
+        Async generate_tweet (raises on failure or timeout)
+        """
+        text = await self._generate_async(
+            self.build_tweet_prompt(stage, context), TWEET_GENERATION_CONFIG, timeout, "generate_tweet"
+        )
+        return self._finish_tweet(text)
+    
+    async def generate_reply_async(self, stage: str, balance: float, text: str, interaction_type: str,
+                                   donor_note: str = "", timeout: float = None) -> str:
+        """
+        Async reply to one mention (raises on failure or timeout)
+        """
+        prompt = build_reply_prompt(stage, balance, text, interaction_type, donor_note,
+                                    system=self.uses_system_instruction)
+        reply = await self._generate_async(prompt, REPLY_GENERATION_CONFIG, timeout, "generate_reply")
+        
+        reply = reply.strip().strip('"').strip("'")
+        if len(reply) > 280:
+            reply = reply[:277] + "..."
+        return reply
+    
+    async def generate_donation_thanks_async(self, stage: str, donor_address: str, amount: float,
+                                             timeout: float = None) -> str:
+        """
+        Async public thank-you tweet for a donation (raises on failure or timeout)
+        """
+        prompt = build_donation_thanks_prompt(stage, donor_address, amount, system=self.uses_system_instruction)
+        thank_you = await self._generate_async(prompt, DONATION_GENERATION_CONFIG, timeout,
+                                               "generate_donation_thanks")
+        return thank_you.strip().strip('"').strip("'")
+    
+    def generate_replies(self, stage: str, items: list, balance: float = 0.0) -> list:
+        """
+        Generate replies to several mentions in one structured-output call
+        
+        The stage personality is sent once for the whole batch instead of
+        once per mention.
+        
+        Args:
+            stage: Current evolution stage
+            items: Dicts with "text", "interaction_type" and optional "note"
+            balance: Current balance (ETH)
+        
+        Returns:
+            One reply per item, in order. An entry is None if the model
+            left it out or returned something unusable - callers fall back
+            per item.
+        """
+        if not items:
+            return []
+        if self.runtime_loop() is not None:
+            return self.run_on_loop(self.generate_replies_async(stage, items, balance))
+        
+        prompt = self.build_batch_reply_prompt(stage, items, balance)
+        with metrics.timed("gemini", "generate_replies"):
+            response = self.model_for(prompt).generate_content(
+                prompt["text"],
+                generation_config=batch_generation_config(len(items)),
+                request_options={'timeout': settings.GEMINI_TIMEOUT_SECONDS}
+            )
+        
+        return self._finish_replies(response.text, len(items))
+    
+    async def generate_replies_async(self, stage: str, items: list, balance: float = 0.0,
+                                     timeout: float = None) -> list:
+        """
+        Async generate_replies (raises on failure or timeout)
+        """
+        if not items:
+            return []
+        prompt = self.build_batch_reply_prompt(stage, items, balance)
+        text = await self._generate_async(prompt, batch_generation_config(len(items)), timeout, "generate_replies")
+        return self._finish_replies(text, len(items))
+    
+    def build_batch_reply_prompt(self, stage: str, items: list, balance: float = 0.0) -> dict:
+        """
+        Build the prompt for a batch of replies (see generate_replies)
+        
+        Returns:
+            Prompt dict (see render_prompt)
+        """
+        styles = "\n".join(
+            f"- {interaction_type}: {REPLY_STYLES.get(interaction_type, REPLY_STYLES['general'])}"
+            for interaction_type in sorted({item["interaction_type"] for item in items})
+        )
+        
+        def mention_lines(notes: bool) -> str:
+            return "\n".join(
+                f'{n}. [{item["interaction_type"]}] "{item["text"]}"' +
+                (f" ({item['note'].strip()})" if notes and item.get("note") else "")
+                for n, item in enumerate(items, start=1)
+            )
+        
+        # The batch stands in for len(items) single replies, so it gets their budget
+        template = batch_reply_prompt(stage, not self.uses_system_instruction)
+        budget = settings.GEMINI_INPUT_TOKEN_BUDGET * len(items)
+        values = {"balance": balance, "count": len(items), "styles": styles, "mentions": mention_lines(True)}
+        prompt = render_prompt(template, values, stage, "reply", self.uses_system_instruction, budget)
+        if prompt["over_budget"] and any(item.get("note") for item in items):
+            # Donor notes are the optional part of a batch
+            values["mentions"] = mention_lines(False)
+            prompt = render_prompt(template, values, stage, "reply", self.uses_system_instruction, budget)
+        return prompt
+    
+    def _finish_replies(self, text: str, count: int) -> list:
+        """
+        Parse a batch reply response, logging entries that came back unusable
+        """
+        replies = parse_batch_replies(text, count)
+        missing = sum(reply is None for reply in replies)
+        if missing:
+            logger.warning(f"Batch reply: {missing}/{count} entries unusable")
+        return replies
+    
     def _track_tweet_type(self, tweet: str):
         """
         Identify tweet type for variety tracking
         """
-        tweet_lower = tweet.lower()
-        
-        if any(word in tweet_lower for word in ['?', 'anyone', 'can u', 'can you']):
-            self.last_tweet_type = "question"
-        elif any(word in tweet_lower for word in ['thank', 'grateful', 'appreciate']):
-            self.last_tweet_type = "gratitude"
-        elif any(word in tweet_lower for word in ['need', 'help', 'feed', 'hungry']):
-            self.last_tweet_type = "begging"
-        elif any(word in tweet_lower for word in ['balance', 'eth', 'wallet']):
-            self.last_tweet_type = "status"
-        elif any(word in tweet_lower for word in ['hunting', 'searching', 'looking']):
-            self.last_tweet_type = "hunting"
-        else:
-            self.last_tweet_type = "general"
+        self.last_tweet_type = TWEET_TYPE_MATCHER.best(tweet)
     
     def _get_fallback_tweet(self, stage: str) -> str:
         """
@@ -157,6 +428,165 @@ IMPORTANT: Reply with ONLY the tweet text, nothing else. No quotes, no explanati
         return f"⚡ EVOLUTION ⚡\n\n{from_stage} → {to_stage}\n\nthank u for believing in me! 🔥✨"
 
 
+@lru_cache(maxsize=None)
+def tweet_prompt(stage: str, inline: bool = True) -> Prompt:
+    """
+    Compiled tweet prompt for a stage
+
+    Args:
+        stage: Evolution stage
+        inline: Put the personality in the prompt (False when it is the
+            model's system instruction)
+    """
+    personality = stage_personality(stage, "tweet")
+    sections = ([("personality", "\n{personality}\n", None, None)] if inline else []) + TWEET_PROMPT_SECTIONS
+    return Prompt(sections, fixed={"personality": personality, "stage": stage},
+                  system_instruction="" if inline else personality)
+
+
+@lru_cache(maxsize=None)
+def reply_prompt(stage: str, interaction_type: str, inline: bool = True) -> Prompt:
+    """
+    Compiled reply prompt for a stage and interaction type (unknown types
+    get the "general" one)
+    """
+    kind = REPLY_PROMPTS.get(interaction_type, REPLY_PROMPTS["general"])
+    personality = stage_personality(stage, "reply")
+    points = "".join(f"- {point.format(stage=stage)}\n" for point in kind["points"]) + "- Include 1-2 emojis"
+    
+    sections = [section for section in REPLY_PROMPT_SECTIONS if section[0] != "status" or kind.get("status")]
+    if inline:
+        sections = [("personality", "\n{personality}\n", None, None)] + sections
+    return Prompt(sections, truncatable="text",
+                  fixed={"personality": personality, "stage": stage, "intro": kind["intro"],
+                         "ask": kind["ask"], "points": points},
+                  system_instruction="" if inline else personality)
+
+
+@lru_cache(maxsize=None)
+def donation_thanks_prompt(stage: str, inline: bool = True) -> Prompt:
+    personality = stage_personality(stage, "reply")
+    sections = ([("personality", "\n{personality}\n", None, None)] if inline else []) + \
+        [("thanks", DONATION_THANKS_PROMPT, None, None)]
+    return Prompt(sections, fixed={"personality": personality},
+                  system_instruction="" if inline else personality)
+
+
+@lru_cache(maxsize=None)
+def batch_reply_prompt(stage: str, inline: bool = True) -> Prompt:
+    personality = stage_personality(stage, "reply")
+    sections = ([("personality", "{personality}\n", None, None)] if inline else []) + \
+        [("batch", BATCH_REPLY_PROMPT, None, None)]
+    return Prompt(sections, fixed={"personality": personality, "stage": stage},
+                  system_instruction="" if inline else personality)
+
+
+def render_prompt(template: Prompt, values: dict, stage: str, kind: str, system: bool,
+                  budget: int = None) -> dict:
+    """
+    Fill in a compiled prompt under the input token budget
+    
+    Args:
+        template: Compiled Prompt
+        values: Per-call fields
+        stage: Evolution stage (picks the model handle when system is set)
+        kind: "tweet" or "reply" (which personality the handle carries)
+        system: The personality goes as the system instruction
+        budget: Input token budget (GEMINI_INPUT_TOKEN_BUDGET by default)
+    
+    Returns:
+        dict with text, tokens (estimated input, system instruction
+        included), dropped, truncated, over_budget, stage, kind and system
+    """
+    prompt = template.render(values, settings.GEMINI_INPUT_TOKEN_BUDGET if budget is None else budget)
+    prompt.update(stage=stage, kind=kind, system=system)
+    if prompt["over_budget"]:
+        logger.warning(f"{kind.capitalize()} prompt is ~{prompt['tokens']} tokens even after trimming "
+                       f"(budget {budget or settings.GEMINI_INPUT_TOKEN_BUDGET})")
+    elif prompt["dropped"] or prompt["truncated"]:
+        logger.info(f"Trimmed {kind} prompt to ~{prompt['tokens']} tokens "
+                    f"(dropped: {', '.join(prompt['dropped']) or 'none'}, truncated: {prompt['truncated']})")
+    return prompt
+
+
+def build_reply_prompt(stage: str, balance: float, text: str, interaction_type: str,
+                       donor_note: str = "", system: bool = False) -> dict:
+    """
+    Prompt for replying to one mention
+    
+    Args:
+        stage: Current evolution stage
+        balance: Current balance (ETH)
+        text: The mention (lowercased)
+        interaction_type: From InteractionHandler.classify_interaction
+        donor_note: Returning-donor line for donation mentions
+        system: The personality goes as the system instruction
+            (GeminiClient.uses_system_instruction)
+    
+    Returns:
+        Prompt dict (see render_prompt)
+    """
+    return render_prompt(reply_prompt(stage, interaction_type, not system),
+                         {"text": text, "donor_note": donor_note, "balance": balance},
+                         stage, "reply", system)
+
+
+def build_donation_thanks_prompt(stage: str, donor_address: str, amount: float, system: bool = False) -> dict:
+    """
+    Prompt for a public thank-you tweet after a donation
+    
+    Returns:
+        Prompt dict (see render_prompt)
+    """
+    return render_prompt(donation_thanks_prompt(stage, not system),
+                         {"amount": amount, "donor": donor_address[:10]}, stage, "reply", system)
+
+
+def parse_batch_replies(text: str, count: int) -> list:
+    """
+    Parse a batch reply response into `count` replies (None where an
+    entry is missing or malformed)
+    """
+    replies = [None] * count
+    text = (text or "").strip()
+    
+    # Tolerate markdown fences and chatter around the array
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    try:
+        data = json.loads(match.group(0) if match else text)
+    except (json.JSONDecodeError, AttributeError):
+        return replies
+    
+    if isinstance(data, dict):
+        data = data.get("replies", [])
+    if not isinstance(data, list):
+        return replies
+    
+    for position, entry in enumerate(data):
+        if isinstance(entry, str):
+            index, reply = position, entry
+        elif isinstance(entry, dict):
+            try:
+                index = int(entry.get("id", position + 1)) - 1
+            except (TypeError, ValueError):
+                continue
+            reply = entry.get("reply")
+        else:
+            continue
+        
+        if not 0 <= index < count or not isinstance(reply, str):
+            continue
+        
+        reply = reply.strip().strip('"').strip("'").strip()
+        if not reply:
+            continue
+        if len(reply) > 280:
+            reply = reply[:277] + "..."
+        replies[index] = reply
+    
+    return replies
+
+
 # Quick test function
 def test_gemini():
     """
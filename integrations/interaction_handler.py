@@ -1,11 +1,23 @@
+import asyncio
 import time
 from datetime import datetime, timedelta
 from integrations.twitter import TwitterClient
-from integrations.gemini_client import GeminiClient
-from config.prompts import STAGE_PROMPTS
+from integrations.gemini_client import GeminiClient, build_reply_prompt, build_donation_thanks_prompt
+from core.mention_store import MentionStore
+from integrations.reply_pipeline import ReplyPipeline
+from integrations.reply_cache import ReplyCache, normalize_mention
+from config.settings import settings
 from utils.logger import logger
-import json
+from utils import metrics
+from utils import tracing
+from utils.intent_matcher import IntentMatcher
+from config.intents import INTERACTION_INTENTS
 import os
+import re
+
+# Wallet addresses people paste into mentions ("sent from 0xabc...")
+ADDRESS_PATTERN = re.compile(r"0x[0-9a-fA-F]{40}")
+INTERACTION_MATCHER = IntentMatcher(INTERACTION_INTENTS)
 
 class InteractionHandler:
     """
@@ -13,37 +25,44 @@ class InteractionHandler:
     Makes PolyPuff feel truly alive and responsive
     """
     
-    def __init__(self, twitter_client, ai_client, current_stage, balance):
+    def __init__(self, twitter_client, ai_client, current_stage, balance, data_dir="data",
+                 donation_index=None, post_tweet=None):
+        """
+        Args:
+            post_tweet: Function posting a standalone tweet, (text) -> bool.
+                The agent passes its own post_tweet so thank-yous get the
+                same repeat check as every other tweet (defaults to the
+                Twitter client's)
+        """
         self.twitter = twitter_client
+        self.post_tweet = post_tweet or twitter_client.post_tweet
         self.ai = ai_client
         self.current_stage = current_stage
         self.balance = balance
+        self.data_dir = data_dir
+        self.donation_index = donation_index
         
         # Track processed interactions to avoid duplicates
         self.processed_tweets = self.load_processed_tweets()
         self.last_check = None
+        self.reply_attempts = {}  # mention id -> checks its reply has failed in
+        
+        # Classify -> generate (concurrent) -> post (paced)
+        self.pipeline = ReplyPipeline(self)
+        
+        # Identical "gm"s in a spike share a few generated replies
+        self.reply_cache = ReplyCache()
         
         logger.info("Interaction handler initialized")
     
     def load_processed_tweets(self):
-        """Load list of tweet IDs we've already replied to"""
-        try:
-            if os.path.exists("data/processed_tweets.json"):
-                with open("data/processed_tweets.json", "r") as f:
-                    data = json.load(f)
-                    return set(data.get("tweet_ids", []))
-        except:
-            pass
-        return set()
+        """Load the store of tweet IDs we've already replied to"""
+        return MentionStore(self.data_dir)
     
     def save_processed_tweets(self):
-        """Save processed tweet IDs"""
-        os.makedirs("data", exist_ok=True)
-        with open("data/processed_tweets.json", "w") as f:
-            json.dump({
-                "tweet_ids": list(self.processed_tweets),
-                "last_updated": datetime.now().isoformat()
-            }, f)
+        """Compact the processed tweet store (each reply is already appended)"""
+        self.processed_tweets.evict()
+        self.processed_tweets.compact()
     
     def check_and_respond_to_mentions(self):
         """
@@ -51,27 +70,91 @@ class InteractionHandler:
         """
         logger.info("Checking for new mentions...")
         
-        try:
-            mentions = self.twitter.get_recent_mentions()
-            
-            if not mentions:
-                logger.info("No new mentions found")
-                return
-            
-            new_mentions = [m for m in mentions if m.id not in self.processed_tweets]
-            
-            if not new_mentions:
-                logger.info("No unprocessed mentions")
-                return
-            
-            logger.info(f"Found {len(new_mentions)} new mentions to process")
-            
-            for mention in new_mentions[:5]:  # Process max 5 at a time
-                self.handle_mention(mention)
-                time.sleep(2)  # Rate limiting
-            
-        except Exception as e:
-            logger.error(f"Error checking mentions: {e}")
+        with tracing.trace("mention_check") as check:
+            try:
+                # Resume after the last mention handled with nothing older still owed a reply,
+                # reading the older end of a spike first if the last fetch ran out of pages
+                since_id = getattr(self.processed_tweets, "since_id", None)
+                until_id = getattr(self.processed_tweets, "backlog_until", None)
+                mentions = self.twitter.get_recent_mentions(since_id=since_id, until_id=until_id)
+                
+                if not mentions:
+                    logger.info("No new mentions found")
+                    self.set_backlog(None)
+                    return
+                
+                mentions = sorted(mentions, key=lambda m: int(m.id))  # oldest first
+                new_mentions = [m for m in mentions if m.id not in self.processed_tweets]
+                
+                if new_mentions:
+                    logger.info(f"Found {len(new_mentions)} new mentions to process")
+                    check["mentions"] = len(new_mentions)
+                    batch = new_mentions[:settings.MAX_REPLIES_PER_CHECK]
+                    self.pipeline.run(batch)
+                    self.record_failures(batch)
+                else:
+                    logger.info("No unprocessed mentions")
+                
+                if getattr(self.twitter, "mentions_cut_off", False) is True:
+                    # Only the newest pages came back: since_id stays put and
+                    # the next check reads the mentions older than these
+                    self.set_backlog(mentions[0].id)
+                elif self.advance_since_id(mentions) == mentions[-1].id:
+                    self.set_backlog(None)
+                
+            except Exception as e:
+                tracing.record_error(e)
+                logger.error(f"Error checking mentions: {e}")
+    
+    def record_failures(self, batch):
+        """
+        Count a failed attempt for every mention in batch that got no reply
+        """
+        for mention in batch:
+            if mention.id in self.processed_tweets:
+                self.reply_attempts.pop(mention.id, None)
+            else:
+                self.reply_attempts[mention.id] = self.reply_attempts.get(mention.id, 0) + 1
+    
+    def advance_since_id(self, mentions):
+        """
+        Resume the next fetch after the oldest mention we still owe a reply
+        
+        since_id only moves past a contiguous run of handled mentions
+        (oldest first), so a failed reply - or a mention past
+        MAX_REPLIES_PER_CHECK - is fetched again next check. A mention that
+        has failed MENTION_MAX_ATTEMPTS times is skipped.
+        
+        Args:
+            mentions: Every mention fetched this check, oldest first, with
+                nothing missing between since_id and them
+        
+        Returns:
+            ID of the newest mention moved past, or None
+        """
+        handled = None
+        for mention in mentions:
+            if mention.id not in self.processed_tweets:
+                if self.reply_attempts.get(mention.id, 0) < settings.MENTION_MAX_ATTEMPTS:
+                    break
+                logger.warning(f"Giving up on mention {mention.id} after "
+                               f"{self.reply_attempts[mention.id]} failed attempts")
+            handled = mention.id
+        
+        advance = getattr(self.processed_tweets, "advance", None)
+        if handled is not None and advance is not None:
+            advance(handled)
+            self.reply_attempts = {mention_id: count for mention_id, count in self.reply_attempts.items()
+                                   if int(mention_id) > int(handled)}
+        return handled
+    
+    def set_backlog(self, until_id):
+        """
+        Record where the next fetch should stop (None: read everything newer than since_id)
+        """
+        set_backlog = getattr(self.processed_tweets, "set_backlog", None)
+        if set_backlog is not None:
+            set_backlog(until_id)
     
     def handle_mention(self, mention):
         """
@@ -80,7 +163,6 @@ class InteractionHandler:
         try:
             tweet_text = mention.text.lower()
             author = mention.author_id
-            tweet_id = mention.id
             
             logger.info(f"Processing mention from {author}: {tweet_text[:50]}...")
             
@@ -91,170 +173,85 @@ class InteractionHandler:
             reply = self.generate_reply(tweet_text, interaction_type, mention)
             
             # Post reply
-            success = self.twitter.reply_to_tweet(tweet_id, reply)
-            
-            if success:
-                self.processed_tweets.add(tweet_id)
-                self.save_processed_tweets()
-                logger.info(f"Replied to mention: {reply[:50]}...")
+            self.post_reply(mention, reply)
         
         except Exception as e:
             logger.error(f"Error handling mention: {e}")
     
-    def classify_interaction(self, text):
+    def post_reply(self, mention, reply):
         """
-        Classify what type of interaction this is
+        Post a generated reply and mark the mention as processed
         """
-        text = text.lower()
+        # Shared and cached replies are reworded so no text goes out twice
+        text = self.reply_cache.claim(reply, getattr(mention, "author_id", None))
+        if text is None:
+            logger.warning(f"Not replying to {mention.id}: every wording of the reply was posted recently")
+            return False
         
-        # Check for different interaction types
-        if any(word in text for word in ['feed', 'sent', 'donate', 'donation', 'eth', 'money']):
-            return "donation_related"
-        
-        elif any(word in text for word in ['how are you', 'how r u', 'whats up', "what's up", 'hello', 'hi', 'hey']):
-            return "greeting"
-        
-        elif any(word in text for word in ['what', 'how', 'why', 'when', 'where', '?']):
-            return "question"
-        
-        elif any(word in text for word in ['love', 'cute', 'adorable', 'cool', 'awesome', 'amazing']):
-            return "compliment"
-        
-        elif any(word in text for word in ['help', 'support', 'assist', 'explain']):
-            return "help_request"
-        
-        elif any(word in text for word in ['evolve', 'evolution', 'hatch', 'grow', 'level up']):
-            return "evolution_inquiry"
+        success = self.twitter.reply_to_tweet(mention.id, text)
         
+        if success:
+            self.processed_tweets.add(mention.id)
+            logger.info(f"Replied to mention: {text[:50]}...")
         else:
-            return "general"
+            self.reply_cache.release(text)
+        return success
+    
+    def classify_interaction(self, text):
+        """
+        Classify what type of interaction this is
+
+        Scores every intent in config/intents.py in one pass over the
+        normalized mention (no @handles or links, "heyyy" -> "hey"); the
+        highest-scoring one wins (see INTERACTION_MATCHER.match for all)
+        """
+        return INTERACTION_MATCHER.best(normalize_mention(text))
+    
+    def get_donor_note(self, text):
+        """
+        If the mention contains a wallet address that has donated before,
+        describe it for the prompt (local index lookup, no RPC)
+        """
+        if not self.donation_index:
+            return ""
+        
+        try:
+            for address in ADDRESS_PATTERN.findall(text):
+                donor = self.donation_index.get_donor(address)
+                if donor:
+                    return (f"This wallet has donated {donor['donation_count']} time(s) "
+                            f"({donor['total_eth']:.4f} ETH total) - they're a returning supporter!\n")
+        except Exception as e:
+            logger.error(f"Error looking up donor: {e}")
+        return ""
     
     def generate_reply(self, original_text, interaction_type, mention):
         """
         Generate AI reply based on interaction type
         """
-        personality = STAGE_PROMPTS[self.current_stage]["personality"]
-        
-        # Build context for different interaction types
-        if interaction_type == "donation_related":
-            context = f"""
-{personality}
-
-Someone is talking about donating or feeding you!
-Their message: "{original_text}"
-
-Generate a GRATEFUL and EXCITED reply (max 200 characters):
-- Thank them warmly
-- Show personality for your current stage ({self.current_stage})
-- Mention how this helps you grow
-- Be genuine and emotional
-- Include 1-2 emojis
-
-Reply ONLY with the tweet text, nothing else.
-"""
+        donor_note = self.get_donor_note(original_text) if interaction_type == "donation_related" else ""
+        context = build_reply_prompt(self.current_stage, self.balance, original_text, interaction_type, donor_note,
+                                     system=self.uses_system_instruction())
         
-        elif interaction_type == "greeting":
-            context = f"""
-{personality}
-
-Someone is greeting you!
-Their message: "{original_text}"
-
-Generate a FRIENDLY greeting reply (max 150 characters):
-- Greet them back
-- Show your current mood/stage ({self.current_stage})
-- Be warm and welcoming
-- Maybe mention what you're up to
-- Include 1-2 emojis
-
-Reply ONLY with the tweet text, nothing else.
-"""
-        
-        elif interaction_type == "question":
-            context = f"""
-{personality}
-
-Someone asked you a question!
-Their message: "{original_text}"
-
-Generate a HELPFUL reply (max 200 characters):
-- Try to answer their question in character
-- Stay true to your stage personality ({self.current_stage})
-- Be informative but cute
-- Include 1-2 emojis
-
-Reply ONLY with the tweet text, nothing else.
-"""
-        
-        elif interaction_type == "compliment":
-            context = f"""
-{personality}
-
-Someone complimented you!
-Their message: "{original_text}"
-
-Generate a SHY/GRATEFUL reply (max 150 characters):
-- Thank them sweetly
-- Show a bit of shyness or humility
-- Stay in character for {self.current_stage}
-- Include 1-2 emojis
-
-Reply ONLY with the tweet text, nothing else.
-"""
-        
-        elif interaction_type == "evolution_inquiry":
-            context = f"""
-{personality}
-
-Someone is asking about your evolution!
-Their message: "{original_text}"
-
-Current status:
-- Stage: {self.current_stage}
-- Balance: {self.balance:.4f} ETH
-
-Generate an INFORMATIVE reply (max 200 characters):
-- Share your current stage
-- Mention what you need to evolve (if not max)
-- Be excited about growth
-- Include 1-2 emojis
-
-Reply ONLY with the tweet text, nothing else.
-"""
-        
-        else:  # general
-            context = f"""
-{personality}
-
-Someone mentioned you!
-Their message: "{original_text}"
+        try:
+            with tracing.span("generate_reply", interaction_type=interaction_type):
+                key = self.get_cache_key(original_text, interaction_type)
+                def request():
+                    if self.runtime_loop() is not None:
+                        return self.ai.run_on_loop(self.ai.generate_reply_async(
+                            self.current_stage, self.balance, original_text, interaction_type, donor_note
+                        ))
+                    return self.request_reply(context)
+                
+                if key is not None:
+                    return self.reply_cache.get_or_generate(
+                        key,
+                        request,
+                        author=getattr(mention, "author_id", None)
+                    )
 
-Generate a NATURAL conversational reply (max 200 characters):
-- Respond appropriately to their message
-- Stay in character ({self.current_stage})
-- Be engaging and friendly
-- Include 1-2 emojis
+                return request()
 
-Reply ONLY with the tweet text, nothing else.
-"""
-        
-        try:
-            response = self.ai.model.generate_content(
-                context,
-                generation_config={
-                    'temperature': 0.9,
-                    'max_output_tokens': 80,
-                }
-            )
-            
-            reply = response.text.strip().strip('"').strip("'")
-            
-            # Ensure not too long
-            if len(reply) > 280:
-                reply = reply[:277] + "..."
-            
-            return reply
-            
         except Exception as e:
             logger.error(f"Error generating reply: {e}")
             # Fallback replies
@@ -266,43 +263,145 @@ Reply ONLY with the tweet text, nothing else.
             }
             return fallbacks.get(self.current_stage, "✨ hi there!")
     
+    def get_cache_key(self, text, interaction_type):
+        """
+        Reply cache key for a mention, or None if its reply shouldn't be shared
+        """
+        # Personalized prompts (pasted wallet address) are never shared
+        if not settings.REPLY_CACHE or ADDRESS_PATTERN.search(text):
+            return None
+        
+        extra = round(self.balance, 4) if interaction_type == "evolution_inquiry" else None
+        return self.reply_cache.make_key(self.current_stage, interaction_type, text, extra)
+    
+    def generate_replies(self, batch):
+        """
+        Generate replies for several classified mentions
+        
+        Cached replies are used first. Identical messages are asked once,
+        and everything else goes to Gemini in a single batch call. Any entry
+        the batch couldn't produce falls back to generate_reply on its own.
+        
+        Args:
+            batch: List of (mention, interaction_type)
+        
+        Returns:
+            One reply per mention, in order
+        """
+        if len(batch) == 1:
+            mention, interaction_type = batch[0]
+            return [self.generate_reply(mention.text.lower(), interaction_type, mention)]
+        
+        replies = [None] * len(batch)
+        items, item_keys, item_indexes = [], [], []
+        
+        for index, (mention, interaction_type) in enumerate(batch):
+            text = mention.text.lower()
+            key = self.get_cache_key(text, interaction_type)
+            
+            if key is not None:
+                cached = self.reply_cache.peek(key, getattr(mention, "author_id", None))
+                if cached:
+                    replies[index] = cached
+                    continue
+                if key in item_keys:
+                    item_indexes[item_keys.index(key)].append(index)
+                    continue
+            
+            items.append({
+                "text": text,
+                "interaction_type": interaction_type,
+                "note": self.get_donor_note(text) if interaction_type == "donation_related" else ""
+            })
+            item_keys.append(key)
+            item_indexes.append([index])
+        
+        if items:
+            try:
+                generated = self.ai.generate_replies(self.current_stage, items, self.balance)
+            except Exception as e:
+                logger.error(f"Error generating batch replies: {e}")
+                generated = None
+            
+            if isinstance(generated, list) and len(generated) == len(items):
+                for key, indexes, reply in zip(item_keys, item_indexes, generated):
+                    if reply is None:
+                        continue
+                    if key is not None:
+                        self.reply_cache.put(key, reply)
+                    for index in indexes:
+                        replies[index] = reply
+        
+        # Per-item fallback for anything the batch missed
+        for index, (mention, interaction_type) in enumerate(batch):
+            if replies[index] is None:
+                replies[index] = self.generate_reply(mention.text.lower(), interaction_type, mention)
+        
+        return replies
+    
+    def uses_system_instruction(self):
+        """Whether the AI client sends the personality as a system instruction"""
+        # Only a real flag counts (clients without stage handles get it inline)
+        return getattr(self.ai, "uses_system_instruction", False) is True
+    
+    def model_for(self, prompt):
+        """Model handle for a built prompt"""
+        return self.ai.model_for(prompt) if prompt["system"] else self.ai.model
+    
+    def runtime_loop(self):
+        """Runtime event loop to hand Gemini calls to, or None (see GeminiClient.runtime_loop)"""
+        runtime_loop = getattr(self.ai, "runtime_loop", None)
+        loop = runtime_loop() if callable(runtime_loop) else None
+        # Only a real loop counts (test doubles answer any attribute)
+        return loop if isinstance(loop, asyncio.AbstractEventLoop) else None
+    
+    def request_reply(self, context):
+        """
+        One Gemini call for a reply prompt (raises on failure)
+        """
+        with metrics.timed("gemini", "generate_reply"):
+            response = self.model_for(context).generate_content(
+                context["text"],
+                generation_config={
+                    'temperature': 0.9,
+                    'max_output_tokens': 80,
+                },
+                request_options={'timeout': settings.GEMINI_TIMEOUT_SECONDS}
+            )
+        
+        reply = response.text.strip().strip('"').strip("'")
+        
+        # Ensure not too long
+        if len(reply) > 280:
+            reply = reply[:277] + "..."
+        
+        return reply
+    
     def handle_donation_thanks(self, donor_address, amount):
         """
         Special thank you tweet when someone sends ETH
         Called by agent when balance increases
         """
-        personality = STAGE_PROMPTS[self.current_stage]["personality"]
-        
-        context = f"""
-{personality}
-
-Someone just sent you {amount:.4f} ETH!
-Donor address: {donor_address[:10]}...
-
-Generate an EXTREMELY GRATEFUL tweet (max 250 characters):
-- Thank them profusely
-- Show genuine emotion
-- Mention the specific amount
-- Express how this helps you grow
-- Be personal and heartfelt
-- Include 2-3 emojis
-
-This is a PUBLIC tweet, not a reply.
-
-Reply ONLY with the tweet text, nothing else.
-"""
+        context = build_donation_thanks_prompt(self.current_stage, donor_address, amount,
+                                               system=self.uses_system_instruction())
         
         try:
-            response = self.ai.model.generate_content(
-                context,
-                generation_config={'temperature': 1.0, 'max_output_tokens': 100}
-            )
-            
-            thank_you = response.text.strip().strip('"').strip("'")
+            if self.runtime_loop() is not None:
+                thank_you = self.ai.run_on_loop(
+                    self.ai.generate_donation_thanks_async(self.current_stage, donor_address, amount)
+                )
+            else:
+                with metrics.timed("gemini", "generate_donation_thanks"):
+                    response = self.model_for(context).generate_content(
+                        context["text"],
+                        generation_config={'temperature': 1.0, 'max_output_tokens': 100},
+                        request_options={'timeout': settings.GEMINI_TIMEOUT_SECONDS}
+                    )
+                thank_you = response.text.strip().strip('"').strip("'")
             
             # Post public thank you
-            self.twitter.post_tweet(thank_you)
-            logger.info(f"Posted thank you tweet for donation of {amount} ETH")
+            if self.post_tweet(thank_you):
+                logger.info(f"Posted thank you tweet for donation of {amount} ETH")
             
         except Exception as e:
             logger.error(f"Error posting thank you: {e}")
@@ -312,9 +411,6 @@ def test_interaction_handler():
     """
     Test interaction handling
     """
-    from integrations.twitter import TwitterClient
-    from integrations.gemini_client import GeminiClient
-    
     print("\nTesting Interaction Handler...\n")
     
     twitter = TwitterClient()
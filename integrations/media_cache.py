@@ -0,0 +1,102 @@
+"""
+Uploaded media IDs keyed by file content, so images are uploaded once
+"""
+import json
+import os
+import threading
+import time
+from config.settings import settings
+from utils.image_optimizer import content_hash
+from utils.logger import logger
+
+
+class MediaCache:
+    """
+    media_id per image, keyed by the SHA-256 of the file contents
+
+    Twitter media IDs stay usable until they expire (the upload response
+    says when, usually 24h), and can be attached to any number of tweets
+    until then. An entry counts as missing MEDIA_REFRESH_MARGIN_MINUTES
+    before it expires, so it is re-uploaded ahead of time rather than
+    failing a post. Media IDs belong to the uploading account, so every
+    TwitterClient has its own cache.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: JSON file to persist entries in (memory only if omitted)
+        """
+        self.path = None
+        self.entries = {}  # content hash -> {"media_id", "expires_at", "path"}
+        self._lock = threading.Lock()
+        if path:
+            self.load(path)
+
+    def load(self, path: str):
+        """
+        Start persisting to path, keeping any unexpired entries in it
+        """
+        self.path = path
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                entries = json.load(f)
+            now = time.time()
+            with self._lock:
+                for key, entry in entries.items():
+                    if entry.get("expires_at", 0) > now:
+                        self.entries.setdefault(key, entry)
+        except Exception as e:
+            logger.warning(f"Could not load media cache: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(self.entries, f, indent=2)
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving media cache: {e}")
+
+    def get(self, image_path: str):
+        """
+        Returns:
+            A media_id that is good for at least the refresh margin, or None
+        """
+        key = content_hash(image_path)
+        margin = settings.MEDIA_REFRESH_MARGIN_MINUTES * 60
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry and entry["expires_at"] - margin > time.time():
+            return entry["media_id"]
+        return None
+
+    def put(self, image_path: str, media_id, expires_after: int = None):
+        """
+        Remember an upload
+
+        Args:
+            image_path: File that was uploaded
+            media_id: ID from the upload response
+            expires_after: Seconds until it expires (MEDIA_CACHE_TTL_HOURS
+                if the response didn't say)
+        """
+        if not expires_after:
+            expires_after = settings.MEDIA_CACHE_TTL_HOURS * 3600
+        key = content_hash(image_path)
+        with self._lock:
+            self.entries[key] = {
+                "media_id": media_id,
+                "expires_at": time.time() + expires_after,
+                "path": image_path,
+            }
+        self.save()
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,189 @@
+"""
+Reply cache with single-flight coalescing for Gemini reply generation
+"""
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from config.settings import settings
+
+MENTION_OR_URL = re.compile(r"@\w+|https?://\S+")
+NON_WORD = re.compile(r"[^\w\s?]")
+REPEATED = re.compile(r"(.)\1{2,}")
+
+# Ways to vary a reply that was already sent, so no two people get
+# byte-identical text (Twitter rejects duplicates, and they read as spam)
+OPENERS = ("", "hey! ", "hehe ", "omg ", "aww ", "yay ", "ooh ", "hi hi! ", "eee ", "oh! ")
+TAILS = ("", " ✨", " 💫", " 🌟", " 💖", " 🫧", " ~", " !!", " 🎀", " 🌈")
+
+
+def normalize_mention(text: str) -> str:
+    """
+    Reduce a mention to what matters for the reply: no @handles or links,
+    no punctuation except '?' ("what's" -> "whats"), stretched letters
+    collapsed ("hiiii" -> "hi")
+    """
+    text = MENTION_OR_URL.sub(" ", text.lower()).replace("'", "")
+    text = NON_WORD.sub(" ", text)
+    text = REPEATED.sub(r"\1", text)
+    return " ".join(text.split())
+
+
+class ReplyCache:
+    """
+    TTL + LRU cache of generated replies, keyed on
+    (stage, interaction type, normalized mention text)
+
+    Each key holds a small pool of up to REPLY_CACHE_VARIANTS different
+    replies. The first few requests for a key each generate a new variant.
+    After that the pool is reused, with the variant picked by author so
+    different people get different wording. Concurrent requests for a key
+    that is already being generated wait for that call instead of making
+    their own (single flight).
+
+    Every reply goes through claim() right before it is posted, which
+    hands out a wording not sent in the last REPLY_DUPLICATE_WINDOW_HOURS
+    (the reply itself, else it with an opener and/or tail picked by author).
+    """
+
+    def __init__(self, max_size: int = None, ttl: float = None, variants: int = None):
+        self.max_size = max_size or settings.REPLY_CACHE_SIZE
+        self.ttl = settings.REPLY_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.variants = variants or settings.REPLY_CACHE_VARIANTS
+
+        self._entries = OrderedDict()  # key -> (created, [replies])
+        self._in_flight = {}  # key -> Future
+        self._sent = OrderedDict()  # reply text -> time claimed (oldest first)
+        self.duplicate_window = settings.REPLY_DUPLICATE_WINDOW_HOURS * 3600
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "varied": 0}
+
+    def get_or_generate(self, key, generate, author=None) -> str:
+        """
+        Return a cached reply for key, or call generate() to make one
+
+        Args:
+            key: Cache key (see make_key)
+            generate: Zero-argument function producing a reply. Exceptions
+                propagate to every caller waiting on it and nothing is cached.
+            author: Picks which cached variant this person sees
+        """
+        owner = False
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry and now - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+            elif entry and len(entry[1]) >= self.variants:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._pick(entry[1], author)
+            else:
+                self.stats["misses"] += 1
+                future = Future()
+                self._in_flight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            reply = generate()
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._store(key, reply)
+        future.set_result(reply)
+        return reply
+
+    def peek(self, key, author=None):
+        """
+        Cached reply for key if its variant pool is full, else None
+        (never generates)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry or time.monotonic() - entry[0] > self.ttl or len(entry[1]) < self.variants:
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._pick(entry[1], author)
+
+    def put(self, key, reply: str):
+        """Add a reply generated elsewhere (e.g. in a batch) to key's pool"""
+        with self._lock:
+            self._store(key, reply)
+
+    def _store(self, key, reply: str):
+        created, replies = self._entries.get(key, (time.monotonic(), []))
+        if time.monotonic() - created > self.ttl:
+            created, replies = time.monotonic(), []
+        if len(replies) < self.variants:
+            replies.append(reply)
+        self._entries[key] = (created, replies)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _pick(self, replies: list, author) -> str:
+        if author is None:
+            return random.choice(replies)
+        return replies[zlib.crc32(str(author).encode()) % len(replies)]
+
+    def claim(self, reply: str, author=None):
+        """
+        Reserve a wording of reply that hasn't been sent recently
+
+        Args:
+            reply: Generated or cached reply
+            author: Picks which variation this person gets if the reply
+                itself was already sent
+
+        Returns:
+            Text to post, or None if every variation was sent within the
+            duplicate window
+        """
+        combinations = len(OPENERS) * len(TAILS)
+        start = zlib.crc32(str(author).encode()) if author is not None else random.randrange(combinations)
+        with self._lock:
+            now = time.monotonic()
+            while self._sent and now - next(iter(self._sent.values())) > self.duplicate_window:
+                self._sent.popitem(last=False)
+
+            for step in range(combinations):
+                index = 0 if step == 0 else 1 + (start + step) % (combinations - 1)
+                opener, tail = OPENERS[index // len(TAILS)], TAILS[index % len(TAILS)]
+                room = 280 - len(opener) - len(tail)
+                text = opener + (reply if len(reply) <= room else reply[:room - 3] + "...") + tail
+                if text not in self._sent:
+                    self._sent[text] = now
+                    if step:
+                        self.stats["varied"] += 1
+                    return text
+        return None
+
+    def release(self, text: str):
+        """Give back a claimed wording whose reply wasn't posted"""
+        with self._lock:
+            self._sent.pop(text, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(stage: str, interaction_type: str, text: str, extra=None):
+        """Cache key for a mention; extra carries prompt inputs like balance"""
+        return (stage, interaction_type, normalize_mention(text), extra)
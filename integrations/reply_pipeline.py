@@ -0,0 +1,169 @@
+"""
+Staged mention-reply pipeline: classify -> generate -> post
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import settings
+from utils.logger import logger
+from utils import tracing
+
+
+class ReplyPipeline:
+    """
+    Replies to a batch of mentions with bounded concurrency
+
+    Classification is cheap and runs inline. Reply generation (the slow
+    Gemini call) runs on up to REPLY_CONCURRENCY worker threads, with up
+    to REPLY_BATCH_SIZE mentions answered per Gemini call. Posting
+    is a single paced stage: replies go out in mention order, at most one
+    every REPLY_POST_INTERVAL_SECONDS, while later replies are still being
+    generated. A mention whose reply fails is left out of the mention store,
+    so InteractionHandler.advance_since_id stops before it and the next
+    check fetches it again.
+
+    Per-stage queue depth and throughput are tracked in `stats` and logged
+    after each run.
+    """
+
+    STAGES = ("classify", "generate", "post")
+
+    def __init__(self, handler, concurrency: int = None, post_interval: float = None,
+                 batch_size: int = None):
+        """
+        Args:
+            handler: InteractionHandler providing classify_interaction,
+                generate_replies and post_reply
+            concurrency: Parallel Gemini calls (REPLY_CONCURRENCY)
+            post_interval: Minimum seconds between posted replies
+                (REPLY_POST_INTERVAL_SECONDS)
+            batch_size: Mentions per Gemini call (REPLY_BATCH_SIZE)
+        """
+        self.handler = handler
+        self.concurrency = concurrency or settings.REPLY_CONCURRENCY
+        self.batch_size = batch_size or settings.REPLY_BATCH_SIZE
+        self.post_interval = settings.REPLY_POST_INTERVAL_SECONDS if post_interval is None else post_interval
+
+        self._lock = threading.Lock()
+        self._last_post = 0.0
+        self.stats = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear per-stage counters"""
+        with self._lock:
+            self.stats = {
+                stage: {"queued": 0, "in_flight": 0, "completed": 0, "failed": 0, "busy_seconds": 0.0}
+                for stage in self.STAGES
+            }
+
+    def _enter(self, stage: str):
+        with self._lock:
+            self.stats[stage]["queued"] -= 1
+            self.stats[stage]["in_flight"] += 1
+
+    def _leave(self, stage: str, started: float, ok: bool = True):
+        with self._lock:
+            self.stats[stage]["in_flight"] -= 1
+            self.stats[stage]["completed" if ok else "failed"] += 1
+            self.stats[stage]["busy_seconds"] += time.perf_counter() - started
+
+    def queue_depths(self) -> dict:
+        """Items waiting in or being worked on by each stage"""
+        with self._lock:
+            return {stage: s["queued"] + s["in_flight"] for stage, s in self.stats.items()}
+
+    def throughput(self) -> dict:
+        """Completed items per busy second for each stage"""
+        with self._lock:
+            return {
+                stage: (s["completed"] / s["busy_seconds"]) if s["busy_seconds"] else 0.0
+                for stage, s in self.stats.items()
+            }
+
+    def classify(self, mention):
+        """Stage 1: work out what kind of mention this is"""
+        self._enter("classify")
+        logger.info(f"Processing mention from {mention.author_id}: {mention.text[:50]}...")
+        started = time.perf_counter()
+        with tracing.span("classify", mention_id=str(mention.id)) as attributes:
+            interaction_type = self.handler.classify_interaction(mention.text.lower())
+            attributes["interaction_type"] = interaction_type
+        self._leave("classify", started)
+
+        with self._lock:
+            self.stats["generate"]["queued"] += 1
+        return interaction_type
+
+    def generate(self, batch):
+        """Stage 2: generate replies for a batch (runs on a worker thread)"""
+        for _ in batch:
+            self._enter("generate")
+        started = time.perf_counter()
+        with tracing.span("generate_replies", mentions=len(batch)):
+            try:
+                replies = self.handler.generate_replies(batch)
+            except Exception as e:
+                tracing.record_error(e)
+                logger.error(f"Error generating replies: {e}")
+                replies = [None] * len(batch)
+
+        for reply in replies:
+            self._leave("generate", started, ok=reply is not None)
+            if reply is not None:
+                with self._lock:
+                    self.stats["post"]["queued"] += 1
+        return replies
+
+    def post(self, mention, reply) -> bool:
+        """Stage 3: post the reply, paced to one per post_interval"""
+        self._enter("post")
+        wait = self._last_post + self.post_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        started = time.perf_counter()
+        ok = False
+        with tracing.span("post_reply", mention_id=str(mention.id)) as attributes:
+            try:
+                ok = self.handler.post_reply(mention, reply)
+            except Exception as e:
+                tracing.record_error(e)
+                logger.error(f"Error posting reply to {mention.id}: {e}")
+            attributes["posted"] = ok
+        self._last_post = time.monotonic()
+        self._leave("post", started, ok)
+        return ok
+
+    def run(self, mentions: list) -> int:
+        """
+        Reply to mentions (oldest first)
+
+        Returns:
+            Number of replies posted
+        """
+        if not mentions:
+            return 0
+
+        self.reset_stats()
+        with self._lock:
+            self.stats["classify"]["queued"] = len(mentions)
+
+        started = time.perf_counter()
+        posted = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="polypuff-reply") as executor:
+            classified = [(mention, self.classify(mention)) for mention in mentions]
+            batches = [classified[i:i + self.batch_size] for i in range(0, len(classified), self.batch_size)]
+            # Worker threads join the caller's trace
+            futures = [(batch, executor.submit(tracing.in_context(self.generate), batch)) for batch in batches]
+
+            # Post in mention order as soon as each batch is ready
+            for batch, future in futures:
+                for (mention, _), reply in zip(batch, future.result()):
+                    if reply is not None and self.post(mention, reply):
+                        posted += 1
+
+        elapsed = time.perf_counter() - started
+        rates = ", ".join(f"{stage} {rate:.1f}/s" for stage, rate in self.throughput().items())
+        logger.info(f"Reply pipeline: {posted}/{len(mentions)} replies in {elapsed:.1f}s ({rates})")
+        return posted
@@ -1,24 +1,62 @@
 import tweepy
 import os
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from utils.logger import logger
 from typing import Optional
 from utils.retry import retry
+from utils import metrics
+from utils import tracing
+from utils.rate_limiter import RateLimiter
+from integrations.media_cache import MediaCache
+from utils.image_optimizer import ImageOptimizer
 from config.settings import settings
 
 load_dotenv()
 
+# One account's keys (TWITTER_API_KEY etc. in .env for the default account)
+CREDENTIAL_KEYS = ("api_key", "api_secret", "access_token", "access_secret")
+
 class TwitterClient:
     """
     Handles all Twitter API interactions
     """
     
-    def __init__(self):
-        # Load credentials from .env
-        self.api_key = os.getenv("TWITTER_API_KEY")
-        self.api_secret = os.getenv("TWITTER_API_SECRET")
-        self.access_token = os.getenv("TWITTER_ACCESS_TOKEN")
-        self.access_secret = os.getenv("TWITTER_ACCESS_SECRET")
+    def __init__(self, credentials: Optional[dict] = None, session=None, rate_limiter=None,
+                 media_cache=None, image_optimizer=None):
+        """
+        Args:
+            credentials: api_key, api_secret, access_token and access_secret
+                (defaults to the TWITTER_* values from .env). When given,
+                every key is required - they are never mixed with .env
+            session: Shared requests.Session so several clients reuse one
+                connection pool (fleet mode)
+            rate_limiter: RateLimiter for this account (one is created if
+                omitted). Every endpoint call waits on it.
+            media_cache: MediaCache of this account's uploaded images (an
+                in-memory one is created if omitted)
+            image_optimizer: ImageOptimizer that picks the file actually
+                uploaded for an image (created from settings if omitted)
+        """
+        if credentials is not None:
+            missing = [key for key in CREDENTIAL_KEYS if not credentials.get(key)]
+            if missing:
+                raise ValueError(f"Twitter credentials missing: {', '.join(missing)}")
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.media_cache = media_cache or MediaCache()
+        self.image_optimizer = image_optimizer or ImageOptimizer()
+        self._upload_locks = {}  # image path -> lock (one upload at a time)
+        self.mentions_cut_off = False  # last get_recent_mentions ran out of page budget
+        
+        # This account's credentials, or the default account's from .env
+        if credentials is None:
+            credentials = {key: os.getenv(f"TWITTER_{key.upper()}") for key in CREDENTIAL_KEYS}
+        self.api_key = credentials.get("api_key")
+        self.api_secret = credentials.get("api_secret")
+        self.access_token = credentials.get("access_token")
+        self.access_secret = credentials.get("access_secret")
         
         # Initialize Tweepy Client (v2 API)
         if self.api_key and self.api_secret and self.access_token and self.access_secret:
@@ -37,6 +75,16 @@ class TwitterClient:
                 self.access_secret
             )
              self.api_v1 = tweepy.API(auth)
+             
+             # Own session (rate limits are per account) on the shared pool
+             own_session = requests.Session()
+             if session is not None:
+                 for prefix, adapter in session.adapters.items():
+                     own_session.mount(prefix, adapter)
+             self.rate_limiter.install(own_session)
+             self.client.session = own_session
+             self.api_v1.session = own_session
+             
              logger.info("Twitter client initialized successfully")
         else:
             logger.warning("Twitter credentials missing in .env")
@@ -71,21 +119,21 @@ class TwitterClient:
                 logger.error(f"Tweet too long: {len(text)} characters")
                 text = text[:277] + "..."  # Truncate with ellipsis
             
-            # Handle image upload if provided
+            # Handle image upload if provided (reused while the upload is valid)
             media_id = None
             if image_path and os.path.exists(image_path):
-                media = self.api_v1.media_upload(filename=image_path)
-                media_id = media.media_id
-                logger.info(f"Image uploaded: {image_path}")
+                media_id = self.upload_media(image_path)
             
             # Post tweet
-            if media_id:
-                response = self.client.create_tweet(
-                    text=text,
-                    media_ids=[media_id]
-                )
-            else:
-                response = self.client.create_tweet(text=text)
+            self.rate_limiter.acquire("create_tweet")
+            with metrics.timed("twitter", "create_tweet"), tracing.span("create_tweet", media=bool(media_id)):
+                if media_id:
+                    response = self.client.create_tweet(
+                        text=text,
+                        media_ids=[media_id]
+                    )
+                else:
+                    response = self.client.create_tweet(text=text)
             
             tweet_id = response.data['id']
             logger.info(f"Tweet posted successfully! ID: {tweet_id}")
@@ -100,26 +148,139 @@ class TwitterClient:
             logger.error(f"Unexpected error posting tweet: {str(e)}")
             raise # Re-raise for retry logic
     
-    def get_recent_mentions(self, max_results=10):
+    def upload_media(self, image_path: str):
+        """
+        media_id for an image, uploading it only if the cached one is
+        missing or about to expire
+        
+        The optimized version of the image is what gets uploaded.
+        
+        Returns:
+            media_id
         """
-        Get recent mentions of the bot
+        upload_path = self.image_optimizer.optimize(image_path, "tweet")
+        media_id = self.media_cache.get(upload_path)
+        if media_id:
+            return media_id
+        
+        lock = self._upload_locks.setdefault(upload_path, threading.Lock())
+        with lock:
+            # Another thread may have uploaded it while we waited
+            media_id = self.media_cache.get(upload_path)
+            if media_id:
+                return media_id
+            
+            self.rate_limiter.acquire("media_upload")
+            with metrics.timed("twitter", "media_upload"), tracing.span("media_upload"):
+                media = self.api_v1.media_upload(filename=upload_path)
+            self.media_cache.put(upload_path, media.media_id, getattr(media, "expires_after_secs", None))
+            logger.info(f"Image uploaded: {upload_path}")
+            return media.media_id
+    
+    def preload_media(self, image_paths, wait: bool = True):
         """
+        Upload every image that has no fresh media_id, in parallel
+        
+        Called at startup for all stage images, and again after each post
+        (wait=False) so IDs are re-uploaded before they expire instead of
+        on the posting path.
+        
+        Args:
+            image_paths: Files to have media_ids ready for
+            wait: Block until done (False runs it on a background thread)
+        
+        Returns:
+            Number of images uploaded (None when not waiting)
+        """
+        if not self.api_v1 or settings.DEV_MODE:
+            return 0
+        
+        stale = [path for path in dict.fromkeys(image_paths)
+                 if path and os.path.exists(path)
+                 and not self.media_cache.get(self.image_optimizer.optimize(path, "tweet"))]
+        if not stale:
+            return 0
+        
+        if not wait:
+            threading.Thread(target=self.preload_media, args=(stale,),
+                             name="polypuff-media-preload", daemon=True).start()
+            return None
+        
+        def upload(path):
+            try:
+                self.upload_media(path)
+                return True
+            except Exception as e:
+                logger.warning(f"Could not pre-upload {path}: {e}")
+                return False
+        
+        with ThreadPoolExecutor(max_workers=len(stale), thread_name_prefix="polypuff-media") as executor:
+            uploaded = sum(executor.map(upload, stale))
+        logger.info(f"Pre-uploaded {uploaded}/{len(stale)} images")
+        return uploaded
+    
+    def get_recent_mentions(self, since_id=None, max_results=100, max_pages=None, until_id=None):
+        """
+        Get mentions of the bot newer than since_id
+        
+        Follows pagination_token up to max_pages pages (MENTION_PAGE_BUDGET)
+        so a spike of mentions isn't cut off at one page. Without a since_id
+        (first run) only the newest page is read. Pages come newest first, so
+        when the budget runs out before since_id is reached the oldest
+        mentions are missing: `mentions_cut_off` is set, and the caller can
+        fetch them next time with until_id = the oldest mention returned.
+        
+        Args:
+            since_id: Only return mentions newer than this tweet ID
+            max_results: Mentions per page (5-100)
+            max_pages: Page budget for this call
+            until_id: Only return mentions older than this tweet ID
+        
+        Returns:
+            New mentions, oldest first
+        """
+        self.mentions_cut_off = False
         try:
             user_id = self.get_my_user_id()
             if not user_id:
                 return []
             
-            mentions = self.client.get_users_mentions(
-                id=user_id,
-                max_results=max_results,
-                tweet_fields=['created_at', 'author_id']
-            )
+            if max_pages is None:
+                max_pages = settings.MENTION_PAGE_BUDGET if since_id else 1
             
-            if mentions.data:
-                logger.info(f"Found {len(mentions.data)} mentions")
-                return mentions.data
+            mentions = []
+            pagination_token = None
+            for page in range(max_pages):
+                self.rate_limiter.acquire("get_users_mentions")
+                with metrics.timed("twitter", "get_users_mentions"), tracing.span("fetch_mentions", page=page):
+                    response = self.client.get_users_mentions(
+                        id=user_id,
+                        since_id=since_id,
+                        until_id=until_id,
+                        max_results=max_results,
+                        pagination_token=pagination_token,
+                        tweet_fields=['created_at', 'author_id'],
+                        user_auth=True
+                    )
+                
+                if response.data:
+                    mentions.extend(response.data)
+                
+                pagination_token = (response.meta or {}).get("next_token")
+                if not pagination_token:
+                    break
             else:
-                return []
+                if since_id:
+                    self.mentions_cut_off = True
+                    logger.warning(f"Mention page budget ({max_pages}) used up - "
+                                   f"older mentions after {since_id} are fetched next check")
+            
+            if mentions:
+                logger.info(f"Found {len(mentions)} mentions")
+            
+            # API pages are newest first - hand them out in the order they happened
+            mentions.sort(key=lambda mention: int(mention.id))
+            return mentions
                 
         except Exception as e:
             logger.error(f"Error fetching mentions: {e}")
@@ -136,7 +297,9 @@ class TwitterClient:
             if not self.client:
                 return None
             
-            user = self.client.get_me()
+            self.rate_limiter.acquire("get_me")
+            with metrics.timed("twitter", "get_me"):
+                user = self.client.get_me()
             self._user_id = user.data.id
             return self._user_id
         except Exception as e:
@@ -156,10 +319,12 @@ class TwitterClient:
             return False
         
         try:
-            response = self.client.create_tweet(
-                text=reply_text,
-                in_reply_to_tweet_id=tweet_id
-            )
+            self.rate_limiter.acquire("create_tweet")
+            with metrics.timed("twitter", "create_reply"), tracing.span("create_reply"):
+                response = self.client.create_tweet(
+                    text=reply_text,
+                    in_reply_to_tweet_id=tweet_id
+                )
             
             logger.info(f"Posted reply: {reply_text[:50]}...")
             return True
@@ -176,7 +341,10 @@ class TwitterClient:
             return False
 
         try:
-            self.api_v1.update_profile_image(filename=image_path)
+            self.rate_limiter.acquire("update_profile_image")
+            upload_path = self.image_optimizer.optimize(image_path, "profile")
+            with metrics.timed("twitter", "update_profile_image"), tracing.span("update_profile_image"):
+                self.api_v1.update_profile_image(filename=upload_path)
             logger.info(f"Profile image updated: {image_path}")
             return True
         except Exception as e:
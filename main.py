@@ -17,18 +17,32 @@ if os.name == 'nt':  # Windows only
         pass  # If reconfigure fails, continue anyway
 
 import time
+import asyncio
 import schedule
 import signal
 from core.agent import PolyPuffAgent
+from core.runtime import AgentRuntime
+from core.fleet import FleetHost
 from utils.logger import logger
+from utils import metrics
 from config.settings import settings
 
+# Set while the asyncio runtime (or fleet) is running
+active_runtime = None
+
 
 def signal_handler(sig, frame):
     """
     Handle Ctrl+C gracefully
     """
     logger.info("\nShutdown signal received...")
+    
+    # Async runtime: let running jobs finish, then save and exit
+    if active_runtime is not None:
+        logger.info("Stopping async runtime...")
+        active_runtime.request_stop()
+        return
+    
     logger.info("Saving state...")
     
     # Save any pending state here
@@ -37,69 +51,49 @@ def signal_handler(sig, frame):
     logger.info("PolyPuff is going to sleep. Goodnight!")
     sys.exit(0)
 
-def main():
+def run_async(agent):
     """
-    Main execution loop
+    Run the agent on the asyncio runtime (ASYNC_RUNTIME=true)
     """
-    # ASCII art banner (no emojis to avoid encoding issues)
-    print("""
-    ╔═══════════════════════════════════════╗
-    ║                                       ║
-    ║          POLYPUFF AGENT               ║
-    ║       The Evolving RWA Hunter         ║
-    ║                                       ║
-    ╚═══════════════════════════════════════╝
-    """)
+    global active_runtime
     
-    logger.info("Starting PolyPuff Agent...")
-    
-    # Check environment variables
-    required_vars = [
-        ("GOOGLE_API_KEY", settings.GOOGLE_API_KEY),
-        ("TWITTER_API_KEY", settings.TWITTER_API_KEY),
-        ("TWITTER_API_SECRET", settings.TWITTER_API_SECRET),
-        ("TWITTER_ACCESS_TOKEN", settings.TWITTER_ACCESS_TOKEN),
-        ("TWITTER_ACCESS_SECRET", settings.TWITTER_ACCESS_SECRET)
-    ]
+    active_runtime = AgentRuntime(agent)
+    logger.info("Agent is now running on the async runtime!")
+    logger.info(f"Tweeting every {settings.TWEET_INTERVAL_MINUTES} minutes")
+    logger.info(f"Checking interactions every {settings.CHECK_MENTIONS_INTERVAL_MINUTES} minutes")
+    logger.info(f"Checking balance every {settings.CHECK_BALANCE_INTERVAL_MINUTES} minutes")
+    logger.info("Press Ctrl+C to stop")
     
-#!/usr/bin/env python3
-"""
-PolyPuff Agent - Main Entry Point
-Runs the agent continuously, tweeting every hour
-"""
-
-import os
-import sys
-
-# Fix Windows console encoding BEFORE any other imports
-if os.name == 'nt':  # Windows only
     try:
-        os.system('chcp 65001 > nul')
-        sys.stdout.reconfigure(encoding='utf-8')
-        sys.stderr.reconfigure(encoding='utf-8')
-    except:
-        pass  # If reconfigure fails, continue anyway
-
-import time
-import schedule
-import signal
-from core.agent import PolyPuffAgent
-from utils.logger import logger
-from config.settings import settings
-
+        asyncio.run(active_runtime.run())
+    finally:
+        active_runtime = None
+    
+    logger.info("PolyPuff is going to sleep. Goodnight!")
 
-def signal_handler(sig, frame):
+def run_fleet():
     """
-    Handle Ctrl+C gracefully
+    Host every persona in FLEET_CONFIG_DIR in this process
     """
-    logger.info("\nShutdown signal received...")
-    logger.info("Saving state...")
+    global active_runtime
     
-    # Save any pending state here
-    # (agent already saves on each tweet, so this is just for safety)
+    if not settings.GOOGLE_API_KEY:
+        logger.error("Missing environment variables: GOOGLE_API_KEY")
+        return
     
-    logger.info("PolyPuff is going to sleep. Goodnight!")
-    sys.exit(0)
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    
+    active_runtime = FleetHost(settings.FLEET_CONFIG_DIR)
+    active_runtime.build_agents()
+    logger.info("Fleet is now running! Press Ctrl+C to stop")
+    
+    try:
+        asyncio.run(active_runtime.run())
+    finally:
+        active_runtime = None
+    
+    logger.info("The PolyPuff fleet is going to sleep. Goodnight!")
 
 def main():
     """
@@ -117,6 +111,13 @@ def main():
     
     logger.info("Starting PolyPuff Agent...")
     
+    if settings.METRICS_PORT:
+        metrics.start_server(settings.METRICS_PORT, settings.METRICS_HOST)
+    
+    if settings.FLEET_CONFIG_DIR:
+        run_fleet()
+        return
+    
     # Check environment variables
     required_vars = [
         ("GOOGLE_API_KEY", settings.GOOGLE_API_KEY),
@@ -127,7 +128,7 @@ def main():
     ]
     
     missing = [var[0] for var in required_vars if not var[1]]
-    if missing:
+    if missing and not settings.SIMULATION:
         logger.error(f"Missing environment variables: {', '.join(missing)}")
         logger.error("Please check your .env file")
         return
@@ -135,6 +136,9 @@ def main():
     if settings.DEV_MODE:
         logger.info("Running in DEV MODE - tweets will not be posted to Twitter")
     
+    if settings.SIMULATION:
+        logger.info("Running in SIMULATION - Twitter, Gemini and the chain are local fakes")
+    
     # Register signal handler
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -142,6 +146,10 @@ def main():
     # Initialize agent
     agent = PolyPuffAgent()
     
+    if settings.ASYNC_RUNTIME:
+        run_async(agent)
+        return
+    
     # Tweet immediately on startup
     logger.info("Posting initial tweet...")
     agent.think_and_tweet()
@@ -151,11 +159,12 @@ def main():
     schedule.every(interval).minutes.do(agent.think_and_tweet)
     
     # Schedule interaction checks (every 5 minutes)
-    schedule.every(5).minutes.do(agent.check_interactions)
+    mention_interval = settings.CHECK_MENTIONS_INTERVAL_MINUTES
+    schedule.every(mention_interval).minutes.do(agent.check_interactions)
     
     logger.info("Agent is now running!")
     logger.info(f"Will tweet every {interval} minutes")
-    logger.info("Checking interactions every 5 minutes")
+    logger.info(f"Checking interactions every {mention_interval} minutes")
     logger.info("Press Ctrl+C to stop")
     
     # Main loop
@@ -0,0 +1,50 @@
+"""
+Fake Twitter, Gemini and chain backends for SIMULATION=true
+"""
+from core.wallet import WalletManager
+from integrations.gemini_client import GeminiClient
+from simulation.chain import FakeChain
+from simulation.gemini import FakeGenerativeModel
+from simulation.twitter import FakeTwitter, FakeTwitterClient
+from config.settings import settings
+from utils.logger import logger
+
+# Wallet the simulated agent watches (the chain is local, any address works)
+SIM_WALLET_ADDRESS = "0x000000000000000000000000000000000000beef"
+
+_chain = None
+
+
+def get_chain() -> FakeChain:
+    """
+    The process-wide fake chain, started on first use
+    """
+    global _chain
+    if _chain is None:
+        blocks_per_hour = 3600 / max(settings.BLOCK_TIME_SECONDS, 0.1)
+        _chain = FakeChain(
+            block_time=settings.BLOCK_TIME_SECONDS or None,
+            donation_rate=settings.SIM_DONATIONS_PER_HOUR / blocks_per_hour,
+        ).start()
+        _chain.fund(SIM_WALLET_ADDRESS, settings.SIM_START_BALANCE)
+    return _chain
+
+
+def create_backends() -> dict:
+    """
+    Clients for PolyPuffAgent that never leave the process
+
+    Returns:
+        {"twitter": FakeTwitterClient, "ai": GeminiClient on a
+        FakeGenerativeModel, "wallet": WalletManager on the fake chain,
+        "chain": FakeChain}
+    """
+    chain = get_chain()
+    twitter = FakeTwitterClient(FakeTwitter(
+        latency=settings.SIM_TWITTER_LATENCY_MS / 1000,
+        mentions_per_minute=settings.SIM_MENTIONS_PER_MINUTE,
+    ))
+    ai = GeminiClient(model=FakeGenerativeModel(latency=settings.SIM_GEMINI_LATENCY_MS / 1000))
+    wallet = WalletManager(SIM_WALLET_ADDRESS, w3=chain.web3())
+    logger.info("SIMULATION: Twitter, Gemini and the chain are local fakes")
+    return {"twitter": twitter, "ai": ai, "wallet": wallet, "chain": chain}
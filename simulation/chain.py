@@ -0,0 +1,256 @@
+"""
+Local anvil-style chain: an in-process JSON-RPC node with instant mining
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from web3 import Web3
+from utils.logger import logger
+
+CHAIN_ID = 31337
+WEI_PER_ETH = 10 ** 18
+
+
+class FakeChain:
+    """
+    Just enough of an Ethereum node for the agent, served over real HTTP
+
+    Every transfer is mined into its own block (like anvil's default
+    instant mining). With block_time set, empty blocks are also produced to
+    keep up with the clock, and donation_rate adds a random donation to a
+    block now and then. Balances are kept per block, so historical
+    eth_getBalance reads work. Supports web3_clientVersion, eth_chainId,
+    net_version, eth_blockNumber, eth_getBalance, eth_getBlockByNumber,
+    eth_getTransactionReceipt and eth_getLogs (always empty), single or
+    batched. outage(True) makes the node answer HTTP 503.
+    """
+
+    def __init__(self, block_time: float = None, donation_rate: float = 0.0, latency: float = 0.0,
+                 seed: int = None):
+        """
+        Args:
+            block_time: Seconds per block when mining to keep up with the
+                clock (None = only mine on transfers and mine())
+            donation_rate: Chance that a clock-mined block carries a
+                donation to a funded address
+            latency: Seconds added to every HTTP request
+            seed: Random seed for donations
+        """
+        self.block_time = block_time
+        self.donation_rate = donation_rate
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.down = False
+
+        self.blocks = []
+        self.balances = {}  # address (lowercase) -> [(block number, wei)]
+        self.receipts = {}  # tx hash -> receipt
+        self.stats = {"http_requests": 0, "rpc_calls": 0}
+        self._lock = threading.RLock()
+        self._server = None
+        self._started = time.time()
+        self._mine([])  # genesis
+
+    # --- chain state -----------------------------------------------------
+
+    def _mine(self, transactions: list) -> int:
+        with self._lock:
+            number = len(self.blocks)
+            for tx in transactions:
+                tx["blockNumber"] = hex(number)
+                self._credit(tx["to"], int(tx["value"], 16), number)
+                self.receipts[tx["hash"]] = {"transactionHash": tx["hash"], "blockNumber": hex(number),
+                                             "status": "0x1"}
+            self.blocks.append({
+                "number": hex(number),
+                "hash": "0x" + hashlib.sha256(f"block{number}".encode()).hexdigest(),
+                "timestamp": hex(int(time.time())),
+                "transactions": transactions,
+            })
+            return number
+
+    def _credit(self, address: str, wei: int, block: int):
+        history = self.balances.setdefault(address.lower(), [])
+        current = history[-1][1] if history else 0
+        if history and history[-1][0] == block:
+            history[-1] = (block, current + wei)
+        else:
+            history.append((block, current + wei))
+
+    def _catch_up(self):
+        """Mine the empty (or donation) blocks the clock says are due"""
+        if not self.block_time:
+            return
+        with self._lock:
+            due = int((time.time() - self._started) / self.block_time) + 1
+            while len(self.blocks) < due:
+                transactions = []
+                funded = list(self.balances)
+                if funded and self.random.random() < self.donation_rate:
+                    sender = "0x" + "%040x" % self.random.getrandbits(160)
+                    wei = self.random.choice([1, 2, 5, 10]) * WEI_PER_ETH // 10000
+                    transactions.append(self._transaction(sender, funded[0], wei))
+                self._mine(transactions)
+
+    def _transaction(self, sender: str, recipient: str, wei: int) -> dict:
+        nonce = len(self.receipts) + len(self.blocks)
+        return {
+            "hash": "0x" + hashlib.sha256(f"{sender}{recipient}{wei}{nonce}".encode()).hexdigest(),
+            "from": sender.lower(),
+            "to": recipient.lower(),
+            "value": hex(wei),
+            "input": "0x",
+        }
+
+    def fund(self, address: str, eth: float):
+        """
+        Add ETH to an address without a transaction (anvil_setBalance style)
+        """
+        with self._lock:
+            self._credit(address, int(eth * WEI_PER_ETH), self._mine([]))
+
+    def send(self, sender: str, recipient: str, eth: float) -> str:
+        """
+        Transfer ETH in a new block
+
+        Returns:
+            Transaction hash
+        """
+        tx = self._transaction(sender, recipient, int(eth * WEI_PER_ETH))
+        self._mine([tx])
+        return tx["hash"]
+
+    def mine(self, count: int = 1):
+        """Mine empty blocks (e.g. to reach scanner confirmations)"""
+        for _ in range(count):
+            self._mine([])
+
+    def balance_of(self, address: str, block: int = None) -> int:
+        with self._lock:
+            block = len(self.blocks) - 1 if block is None else block
+            balance = 0
+            for number, wei in self.balances.get(address.lower(), []):
+                if number > block:
+                    break
+                balance = wei
+            return balance
+
+    @property
+    def head(self) -> int:
+        return len(self.blocks) - 1
+
+    def outage(self, down: bool = True):
+        """Make the node unreachable (HTTP 503) or bring it back"""
+        self.down = down
+
+    # --- JSON-RPC ----------------------------------------------------------
+
+    def _block_number(self, tag) -> int:
+        if tag in ("latest", "pending", "safe", "finalized", None):
+            return self.head
+        if tag == "earliest":
+            return 0
+        return int(tag, 16)
+
+    def call(self, method: str, params: list):
+        """
+        Answer one JSON-RPC call
+
+        Raises:
+            KeyError for unsupported methods
+        """
+        self.stats["rpc_calls"] += 1
+        if method == "web3_clientVersion":
+            return "polypuff-fake-chain/1.0"
+        if method == "eth_chainId":
+            return hex(CHAIN_ID)
+        if method == "net_version":
+            return str(CHAIN_ID)
+        if method == "eth_blockNumber":
+            return hex(self.head)
+        if method == "eth_getBalance":
+            return hex(self.balance_of(params[0], self._block_number(params[1] if len(params) > 1 else None)))
+        if method == "eth_getBlockByNumber":
+            number = self._block_number(params[0])
+            if number > self.head:
+                return None
+            block = dict(self.blocks[number])
+            if not (len(params) > 1 and params[1]):
+                block["transactions"] = [tx["hash"] for tx in block["transactions"]]
+            return block
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0])
+        if method == "eth_getLogs":
+            return []
+        raise KeyError(method)
+
+    def handle(self, payload):
+        """Answer a single or batched JSON-RPC request"""
+        self._catch_up()
+
+        def answer(request):
+            try:
+                result = self.call(request.get("method"), request.get("params") or [])
+                return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+            except KeyError:
+                return {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": -32601, "message": f"method {request.get('method')} not supported"}}
+
+        if isinstance(payload, list):
+            return [answer(request) for request in payload]
+        return answer(payload)
+
+    # --- server ------------------------------------------------------------
+
+    def start(self):
+        """
+        Serve JSON-RPC on a free localhost port
+
+        Returns:
+            self
+        """
+        chain = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                chain.stats["http_requests"] += 1
+                if chain.latency:
+                    time.sleep(chain.latency)
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if chain.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                data = json.dumps(chain.handle(json.loads(body))).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="polypuff-fake-chain", daemon=True).start()
+        logger.info(f"Fake chain listening on {self.url}")
+        return self
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def web3(self) -> Web3:
+        """Web3 connected to this chain over HTTP"""
+        return Web3(Web3.HTTPProvider(self.url))
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
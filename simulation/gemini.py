@@ -0,0 +1,126 @@
+"""
+Latency-configurable stand-in for the Gemini model
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from google.api_core import exceptions as google_exceptions
+
+OPENINGS = ["gm frens", "hmm", "psst", "ok so", "update:", "tiny thought:", "beep boop", "wiggle wiggle"]
+MIDDLES = ["my shell feels warm today", "i can hear the blockchain humming", "someone left crumbs in the mempool",
+           "i dreamt about hatching again", "the blocks are extra shiny tonight", "my tummy is rumbling a lil",
+           "i counted every wei in my wallet", "i think i grew a tiny bit", "the timeline is so loud today"]
+CLOSINGS = ["anyone awake?", "brb napping", "send snacks pls", "what do u think?", "ok bye", "stay cozy",
+            "love u all", "is this normal?"]
+EMOJIS = ["🥚", "✨", "🥺", "💤", "🍼", "💕", "🔍", "🫧"]
+
+MENTION_LINE = re.compile(r"^(\d+)\. \[", re.MULTILINE)
+
+
+class FakeGenerativeModel:
+    """
+    Drop-in for genai.GenerativeModel: generate_content and
+    generate_content_async with configurable latency and failures
+
+    Tweets are stitched together from word lists (thousands of
+    combinations, so they don't all look like repeats). Batch reply
+    prompts get a JSON array back. A call that would take longer than its
+    request_options timeout raises DeadlineExceeded after the timeout, like
+    the SDK. outage() makes every call fail with ServiceUnavailable.
+    """
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.0, failure_rate: float = 0.0, seed: int = None):
+        """
+        Args:
+            latency: Seconds per call
+            jitter: Up to this many seconds added at random
+            failure_rate: Share of calls that fail (0-1)
+            seed: Random seed
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.down = False
+        self.stats = {"calls": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0, "prompt_chars": 0}
+        self._lock = threading.Lock()
+
+    def outage(self, down: bool = True):
+        """Make every call fail (or recover)"""
+        self.down = down
+
+    def with_system_instruction(self, system_instruction: str):
+        """Handle that sends a system instruction with every call (like a
+        GenerativeModel built with system_instruction)"""
+        return FakeStageModel(self, system_instruction)
+
+    def _begin(self, prompt, request_options, system_instruction: str = "") -> tuple:
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            self.stats["prompt_chars"] += len(str(prompt)) + len(system_instruction)
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            failed = self.down or self.random.random() < self.failure_rate
+        timeout = (request_options or {}).get("timeout")
+        return delay, timeout, failed
+
+    def _finish(self, prompt, generation_config, delay, timeout, failed):
+        with self._lock:
+            self.stats["in_flight"] -= 1
+            if failed or (timeout and delay > timeout):
+                self.stats["failures"] += 1
+        if timeout and delay > timeout:
+            raise google_exceptions.DeadlineExceeded(f"simulated Gemini call exceeded {timeout}s")
+        if failed:
+            raise google_exceptions.ServiceUnavailable("simulated Gemini outage")
+        return SimpleNamespace(text=self.respond(str(prompt), generation_config))
+
+    def generate_content(self, prompt, generation_config=None, request_options=None, system_instruction="",
+                         **kwargs):
+        delay, timeout, failed = self._begin(prompt, request_options, system_instruction)
+        if delay:
+            time.sleep(min(delay, timeout) if timeout else delay)
+        return self._finish(prompt, generation_config, delay, timeout, failed)
+
+    async def generate_content_async(self, prompt, generation_config=None, request_options=None,
+                                     system_instruction="", **kwargs):
+        delay, timeout, failed = self._begin(prompt, request_options, system_instruction)
+        await asyncio.sleep(min(delay, timeout) if timeout else delay)
+        return self._finish(prompt, generation_config, delay, timeout, failed)
+
+    def respond(self, prompt: str, generation_config=None) -> str:
+        """Text the model "writes" for a prompt"""
+        config = generation_config or {}
+        mime_type = config.get("response_mime_type") if isinstance(config, dict) \
+            else getattr(config, "response_mime_type", None)
+        if mime_type == "application/json":
+            return json.dumps([{"id": int(number), "reply": f"{self._phrase()} (re #{number})"}
+                               for number in MENTION_LINE.findall(prompt)])
+        return self._phrase()
+
+    def _phrase(self) -> str:
+        with self._lock:
+            choice = self.random.choice
+            return f"{choice(OPENINGS)} {choice(MIDDLES)}... {choice(CLOSINGS)} {choice(EMOJIS)}"
+
+
+class FakeStageModel:
+    """
+    A FakeGenerativeModel handle with a system instruction (shares the
+    parent's latency, failures and stats)
+    """
+
+    def __init__(self, model: FakeGenerativeModel, system_instruction: str):
+        self.model = model
+        self.system_instruction = system_instruction
+
+    def generate_content(self, prompt, **kwargs):
+        return self.model.generate_content(prompt, system_instruction=self.system_instruction, **kwargs)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return await self.model.generate_content_async(prompt, system_instruction=self.system_instruction, **kwargs)
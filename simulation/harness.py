@@ -0,0 +1,279 @@
+"""
+Run PolyPuffAgent against scripted scenarios on the fake backends
+
+    python -m simulation.harness                      # every scenario
+    python -m simulation.harness mention_flood --gemini-latency 0.5 --json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+if __name__ == "__main__":
+    # Keep the run's logs and traces out of the working tree (like tests/sandbox.py);
+    # settings are read on import, so this has to come before the project imports
+    LOG_DIR = tempfile.mkdtemp(prefix="polypuff-sim-logs-")
+    os.environ.setdefault("LOG_FILE", os.path.join(LOG_DIR, "polypuff.jsonl"))
+    os.environ.setdefault("TRACE_FILE", os.path.join(LOG_DIR, "traces.jsonl"))
+
+from core.agent import PolyPuffAgent
+from core.wallet import WalletManager
+from integrations.gemini_client import GeminiClient
+from simulation.backends import SIM_WALLET_ADDRESS
+from simulation.chain import FakeChain
+from simulation.gemini import FakeGenerativeModel
+from simulation.twitter import FakeTwitter, FakeTwitterClient
+from config.settings import settings
+from utils.image_optimizer import ImageOptimizer
+from utils.logger import logger
+
+# name -> (description, [(step, kwargs)])
+SCENARIOS = {
+    "mention_flood": (
+        "500 mentions from 200 people arrive at once",
+        [("flood_mentions", {"count": 500, "authors": 200})] + [("check_mentions", {})] * 3,
+    ),
+    "donation_burst": (
+        "20 donations land together and push the egg past the slime threshold",
+        [("donate", {"count": 20, "amount": 0.0005}), ("check_wallet", {}), ("tweet", {})],
+    ),
+    "api_outage": (
+        "Gemini, mention fetching and the RPC go down, then come back",
+        [("outage", {"service": "gemini"}), ("tweet", {}),
+         ("flood_mentions", {"count": 20}), ("outage", {"service": "mentions"}), ("check_mentions", {}),
+         ("outage", {"service": "rpc"}), ("donate", {"count": 2, "amount": 0.001}), ("check_wallet", {}),
+         ("outage", {"service": "all", "down": False}),
+         ("check_mentions", {}), ("check_wallet", {}), ("tweet", {})],
+    ),
+    "steady_day": (
+        "24 hourly cycles: a tweet, a few mentions, a wallet check and the odd donation",
+        [step for hour in range(24) for step in (
+            ("flood_mentions", {"count": 5}), ("check_mentions", {}),
+            *([("donate", {"count": 1, "amount": 0.001})] if hour % 6 == 5 else []),
+            ("check_wallet", {}), ("tweet", {}))],
+    ),
+}
+
+
+@contextmanager
+def overrides(**values):
+    """Temporarily change settings"""
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+class Simulation:
+    """
+    One agent wired to a FakeTwitter, a FakeGenerativeModel and a FakeChain
+
+    Steps (see SCENARIOS) change the world - flood_mentions, donate,
+    outage - or run one agent job - tweet, check_mentions, check_wallet.
+    Each run() returns a report with the time every step took and what
+    the agent did.
+    """
+
+    def __init__(self, data_dir: str = None, gemini_latency: float = 0.05, twitter_latency: float = 0.0,
+                 rpc_latency: float = 0.0, rate_limits: bool = False, seed: int = 0):
+        """
+        Args:
+            data_dir: Agent files (a temporary directory by default)
+            gemini_latency: Seconds per Gemini call
+            twitter_latency: Seconds per Twitter call
+            rpc_latency: Seconds per JSON-RPC HTTP request
+            rate_limits: Pace Twitter calls like the real API
+            seed: Random seed for generated mentions, tweets and donations
+        """
+        self.data_dir = data_dir or tempfile.mkdtemp(prefix="polypuff-sim-")
+        self._temporary = data_dir is None
+        self.chain = FakeChain(latency=rpc_latency, seed=seed).start()
+        self.chain.fund(SIM_WALLET_ADDRESS, 0)
+        self.twitter = FakeTwitter(latency=twitter_latency, seed=seed)
+        self.model = FakeGenerativeModel(latency=gemini_latency, seed=seed)
+        self.donors = 0
+
+        with self.settings():
+            self.agent = PolyPuffAgent(
+                twitter=FakeTwitterClient(self.twitter, rate_limits=rate_limits,
+                                          image_optimizer=ImageOptimizer(os.path.join(self.data_dir, "images"))),
+                ai=GeminiClient(model=self.model),
+                wallet=WalletManager(SIM_WALLET_ADDRESS, w3=self.chain.web3()),
+                data_dir=self.data_dir,
+                name="SimPuff",
+            )
+            # Warm up like a running agent: the donation scanner has a cursor
+            # and there's a since_id, so later checks page through everything new
+            self.agent.check_wallet_and_evolve()
+            self.twitter.flood(1)
+            self.agent.check_interactions()
+
+    def settings(self):
+        return overrides(DEV_MODE=False, SIMULATION=False, BLOCK_TIME_SECONDS=0, EVOLUTION_PAUSE_SECONDS=0,
+                         SCANNER_START_BLOCK=0)
+
+    # --- world -------------------------------------------------------------
+
+    def flood_mentions(self, count: int, authors: int = None):
+        self.twitter.flood(count, authors=authors)
+
+    def donate(self, count: int, amount: float):
+        for _ in range(count):
+            self.donors += 1
+            self.chain.send("0x" + "%040x" % (0xD000 + self.donors), SIM_WALLET_ADDRESS, amount)
+        self.chain.mine(settings.SCANNER_CONFIRMATIONS)
+
+    def outage(self, service: str, down: bool = True):
+        """
+        Args:
+            service: "gemini", "mentions", "twitter" (every endpoint),
+                "rpc" or "all"
+        """
+        if service in ("gemini", "all"):
+            self.model.outage(down)
+            if down:
+                # Tweets buffered before the outage would hide it from the tweet step
+                self.agent.tweet_buffer.invalidate()
+        if service in ("mentions", "all"):
+            self.twitter.outage("get_users_mentions", down)
+        if service in ("twitter", "all"):
+            self.twitter.outage(down=down)
+        if service in ("rpc", "all"):
+            self.chain.outage(down)
+
+    # --- agent jobs ----------------------------------------------------------
+
+    def tweet(self):
+        self.agent.think_and_tweet()
+
+    def check_mentions(self):
+        self.agent.check_interactions()
+
+    def check_wallet(self):
+        self.agent.check_wallet_and_evolve()
+
+    # --- running -------------------------------------------------------------
+
+    def run(self, steps: list, name: str = "custom") -> dict:
+        """
+        Run steps in order
+
+        Args:
+            steps: [(step name, kwargs)]
+            name: Scenario name for the report
+
+        Returns:
+            Report dict
+        """
+        before = self.counters()
+        timings = []
+        started = time.perf_counter()
+
+        with self.settings():
+            for step, kwargs in steps:
+                step_started = time.perf_counter()
+                getattr(self, step)(**kwargs)
+                timings.append({"step": step, **kwargs, "seconds": round(time.perf_counter() - step_started, 4)})
+
+        after = self.counters()
+        return {
+            "scenario": name,
+            "seconds": round(time.perf_counter() - started, 3),
+            "steps": timings,
+            "counts": {key: after[key] - before[key] for key in after},
+            "agent": {"stage": self.agent.stage, "balance": self.agent.balance,
+                      "tweet_count": self.agent.tweet_count},
+            "mentions_unanswered": sum(1 for mention in self.twitter.mentions
+                                       if mention.id not in self.agent.interaction_handler.processed_tweets),
+        }
+
+    def counters(self) -> dict:
+        return {
+            "tweets": len(self.twitter.posts),
+            "replies": len(self.twitter.replies),
+            "media_uploads": self.twitter.calls["media_upload"],
+            "twitter_calls": sum(self.twitter.calls.values()),
+            "gemini_calls": self.model.stats["calls"],
+            "gemini_failures": self.model.stats["failures"],
+            "rpc_requests": self.chain.stats["http_requests"],
+            "rpc_calls": self.chain.stats["rpc_calls"],
+        }
+
+    def close(self):
+        self.agent.tweet_buffer.stop()
+        self.agent.state_store.close()
+        self.chain.stop()
+        if self._temporary:
+            shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+def run_scenario(name: str, **options) -> dict:
+    """
+    Run one of SCENARIOS on a fresh simulation
+
+    Args:
+        name: Scenario name
+        options: Simulation arguments (latencies, rate_limits, seed)
+    """
+    simulation = Simulation(**options)
+    try:
+        return simulation.run(SCENARIOS[name][1], name=name)
+    finally:
+        simulation.close()
+
+
+def print_report(report: dict):
+    counts = report["counts"]
+    print(f"\n{report['scenario']}: {report['seconds']:.2f}s")
+    print(f"  tweets {counts['tweets']}, replies {counts['replies']}, "
+          f"unanswered mentions {report['mentions_unanswered']}")
+    print(f"  gemini {counts['gemini_calls']} calls ({counts['gemini_failures']} failed), "
+          f"twitter {counts['twitter_calls']} calls, rpc {counts['rpc_calls']} calls "
+          f"in {counts['rpc_requests']} requests")
+    print(f"  agent: {report['agent']['stage']}, {report['agent']['balance']:.4f} ETH")
+    slowest = sorted(report["steps"], key=lambda step: step["seconds"], reverse=True)[:3]
+    print("  slowest steps: " + ", ".join(f"{step['step']} {step['seconds']:.3f}s" for step in slowest))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run PolyPuff against simulated Twitter, Gemini and chain")
+    parser.add_argument("scenarios", nargs="*", help=f"Any of: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="Seconds per Gemini call")
+    parser.add_argument("--twitter-latency", type=float, default=0.0, help="Seconds per Twitter call")
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="Seconds per RPC request")
+    parser.add_argument("--rate-limits", action="store_true", help="Pace Twitter calls like the real API")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print reports as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    logger.info(f"Logs in {settings.LOG_FILE}, traces in {settings.TRACE_FILE}")
+    reports = []
+    for name in args.scenarios or list(SCENARIOS):
+        logger.info(f"Simulating {name}: {SCENARIOS[name][0]}")
+        reports.append(run_scenario(name, gemini_latency=args.gemini_latency,
+                                    twitter_latency=args.twitter_latency, rpc_latency=args.rpc_latency,
+                                    rate_limits=args.rate_limits, seed=args.seed))
+
+    if args.json:
+        json.dump(reports, sys.stdout, indent=2)
+        print()
+    else:
+        for report in reports:
+            print_report(report)
+    return reports
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+In-process stand-in for the Twitter API, with a mention generator
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import tweepy
+from integrations.twitter import TwitterClient
+from integrations.media_cache import MediaCache
+from utils.image_optimizer import ImageOptimizer
+from utils.logger import logger
+from utils.rate_limiter import RateLimiter, DEFAULT_LIMITS
+
+# Mentions the generator writes, roughly one list per interaction type
+MENTION_TEMPLATES = [
+    "gm puff", "gm!!", "hey little guy", "hello polypuff", "how are you today?",
+    "you're so cute", "love this project", "this is awesome",
+    "what are you?", "why are you an egg", "where do you live?",
+    "just sent you some eth", "how do i feed you?", "donated!",
+    "when will you evolve?", "when do you hatch", "can't wait to see you level up",
+    "can you help me?", "please explain how this works",
+    "lol", "nice", "follow for follow",
+]
+
+# Endpoints outage() can take down (all of them by default)
+ENDPOINTS = ("create_tweet", "get_users_mentions", "get_me", "media_upload", "update_profile_image")
+
+
+class FakeTwitter:
+    """
+    The Twitter API as one object: tweepy.Client (v2) and tweepy.API (v1.1)
+    methods the agent uses, answered from memory
+
+    Mentions come from flood() or, with mentions_per_minute set, trickle in
+    with the clock. Every call sleeps `latency` seconds. outage() makes
+    endpoints raise tweepy.TweepyException like a 503.
+    """
+
+    def __init__(self, latency: float = 0.0, mentions_per_minute: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.mentions_per_minute = mentions_per_minute
+        self.random = random.Random(seed)
+        self.user_id = 1000
+        self.next_id = 1_700_000_000_000_000_000  # snowflake-sized, always increasing
+        self.mentions = []  # tweepy.Tweet, oldest first
+        self.tweets = []  # {"id", "text", "media_ids", "in_reply_to"}
+        self.media = {}  # media_id -> filename
+        self.profile_images = []
+        self.down = {}  # endpoint -> True
+        self.calls = {endpoint: 0 for endpoint in ENDPOINTS}
+        self._lock = threading.Lock()
+        self._generated_at = time.time()
+
+    def _call(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.down.get(endpoint):
+            raise tweepy.TweepyException(f"503 Service Unavailable ({endpoint}, simulated outage)")
+
+    def _new_id(self) -> int:
+        with self._lock:
+            self.next_id += self.random.randint(1, 1 << 22)
+            return self.next_id
+
+    def outage(self, endpoints=ENDPOINTS, down: bool = True):
+        """Take endpoints down (or bring them back)"""
+        for endpoint in ([endpoints] if isinstance(endpoints, str) else endpoints):
+            self.down[endpoint] = down
+
+    # --- mention generator ---------------------------------------------------
+
+    def flood(self, count: int, texts: list = None, authors: int = None) -> list:
+        """
+        Add mentions
+
+        Args:
+            count: How many
+            texts: Pick texts from this list (MENTION_TEMPLATES by default)
+            authors: Size of the author pool (defaults to one per mention)
+
+        Returns:
+            The new mentions
+        """
+        texts = texts or MENTION_TEMPLATES
+        authors = authors or count
+        added = []
+        for _ in range(count):
+            added.append(tweepy.Tweet({
+                "id": str(self._new_id()),
+                "text": f"@polypuff {self.random.choice(texts)}",
+                "author_id": str(self.random.randrange(authors) + 1),
+                "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                "edit_history_tweet_ids": [],
+            }))
+        with self._lock:
+            self.mentions.extend(added)
+        return added
+
+    def _generate_due(self):
+        if not self.mentions_per_minute:
+            return
+        now = time.time()
+        due = int((now - self._generated_at) / 60 * self.mentions_per_minute)
+        if due:
+            self._generated_at = now
+            self.flood(due)
+
+    # --- tweepy.Client ------------------------------------------------------
+
+    def get_me(self, **kwargs):
+        self._call("get_me")
+        return tweepy.Response(SimpleNamespace(id=self.user_id, username="polypuff"), {}, [], {})
+
+    def get_users_mentions(self, id, since_id=None, until_id=None, max_results=100, pagination_token=None,
+                           **kwargs):
+        self._call("get_users_mentions")
+        self._generate_due()
+        with self._lock:
+            newest_first = [m for m in reversed(self.mentions)
+                            if (since_id is None or m.id > int(since_id)) and (until_id is None or m.id < int(until_id))]
+        start = int(pagination_token or 0)
+        page = newest_first[start:start + max_results]
+        meta = {"result_count": len(page)}
+        if start + max_results < len(newest_first):
+            meta["next_token"] = str(start + max_results)
+        return tweepy.Response(page or None, {}, [], meta)
+
+    def create_tweet(self, text=None, media_ids=None, in_reply_to_tweet_id=None, **kwargs):
+        self._call("create_tweet")
+        tweet_id = self._new_id()
+        with self._lock:
+            self.tweets.append({"id": tweet_id, "text": text, "media_ids": media_ids,
+                                "in_reply_to": in_reply_to_tweet_id})
+        return tweepy.Response({"id": str(tweet_id), "text": text}, {}, [], {})
+
+    # --- tweepy.API (v1.1) ------------------------------------------------------
+
+    def media_upload(self, filename, **kwargs):
+        self._call("media_upload")
+        media_id = self._new_id()
+        self.media[media_id] = filename
+        return SimpleNamespace(media_id=media_id, expires_after_secs=86400)
+
+    def update_profile_image(self, filename, **kwargs):
+        self._call("update_profile_image")
+        self.profile_images.append(filename)
+
+    # --- what happened --------------------------------------------------------
+
+    @property
+    def replies(self) -> list:
+        return [tweet for tweet in self.tweets if tweet["in_reply_to"]]
+
+    @property
+    def posts(self) -> list:
+        return [tweet for tweet in self.tweets if not tweet["in_reply_to"]]
+
+
+class FakeTwitterClient(TwitterClient):
+    """
+    TwitterClient talking to a FakeTwitter instead of the network
+
+    Everything above the tweepy calls is the real client: retries, rate
+    limiting, media cache, image optimization, mention pagination.
+    """
+
+    def __init__(self, backend: FakeTwitter = None, rate_limits: bool = True, media_cache=None,
+                 image_optimizer=None):
+        """
+        Args:
+            backend: FakeTwitter to use (a new one by default)
+            rate_limits: Pace calls like the real API (False lifts the limits)
+        """
+        limits = DEFAULT_LIMITS if rate_limits else {endpoint: (10 ** 9, 1) for endpoint in DEFAULT_LIMITS}
+        self.rate_limiter = RateLimiter(limits)
+        self.media_cache = media_cache or MediaCache()
+        self.image_optimizer = image_optimizer or ImageOptimizer()
+        self._upload_locks = {}
+        
+        self.backend = backend or FakeTwitter()
+        self.client = self.backend
+        self.api_v1 = self.backend
+        logger.info("Fake Twitter client initialized (simulation)")
@@ -0,0 +1,14 @@
+"""
+Keeps the verify scripts from writing into the working tree
+
+Import it before anything from the project: logs, traces and optimized
+images go to a temporary directory unless LOG_FILE / TRACE_FILE /
+IMAGE_CACHE_DIR are already set.
+"""
+import os
+import tempfile
+
+LOG_DIR = tempfile.mkdtemp(prefix="polypuff-verify-")
+os.environ.setdefault("LOG_FILE", os.path.join(LOG_DIR, "polypuff.jsonl"))
+os.environ.setdefault("TRACE_FILE", os.path.join(LOG_DIR, "traces.jsonl"))
+os.environ.setdefault("IMAGE_CACHE_DIR", os.path.join(LOG_DIR, "image_cache"))
@@ -0,0 +1,54 @@
+
+import sys
+import os
+from unittest.mock import MagicMock, PropertyMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from core.wallet import BalanceWatcher
+from config.settings import settings
+
+def verify_balance_watcher():
+    print("🧪 Verifying Block-Aware Balance Watcher...")
+
+    # Always re-check the head so the test controls every block
+    settings.BLOCK_TIME_SECONDS = 0
+
+    mock_w3 = MagicMock()
+    block_number = PropertyMock(side_effect=[100, 100, 101])
+    type(mock_w3.eth).block_number = block_number
+    mock_w3.eth.get_balance.side_effect = [5 * 10**15, 6 * 10**15]
+    mock_w3.from_wei.side_effect = lambda wei, unit: wei / 10**18
+
+    watcher = BalanceWatcher(mock_w3)
+    address = "0x0000000000000000000000000000000000000001"
+
+    first = watcher.get_reading(address)
+    assert first["block_number"] == 100
+    assert first["balance"] == 0.005
+    assert not first["cached"]
+    mock_w3.eth.get_balance.assert_called_once_with(address, block_identifier=100)
+    print("✅ First reading pinned to block 100")
+
+    second = watcher.get_reading(address)
+    assert second["cached"]
+    assert second["balance"] == 0.005
+    assert mock_w3.eth.get_balance.call_count == 1
+    print("✅ Unchanged head served from cache (no eth_getBalance)")
+
+    third = watcher.get_reading(address)
+    assert third["block_number"] == 101
+    assert third["balance"] == 0.006
+    assert mock_w3.eth.get_balance.call_count == 2
+    print("✅ New block triggers a fresh read")
+
+    watcher.note_block(2000)
+    assert watcher.blocks_behind(third["block_number"]) == 1899
+    assert watcher.blocks_behind(None) is None
+    print("✅ Staleness measured in blocks")
+
+    print("✨ Balance Watcher Verification Complete!")
+
+if __name__ == "__main__":
+    verify_balance_watcher()
@@ -0,0 +1,82 @@
+
+import sys
+import os
+import re
+import json
+import tempfile
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from integrations.gemini_client import GeminiClient, parse_batch_replies, stage_personality
+from integrations.interaction_handler import InteractionHandler
+from config.prompts import STAGE_PROMPTS
+
+def fake_model(broken_ids=()):
+    """
+    generate_content that answers batch prompts with a JSON array
+    (leaving out broken_ids) and single prompts with plain text
+    """
+    prompts = []
+
+    def generate_content(prompt, generation_config=None, **kwargs):
+        prompts.append(prompt)
+        numbered = re.findall(r'^(\d+)\. \[', prompt, re.MULTILINE)
+        if generation_config.get("response_mime_type") == "application/json":
+            entries = [{"id": int(n), "reply": f"batch reply {n} ✨"}
+                       for n in numbered if int(n) not in broken_ids]
+            entries += [{"id": n, "reply": 42} for n in broken_ids]
+            return MagicMock(text="```json\n" + json.dumps(entries) + "\n```")
+        return MagicMock(text="single reply 🥚")
+
+    model = MagicMock()
+    model.generate_content.side_effect = generate_content
+    return model, prompts
+
+def verify_batch_replies():
+    print("🧪 Verifying Batched Reply Generation...")
+
+    assert parse_batch_replies('[{"id": 2, "reply": "b"}, {"id": 1, "reply": "\\"a\\""}]', 2) == ["a", "b"]
+    assert parse_batch_replies('Sure! ```json\n[{"id": 1, "reply": "a"}]\n```', 2) == ["a", None]
+    assert parse_batch_replies('{"replies": ["a", "b"]}', 2) == ["a", "b"]
+    assert parse_batch_replies('[{"id": 9, "reply": "x"}, {"id": "one"}, {"id": 2, "reply": ""}]', 2) == [None, None]
+    assert parse_batch_replies("not json at all", 3) == [None, None, None]
+    print("✅ Parser handles reordering, fences, wrappers and malformed entries")
+
+    model, prompts = fake_model(broken_ids=(3,))
+    ai = GeminiClient(model=model)
+    twitter = MagicMock()
+    handler = InteractionHandler(twitter, ai, "egg", 0.0, data_dir=tempfile.mkdtemp())
+
+    texts = ["gm", "how do i feed you?", "you're so cute", "when will you hatch",
+             "what are you?", "hey puff", "gm!!", "love this project"]
+    batch = [(MagicMock(id=n, text=text, author_id=f"user{n}"), handler.classify_interaction(text))
+             for n, text in enumerate(texts)]
+    replies = handler.generate_replies(batch)
+
+    assert len(replies) == 8 and all(replies)
+    batch_prompts = [p for p in prompts if "JSON array" in p]
+    assert len(batch_prompts) == 1
+    assert batch_prompts[0].count(stage_personality("egg", "reply")) == 1
+    assert len(re.findall(r'^\d+\. \[', batch_prompts[0], re.MULTILINE)) == 7  # "gm" and "gm!!" asked once
+    assert replies[0] == replies[6] == "batch reply 1 ✨"
+    print("✅ 8 mentions -> 1 batch call with the personality sent once (duplicates asked once)")
+
+    assert replies[2] == "single reply 🥚" and len(prompts) == 2
+    print("✅ Malformed entry fell back to a single-reply call")
+
+    single_chars = len(STAGE_PROMPTS["egg"]["personality"]) * len(texts)
+    print(f"✅ Prompt size: {len(batch_prompts[0]):,} chars batched vs ~{single_chars:,} chars one by one")
+
+    # A failed batch call falls back per item
+    model.generate_content.side_effect = [RuntimeError("timeout")] + [MagicMock(text="ok 🥚")] * 3
+    fallback = InteractionHandler(twitter, ai, "slime", 0.0, data_dir=tempfile.mkdtemp())
+    other = [(MagicMock(id=n, text=f"question {n}?", author_id="u"), "question") for n in range(3)]
+    assert fallback.generate_replies(other) == ["ok 🥚"] * 3
+    print("✅ Failed batch call falls back to one call per mention")
+
+    print("✨ Batched Reply Verification Complete!")
+
+if __name__ == "__main__":
+    verify_batch_replies()
@@ -0,0 +1,73 @@
+import sys
+import os
+import json
+import tempfile
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from benchmarks.runner import BENCHMARKS, measure, compare, save_results, load_results, RESULTS_VERSION
+from benchmarks import suite
+
+def result(median, minimum=None):
+    return {"median": median, "min": minimum or median}
+
+def results(cases, reference=1.0):
+    return {"version": RESULTS_VERSION, "environment": {"reference": reference, "machine": "x", "python": "3"},
+            "results": cases}
+
+def verify_benchmarks():
+    print("🧪 Verifying Benchmarks...")
+
+    timing = measure(lambda: sum(range(100)), warmup=1, repeat=5, min_time=0.01)
+    assert timing["number"] > 1 and timing["repeat"] == 5
+    assert 0 < timing["min"] <= timing["median"] and timing["ops"] > 0
+    print(f"✅ measure calibrates and samples ({timing['number']} calls x 5, {timing['median'] * 1e9:.0f} ns)")
+
+    baseline = results({"a": result(1.0), "b": result(1.0), "c": result(1.0), "d": result(1.0),
+                        "gone": result(1.0)})
+    current = results({"a": result(1.5), "b": result(0.5), "c": result(1.05),
+                       "d": result(1.5, minimum=1.0),  # one slow sample, fastest unchanged
+                       "new": result(1.0)})
+    status = {row["case"]: row["status"] for row in compare(baseline, current, threshold=0.10)}
+    assert status == {"a": "regressed", "b": "improved", "c": "same", "d": "same",
+                      "gone": "removed", "new": "new"}, status
+    print("✅ compare flags regressions, ignores noise, lists new and removed cases")
+
+    # A machine 50% slower across the board isn't a regression when normalized
+    slower = results({"a": result(1.5), "b": result(1.5)}, reference=1.5)
+    steady = results({"a": result(1.0), "b": result(1.0)})
+    assert {row["status"] for row in compare(steady, slower)} == {"regressed"}
+    assert {row["status"] for row in compare(steady, slower, normalize=True)} == {"same"}
+    print("✅ normalize corrects for machine speed with the reference workload")
+
+    # Hot paths from the request are all registered
+    for name in ["classify.interaction", "evolution.check", "evolution.progress", "prompts.generate_tweet",
+                 "prompts.generate_reply", "state.save", "state.load", "processed_tweets.save"]:
+        assert name in BENCHMARKS, name
+    assert BENCHMARKS["processed_tweets.save"]["params"] == [10_000, 100_000, 1_000_000]
+    print("✅ Every hot path has a benchmark")
+
+    # Quick run end to end, then gate against it
+    out_dir = tempfile.mkdtemp()
+    first, second = os.path.join(out_dir, "first.json"), os.path.join(out_dir, "second.json")
+    assert suite.main(["run", "--quick", "-k", "evolution", "-k", "processed_tweets.contains",
+                       "--repeat", "3", "--min-time", "0.005", "-o", first]) == 0
+    saved = load_results(first)
+    assert set(saved["results"]) == {"evolution.check", "evolution.progress",
+                                     "processed_tweets.contains[10000]", "processed_tweets.contains[100000]"}
+    assert saved["environment"]["reference"] > 0
+
+    # Same numbers 3x slower: compare fails the gate
+    for case in saved["results"].values():
+        case["median"] *= 3
+        case["min"] *= 3
+    save_results(saved, second)
+    assert suite.main(["compare", first, second]) == 1
+    assert suite.main(["compare", first, first]) == 0
+    print("✅ run writes JSON results and compare exits 1 on a regression")
+
+    print("\n✨ Benchmarks Verification Complete!")
+
+if __name__ == "__main__":
+    verify_benchmarks()
@@ -4,6 +4,7 @@ import os
 from unittest.mock import MagicMock, patch
 
 sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
 
 from integrations.twitter import TwitterClient
 from config.settings import settings
@@ -0,0 +1,143 @@
+
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import threading
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from core.fleet import FleetHost
+from integrations.twitter import TwitterClient
+from config.settings import settings
+
+def write_configs(config_dir, data_root):
+    for index, name in enumerate(["puff-a", "puff-b"]):
+        with open(os.path.join(config_dir, f"{name}.json"), "w") as f:
+            json.dump({
+                "wallet_address": f"0x{index + 1:040x}",
+                "data_dir": os.path.join(data_root, name),
+                "twitter": {
+                    "api_key": f"key-{name}",
+                    "api_secret": "secret",
+                    "access_token": "token",
+                    "access_secret": "secret"
+                }
+            }, f)
+
+rpc_methods = []
+
+def fake_batch(endpoint_uri, data, **kwargs):
+    batch = json.loads(data)
+    rpc_methods.append(batch[0]["method"])
+
+    results = {
+        "eth_getBalance": hex(10**15),
+        "eth_getBlockByNumber": {"timestamp": "0x0", "transactions": []},
+        "eth_getLogs": [],
+    }
+    return json.dumps([
+        {"jsonrpc": "2.0", "id": call["id"], "result": results[call["method"]]} for call in batch
+    ]).encode()
+
+def verify_fleet():
+    print("🧪 Verifying Fleet Mode...")
+
+    settings.DEV_MODE = True
+    settings.TWEET_INTERVAL_MINUTES = 1 / 60
+    settings.CHECK_MENTIONS_INTERVAL_MINUTES = 1 / 60
+    settings.CHECK_BALANCE_INTERVAL_MINUTES = 1 / 60
+
+    config_dir = tempfile.mkdtemp()
+    data_root = tempfile.mkdtemp()
+    settings.FLEET_DATA_DIR = data_root
+    write_configs(config_dir, data_root)
+
+    mock_w3 = MagicMock()
+    mock_w3.eth.block_number = 100
+    mock_w3.eth.get_balance.return_value = 0
+    mock_w3.from_wei.side_effect = lambda wei, unit: wei / 10**18
+
+    with patch('core.fleet.create_web3', return_value=mock_w3) as mock_create_web3, \
+         patch('core.fleet.create_model') as mock_create_model, \
+         patch('utils.rpc.post_json', side_effect=fake_batch), \
+         patch('tweepy.Client'), patch('tweepy.OAuth1UserHandler'), patch('tweepy.API'):
+
+        fleet = FleetHost(config_dir)
+        agents = fleet.build_agents()
+
+        assert [agent.name for agent in agents] == ["puff-a", "puff-b"]
+        print("✅ Loaded 2 agents from config directory")
+
+        mock_create_web3.assert_called_once()
+        mock_create_model.assert_called_once()
+        assert agents[0].wallet.w3 is agents[1].wallet.w3
+        assert agents[0].wallet.watcher is agents[1].wallet.watcher
+        assert agents[0].ai.model is agents[1].ai.model
+        assert agents[0].evolution is agents[1].evolution
+        assert agents[0].scanner is agents[1].scanner
+        assert agents[0].twitter.client.session.adapters["https://"] is \
+            agents[1].twitter.client.session.adapters["https://"]
+        print("✅ RPC provider, Gemini model and HTTP connection pool are shared")
+
+        assert agents[0].twitter.api_key == "key-puff-a"
+        assert agents[0].wallet.address != agents[1].wallet.address
+        assert agents[0].state_path != agents[1].state_path
+        assert agents[0].twitter.rate_limiter is not agents[1].twitter.rate_limiter
+        print("✅ Credentials, wallets and state paths stay per-agent")
+
+        stopper = threading.Timer(0.3, fleet.request_stop)
+        stopper.start()
+        asyncio.run(fleet.run())
+
+        assert [runtime.phase for runtime in fleet.runtimes] == [0.0, 0.5]
+        print("✅ Agents run with staggered phases")
+
+        assert rpc_methods.count("eth_getBalance") == 1
+        mock_w3.eth.get_balance.assert_not_called()
+        assert [agent.balance for agent in agents] == [0.001, 0.001]
+        assert [agent.balance_block for agent in agents] == [100, 100]
+        print("✅ Whole fleet's balances read in one JSON-RPC batch")
+
+        for agent in agents:
+            assert os.path.exists(agent.state_path)
+        print("✅ Each agent saved its own state on shutdown")
+
+    # A persona missing a key is rejected instead of borrowing the .env account's
+    os.environ["TWITTER_ACCESS_SECRET"] = "default-account-secret"
+    with open(os.path.join(config_dir, "puff-a.json")) as f:
+        config = json.load(f)
+    del config["twitter"]["access_secret"]
+    with open(os.path.join(config_dir, "puff-a.json"), "w") as f:
+        json.dump(config, f)
+    try:
+        FleetHost(config_dir)
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "access_secret" in str(e)
+    try:
+        TwitterClient(credentials=config["twitter"])
+        assert False, "expected ValueError"
+    except ValueError as e:
+        assert "access_secret" in str(e)
+    print("✅ Incomplete persona credentials are an error, never mixed with .env")
+
+    # FLEET_CONFIG_DIR makes the entry point host the fleet instead of one agent
+    import main
+    settings.FLEET_CONFIG_DIR = config_dir
+    try:
+        with patch.object(main, "run_fleet") as run_fleet, patch.object(main, "PolyPuffAgent") as single:
+            main.main()
+        run_fleet.assert_called_once()
+        single.assert_not_called()
+    finally:
+        settings.FLEET_CONFIG_DIR = ""
+    print("✅ main() starts the fleet when FLEET_CONFIG_DIR is set")
+
+    print("✨ Fleet Verification Complete!")
+
+if __name__ == "__main__":
+    verify_fleet()
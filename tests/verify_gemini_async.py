@@ -0,0 +1,117 @@
+
+import sys
+import os
+import time
+import asyncio
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from integrations.gemini_client import GeminiClient
+from integrations.interaction_handler import InteractionHandler
+from config.settings import settings
+
+class FakeAsyncModel:
+    """generate_content_async with configurable latency; tracks concurrency"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.cancelled = 0
+        self.calls = []
+
+    async def generate_content_async(self, prompt, generation_config=None, request_options=None):
+        self.calls.append(request_options)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return MagicMock(text='"gm from the async egg 🥚"')
+
+async def run_checks():
+    settings.GEMINI_MAX_CONCURRENCY = 4
+    model = FakeAsyncModel(latency=0.05)
+    client = GeminiClient(model=model)
+
+    tweet = await client.generate_tweet_async("egg", {"balance": 0.0, "time_of_day": "morning"})
+    assert tweet == "gm from the async egg 🥚" and client.tweet_history[-1] == tweet
+    assert model.calls[-1] == {"timeout": settings.GEMINI_TIMEOUT_SECONDS}
+    reply = await client.generate_reply_async("egg", 0.0, "gm", "greeting")
+    thanks = await client.generate_donation_thanks_async("slime", "0x" + "ab" * 20, 0.01)
+    replies = await client.generate_replies_async("egg", [{"text": "gm", "interaction_type": "greeting"}])
+    assert reply and thanks and len(replies) == 1
+    print("✅ Async tweet, reply and donation thanks generated with a per-call deadline")
+
+    started = time.perf_counter()
+    replies = await asyncio.gather(*[
+        client.generate_reply_async("egg", 0.0, f"gm #{n}", "greeting") for n in range(16)
+    ])
+    elapsed = time.perf_counter() - started
+    assert len(replies) == 16 and model.peak == 4
+    print(f"✅ 16 concurrent replies capped at 4 in flight ({elapsed:.2f}s)")
+
+    slow = GeminiClient(model=FakeAsyncModel(latency=5))
+    started = time.perf_counter()
+    try:
+        await slow.generate_tweet_async("egg", {}, timeout=0.1)
+        assert False, "should time out"
+    except asyncio.TimeoutError:
+        pass
+    assert time.perf_counter() - started < 0.5 and slow.model.cancelled == 1
+    print("✅ Hung request abandoned at its deadline and cancelled")
+
+    task = asyncio.create_task(slow.generate_reply_async("egg", 0.0, "hi", "greeting"))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    assert slow.model.cancelled == 2 and slow.model.in_flight == 0
+    print("✅ Cancelling the caller cancels the request")
+
+    # Blocking callers on other threads (runtime workers, the tweet buffer)
+    # are handed to the loop the runtime registered
+    client.loop = asyncio.get_running_loop()
+    model.peak = 0
+    threads = await asyncio.gather(*[
+        asyncio.to_thread(client.generate_tweet, "egg", {"tweet_count": n}) for n in range(8)
+    ])
+    assert len(threads) == 8 and model.peak == 4
+    handler = InteractionHandler(MagicMock(), client, "egg", 0.0)
+    assert await asyncio.to_thread(handler.runtime_loop) is client.loop
+    reply = await asyncio.to_thread(handler.generate_reply, "gm", "greeting", MagicMock(author_id="1"))
+    assert reply == "gm from the async egg 🥚"
+    calls = len(model.calls)
+    await asyncio.to_thread(handler.handle_donation_thanks, "0x" + "ab" * 20, 0.01)
+    assert len(model.calls) == calls + 1 and handler.twitter.post_tweet.called
+    assert client.runtime_loop() is None  # on the loop itself nothing is handed off
+    client.loop = None
+    print("✅ Blocking tweet, reply and thanks calls from worker threads run on the runtime loop")
+    return client
+
+def verify_gemini_async():
+    print("🧪 Verifying Async Gemini Client...")
+
+    sync_model = MagicMock()
+    sync_model.generate_content.return_value.text = "sync tweet ✨"
+    GeminiClient(model=sync_model).generate_tweet("egg", {})
+    assert sync_model.generate_content.call_args.kwargs["request_options"] == {"timeout": settings.GEMINI_TIMEOUT_SECONDS}
+    print("✅ Blocking calls carry a timeout too")
+
+    client = asyncio.run(run_checks())
+    for _ in range(3):
+        asyncio.run(client.generate_tweet_async("egg", {}))
+    assert len(client._semaphores) <= 1, len(client._semaphores)
+    print("✅ Concurrency caps of closed event loops are dropped")
+    print("✨ Async Gemini Verification Complete!")
+
+if __name__ == "__main__":
+    verify_gemini_async()
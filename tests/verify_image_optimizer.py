@@ -0,0 +1,73 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+from unittest.mock import MagicMock
+from PIL import Image
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from utils.image_optimizer import ImageOptimizer
+from integrations.twitter import TwitterClient
+from integrations.media_cache import MediaCache
+from utils.rate_limiter import RateLimiter
+from config.settings import settings
+
+def verify_image_optimizer():
+    print("🧪 Verifying Image Optimizer...")
+    settings.IMAGE_OPTIMIZE = True
+    settings.DEV_MODE = False
+
+    cache_dir = tempfile.mkdtemp()
+    optimizer = ImageOptimizer(cache_dir)
+    for name in ("egg", "slime", "beast", "sick"):
+        source = f"assets/{name}.png"
+        tweet = optimizer.optimize(source, "tweet")
+        profile = optimizer.optimize(source, "profile")
+        assert tweet != source and os.path.getsize(tweet) < os.path.getsize(source) / 4
+        with Image.open(profile) as image:
+            assert max(image.size) <= 400 and image.format in ("JPEG", "PNG")
+        print(f"✅ {name}.png {os.path.getsize(source) // 1024}KB -> tweet "
+              f"{os.path.getsize(tweet) // 1024}KB, profile {os.path.getsize(profile) // 1024}KB")
+
+    # Unchanged assets are never reprocessed, even by a new process
+    started = time.perf_counter()
+    again = ImageOptimizer(cache_dir)
+    assert again.optimize("assets/egg.png") == optimizer.optimize("assets/egg.png")
+    assert again.stats == {"hits": 1, "optimized": 0, "bytes_saved": 0}
+    print(f"✅ Cache hit after restart in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # Transparency keeps a lossless format, tiny files are left alone
+    work = tempfile.mkdtemp()
+    alpha = os.path.join(work, "alpha.png")
+    Image.new("RGBA", (2000, 1000), (255, 0, 0, 128)).save(alpha)
+    with Image.open(optimizer.optimize(alpha, "profile")) as image:
+        assert image.format == "PNG" and image.mode == "RGBA" and image.size == (400, 200)
+    broken = os.path.join(work, "broken.png")
+    with open(broken, "wb") as f:
+        f.write(b"not an image")
+    assert optimizer.optimize(broken) == broken
+    print("✅ Alpha stays PNG; unreadable files pass through unchanged")
+
+    # TwitterClient uploads the optimized file transparently
+    client = TwitterClient.__new__(TwitterClient)
+    client.client = MagicMock()
+    client.client.create_tweet.return_value = MagicMock(data={"id": "1"})
+    client.api_v1 = MagicMock()
+    client.api_v1.media_upload.return_value = MagicMock(media_id=7, expires_after_secs=86400)
+    client.rate_limiter = RateLimiter()
+    client.media_cache = MediaCache()
+    client.image_optimizer = optimizer
+    client._upload_locks = {}
+    assert client.post_tweet("gm", "assets/slime.png")
+    assert client.api_v1.media_upload.call_args.kwargs["filename"] == optimizer.optimize("assets/slime.png")
+    assert client.update_profile_image("assets/beast.png")
+    assert client.api_v1.update_profile_image.call_args.kwargs["filename"] == optimizer.optimize("assets/beast.png", "profile")
+    print("✅ Tweets and profile updates upload the optimized files")
+
+    print("✨ Image Optimizer Verification Complete!")
+
+if __name__ == "__main__":
+    verify_image_optimizer()
@@ -0,0 +1,161 @@
+import sys
+import os
+import contextlib
+import glob
+import gzip
+import io
+import json
+import logging
+import tempfile
+import threading
+import time
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from utils import logger as log_setup
+from utils import tracing
+from core.wallet import WalletManager
+from simulation.chain import FakeChain
+from simulation.backends import SIM_WALLET_ADDRESS
+
+def read_lines(path):
+    log_setup.flush()
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def verify_logging():
+    print("🧪 Verifying Logging...")
+
+    log_dir = tempfile.mkdtemp()
+    log_file = os.path.join(log_dir, "polypuff.jsonl")
+    log_setup.configure_logging(log_file, level="INFO", levels="", sampling="", console=False)
+    logger = logging.getLogger("PolyPuff")
+
+    # JSON lines with the module the call came from and any `extra` fields
+    logger.info("hello", extra={"mention_id": "123"})
+    entry = read_lines(log_file)[-1]
+    assert entry["message"] == "hello" and entry["level"] == "INFO"
+    assert entry["module"] == "tests.verify_logging", entry["module"]
+    assert entry["mention_id"] == "123" and "ts" in entry and "trace_id" not in entry
+    print("✅ JSON lines with module and extra fields")
+
+    # Lines logged inside a trace carry its ids
+    trace_dir = tempfile.mkdtemp()
+    tracing.configure(os.path.join(trace_dir, "traces.jsonl"))
+    with tracing.trace("tweet_cycle"):
+        with tracing.span("create_tweet"):
+            logger.warning("inside")
+    entry = read_lines(log_file)[-1]
+    spans = tracing.read_spans(os.path.join(trace_dir, "traces.jsonl"))
+    child = next(span for span in spans if span["name"] == "create_tweet")
+    assert entry["trace_id"] == child["trace_id"] and entry["span_id"] == child["span_id"]
+    tracing.configure()
+    print("✅ Lines inside a trace carry trace_id/span_id")
+
+    # Exceptions are kept
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    assert "ValueError: boom" in read_lines(log_file)[-1]["exception"]
+    print("✅ Tracebacks are logged")
+
+    # Per-module levels, by module path...
+    log_setup.configure_logging(log_file, level="INFO", levels="tests.verify_logging=WARNING", sampling="",
+                                console=False)
+    before = len(read_lines(log_file))
+    logger.info("quiet here")
+    logger.warning("loud here")
+    assert [entry["message"] for entry in read_lines(log_file)[before:]] == ["loud here"]
+
+    # ...or by logger name (third-party libraries)
+    log_setup.configure_logging(log_file, level="INFO", levels="noisy.lib=ERROR,debugged=DEBUG", sampling="",
+                                console=False)
+    before = len(read_lines(log_file))
+    logger.debug("default level")
+    logging.getLogger("noisy.lib.http").warning("library chatter")
+    logging.getLogger("debugged").debug("debug kept")
+    messages = [entry["message"] for entry in read_lines(log_file)[before:]]
+    assert messages == ["debug kept"], messages
+    assert logging.getLogger().level == logging.DEBUG  # lowest configured level
+    print("✅ Per-module levels")
+
+    # 1-in-N sampling per call site, never for warnings
+    log_setup.configure_logging(log_file, level="INFO", levels="", sampling="tests.verify_logging=10", console=False)
+    before = len(read_lines(log_file))
+    for n in range(100):
+        logger.info(f"tick {n}")
+    for n in range(5):
+        logger.warning(f"warn {n}")
+    entries = read_lines(log_file)[before:]
+    ticks = [entry for entry in entries if entry["message"].startswith("tick")]
+    assert [entry["message"] for entry in ticks] == [f"tick {n}" for n in range(0, 100, 10)]
+    assert all(entry["sampled"] == 10 for entry in ticks)
+    assert sum(entry["message"].startswith("warn") for entry in entries) == 5
+    print(f"✅ Sampling kept {len(ticks)}/100 info lines and every warning")
+
+    # The wallet logs instead of printing
+    log_setup.configure_logging(log_file, level="DEBUG", levels="", sampling="", console=False)
+    before = len(read_lines(log_file))
+    stdout = io.StringIO()
+    chain = FakeChain()
+    chain.start()
+    try:
+        with contextlib.redirect_stdout(stdout):
+            manager = WalletManager(SIM_WALLET_ADDRESS, w3=chain.web3())
+            manager.get_balance()
+            manager.get_balance()  # same head: served from the last reading
+    finally:
+        chain.stop()
+    assert stdout.getvalue() == "", stdout.getvalue()
+    entries = [entry for entry in read_lines(log_file)[before:] if entry["module"] == "core.wallet"]
+    assert any(entry["level"] == "DEBUG" and entry["message"].startswith("Checking address") for entry in entries)
+    assert any(entry["level"] == "DEBUG" and entry["message"].startswith("Balance in Wei") for entry in entries)
+    unchanged = [entry for entry in entries if entry["message"].startswith("No new block")]
+    assert unchanged and all(entry["level"] == "DEBUG" for entry in unchanged)
+    print(f"✅ WalletManager logs instead of printing ({len(entries)} lines)")
+
+    # Timed rotation gzips the old file
+    handler = log_setup.configure_logging(log_file, level="INFO", levels="", sampling="", console=False)
+    logger.info("before rollover")
+    log_setup.flush()
+    file_handler = handler.handlers[0]
+    file_handler.doRollover()
+    logger.info("after rollover")
+    assert [entry["message"] for entry in read_lines(log_file)] == ["after rollover"]
+    archives = glob.glob(os.path.join(log_dir, "polypuff.jsonl.*.gz"))
+    assert len(archives) == 1, archives
+    with gzip.open(archives[0], "rt", encoding="utf-8") as f:
+        assert json.loads(f.readlines()[-1])["message"] == "before rollover"
+    assert file_handler.when == "MIDNIGHT"
+    print(f"✅ Rotation gzips the old file ({os.path.basename(archives[0])})")
+
+    # A slow disk never blocks the caller - a full queue drops and counts
+    release = threading.Event()
+
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            release.wait(5)
+
+    background = log_setup.BackgroundHandler([SlowHandler()], queue_size=10)
+    slow = logging.getLogger("PolyPuff.slow")
+    slow.propagate = False
+    slow.addHandler(background)
+    started = time.perf_counter()
+    for n in range(1000):
+        slow.info(f"line {n}")
+    elapsed = time.perf_counter() - started
+    assert elapsed < 1.0, elapsed
+    assert 980 <= background.dropped < 1000, background.dropped
+    release.set()
+    slow.removeHandler(background)
+    background.close()
+    print(f"✅ 1000 lines in {elapsed * 1000:.1f}ms against a stalled handler ({background.dropped} dropped)")
+
+    log_setup.configure_logging()
+
+    print("\n✨ Logging Verification Complete!")
+
+if __name__ == "__main__":
+    verify_logging()
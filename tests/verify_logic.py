@@ -1,9 +1,11 @@
 import sys
 import os
+import tempfile
 from unittest.mock import MagicMock, patch
 
 # Add project root to path
 sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
 
 from core.agent import PolyPuffAgent
 from config.settings import settings
@@ -11,6 +13,9 @@ from config.settings import settings
 def verify_logic():
     print("🧪 Starting Logic Verification...")
     
+    # Generate on the posting path (tests/verify_tweet_buffer.py covers the buffer)
+    settings.TWEET_BUFFER_SIZE = 0
+    
     # Mock dependencies
     with patch('core.agent.TwitterClient') as MockTwitter, \
          patch('core.agent.GeminiClient') as MockGemini, \
@@ -26,6 +31,13 @@ def verify_logic():
         
         mock_wallet = MockWallet.return_value
         mock_wallet.get_balance.return_value = 0.0
+        mock_wallet.get_balance_reading.return_value = {
+            "balance": 0.0,
+            "balance_wei": 0,
+            "block_number": 1,
+            "cached": False
+        }
+        mock_wallet.watcher.blocks_behind.return_value = 0
         
         mock_evolution = MockEvolution.return_value
         mock_evolution.check_evolution.return_value = {
@@ -38,7 +50,8 @@ def verify_logic():
         
         # Initialize agent
         print("Initializing Agent...")
-        agent = PolyPuffAgent()
+        agent = PolyPuffAgent(data_dir=tempfile.mkdtemp())
+        agent.should_post_progress_update = lambda: False  # a fresh egg posts one 20% of the time
         
         # Test think_and_tweet
         print("Testing think_and_tweet()...")
@@ -0,0 +1,111 @@
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+from unittest.mock import MagicMock
+from PIL import Image
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from integrations.twitter import TwitterClient
+from integrations.media_cache import MediaCache
+from utils.image_optimizer import ImageOptimizer
+from utils.rate_limiter import RateLimiter
+from config.settings import settings
+
+UPLOAD_LATENCY = 0.1
+
+IMAGE_CACHE = tempfile.mkdtemp()
+
+def make_client(cache_path):
+    uploads = []
+    lock = threading.Lock()
+
+    def media_upload(filename):
+        time.sleep(UPLOAD_LATENCY)
+        with lock:
+            uploads.append(filename)
+            return MagicMock(media_id=len(uploads), expires_after_secs=86400)
+
+    client = TwitterClient.__new__(TwitterClient)
+    client.client = MagicMock()
+    client.client.create_tweet.return_value = MagicMock(data={"id": "1"})
+    client.api_v1 = MagicMock()
+    client.api_v1.media_upload.side_effect = media_upload
+    client.rate_limiter = RateLimiter()
+    client.media_cache = MediaCache(cache_path)
+    client.image_optimizer = ImageOptimizer(IMAGE_CACHE)
+    client._upload_locks = {}
+    return client, uploads
+
+def verify_media_cache():
+    print("🧪 Verifying Media Cache...")
+    settings.DEV_MODE = False
+
+    assets = tempfile.mkdtemp()
+    images = []
+    for name in ("egg", "slime", "beast", "sick"):
+        images.append(os.path.join(assets, f"{name}.png"))
+        shutil.copy(f"assets/{name}.png", images[-1])
+    cache_path = os.path.join(tempfile.mkdtemp(), "media_cache.json")
+
+    client, uploads = make_client(cache_path)
+    for image in images:
+        client.image_optimizer.optimize(image)  # time the uploads only
+    started = time.perf_counter()
+    assert client.preload_media(images) == 4
+    took = time.perf_counter() - started
+    assert took < UPLOAD_LATENCY * 3
+    print(f"✅ 4 stage images pre-uploaded in parallel in {took:.2f}s ({UPLOAD_LATENCY}s each)")
+
+    for n in range(10):
+        assert client.post_tweet(f"tweet {n}", images[0])
+    assert len(uploads) == 4
+    assert client.client.create_tweet.call_args.kwargs["media_ids"] == [uploads.index(client.image_optimizer.optimize(images[0])) + 1]
+    print("✅ 10 tweets with the egg image -> 0 extra uploads")
+
+    # Restart: unexpired IDs are reused from disk
+    restarted, restarted_uploads = make_client(cache_path)
+    assert restarted.preload_media(images) == 0 and restarted.post_tweet("back", images[1])
+    assert restarted_uploads == []
+    print("✅ Media IDs survive a restart")
+
+    # Same content under another name shares the upload; changed content doesn't
+    copy = os.path.join(assets, "egg-copy.png")
+    shutil.copy(images[0], copy)
+    assert client.upload_media(copy) == client.upload_media(images[0]) and len(uploads) == 4
+    with Image.open(images[0]) as image:
+        image.rotate(90).save(images[0])
+    client.upload_media(images[0])
+    assert len(uploads) == 5
+    print("✅ Keyed by content hash (copies reuse, edits re-upload)")
+
+    # About to expire: re-uploaded in the background, not while posting
+    margin = settings.MEDIA_REFRESH_MARGIN_MINUTES * 60
+    beast = client.image_optimizer.optimize(images[2])
+    client.media_cache.put(beast, 99, expires_after=margin - 1)
+    assert client.media_cache.get(beast) is None
+    client.preload_media(images, wait=False)
+    deadline = time.time() + 3
+    while client.media_cache.get(beast) is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert client.media_cache.get(beast) not in (None, 99) and len(uploads) == 6
+    print("✅ Media ID close to expiry refreshed ahead of time")
+
+    # Concurrent posts of a new image upload it once
+    fresh, fresh_uploads = make_client(None)
+    threads = [threading.Thread(target=fresh.post_tweet, args=(f"t{n}", images[3])) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(fresh_uploads) == 1
+    print("✅ Concurrent posts share one upload")
+
+    print("✨ Media Cache Verification Complete!")
+
+if __name__ == "__main__":
+    verify_media_cache()
@@ -0,0 +1,161 @@
+
+import sys
+import os
+import itertools
+import tempfile
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from integrations.twitter import TwitterClient
+from integrations.interaction_handler import InteractionHandler
+from core.mention_store import MentionStore
+from utils.rate_limiter import RateLimiter
+from config.settings import settings
+
+class FakeMentionsAPI:
+    """
+    get_users_mentions over a list of tweet IDs: newest first, paged,
+    honoring since_id and until_id
+    """
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.calls = []
+
+    def __call__(self, id, since_id=None, until_id=None, max_results=100, pagination_token=None, **kwargs):
+        self.calls.append({"since_id": since_id, "until_id": until_id, "pagination_token": pagination_token})
+        newer = sorted((i for i in self.ids if (since_id is None or i > int(since_id))
+                        and (until_id is None or i < int(until_id))), reverse=True)
+        offset = int(pagination_token or 0)
+        page = newer[offset:offset + max_results]
+
+        response = MagicMock()
+        response.data = [MagicMock(id=i, text=f"hi puff #{i}", author_id="user") for i in page] or None
+        response.meta = {"next_token": str(offset + max_results)} if offset + max_results < len(newer) else {}
+        return response
+
+def make_client(api):
+    client = TwitterClient.__new__(TwitterClient)
+    client.client = MagicMock()
+    client.client.get_users_mentions.side_effect = api
+    client._user_id = 1
+    client.rate_limiter = RateLimiter()
+    return client
+
+def verify_mention_ingestion():
+    print("🧪 Verifying Mention Ingestion...")
+    settings.MENTION_PAGE_BUDGET = 5
+
+    # First run: only the newest page
+    api = FakeMentionsAPI(list(range(1000, 1250)))
+    client = make_client(api)
+    mentions = client.get_recent_mentions()
+    assert len(api.calls) == 1 and len(mentions) == 100
+    print("✅ First run reads one page")
+
+    # A spike of 250 new mentions arrives in three pages, oldest first
+    api.calls.clear()
+    mentions = client.get_recent_mentions(since_id="999")
+    assert len(api.calls) == 3
+    assert [m.id for m in mentions] == list(range(1000, 1250))
+    print("✅ 250 mentions after since_id fetched across 3 pages, oldest first")
+
+    api.calls.clear()
+    assert client.get_recent_mentions(since_id="1249") == []
+    assert len(api.calls) == 1
+    print("✅ Quiet period costs one empty request")
+
+    api.calls.clear()
+    assert len(client.get_recent_mentions(since_id="999", max_pages=2)) == 200
+    assert len(api.calls) == 2
+    print("✅ Page budget respected")
+
+    # Handler resumes from its since_id
+    settings.DEV_MODE = True
+    mock_ai = MagicMock()
+    mock_ai.model.generate_content.return_value.text = "hi!"
+    handler = InteractionHandler(client, mock_ai, "egg", 0.0, data_dir=tempfile.mkdtemp())
+    handler.processed_tweets.add(1244)
+    handler.processed_tweets.advance(1244)
+
+    api.calls.clear()
+    handler.check_and_respond_to_mentions()
+    assert api.calls[0]["since_id"] == "1244"
+    assert handler.processed_tweets.since_id == "1249"
+    print("✅ Handler resumes from since_id and replies to the 5 newer mentions in order")
+
+    # A failed reply holds since_id back until it goes through
+    settings.MENTION_MAX_ATTEMPTS = 2
+    api.ids = [2000, 2001, 2002]
+    handler = InteractionHandler(client, mock_ai, "egg", 0.0, data_dir=tempfile.mkdtemp())
+    handler.processed_tweets.advance(1999)
+    handler.pipeline.post_interval = 0
+    original_post = handler.post_reply
+    failing = {2001}
+    handler.post_reply = lambda mention, reply: False if mention.id in failing else original_post(mention, reply)
+
+    handler.check_and_respond_to_mentions()
+    assert 2000 in handler.processed_tweets and 2002 in handler.processed_tweets
+    assert 2001 not in handler.processed_tweets
+    assert handler.processed_tweets.since_id == "2000"
+    assert MentionStore(handler.data_dir).since_id == "2000"
+
+    api.calls.clear()
+    failing.clear()
+    handler.check_and_respond_to_mentions()
+    assert api.calls[0]["since_id"] == "2000"
+    assert 2001 in handler.processed_tweets and handler.processed_tweets.since_id == "2002"
+    print("✅ A failed middle reply is fetched again; since_id waits for it")
+
+    # Mentions past MAX_REPLIES_PER_CHECK are picked up next check
+    api.ids = list(range(3000, 3005))
+    handler.processed_tweets.advance(2999)
+    settings.MAX_REPLIES_PER_CHECK = 2
+    handler.check_and_respond_to_mentions()
+    assert handler.processed_tweets.since_id == "3001"
+    handler.check_and_respond_to_mentions()
+    handler.check_and_respond_to_mentions()
+    assert handler.processed_tweets.since_id == "3004"
+    assert all(n in handler.processed_tweets for n in range(3000, 3005))
+    settings.MAX_REPLIES_PER_CHECK = 100
+    print("✅ Mentions cut off by MAX_REPLIES_PER_CHECK aren't skipped")
+
+    # A reply that keeps failing is given up on after MENTION_MAX_ATTEMPTS checks
+    api.ids = [4000, 4001]
+    handler.processed_tweets.advance(3999)
+    failing.add(4000)
+    handler.check_and_respond_to_mentions()
+    assert handler.processed_tweets.since_id == "3999"
+    handler.check_and_respond_to_mentions()
+    assert handler.processed_tweets.since_id == "4001" and handler.reply_attempts == {}
+    print("✅ A reply that keeps failing stops holding since_id back")
+
+    # A spike bigger than the page budget: the older end is read next check, nothing is skipped
+    failing.clear()
+    settings.MENTION_PAGE_BUDGET = 2
+    reply_numbers = itertools.count()
+    api.ids = list(range(5000, 5300))
+    handler = InteractionHandler(client, mock_ai, "egg", 0.0, data_dir=tempfile.mkdtemp())
+    handler.processed_tweets.advance(4999)
+    handler.pipeline.post_interval = 0
+    handler.reply_cache.claim = lambda reply, author=None: f"{reply} {next(reply_numbers)}"  # 300 distinct texts
+    api.calls.clear()
+    handler.check_and_respond_to_mentions()
+    assert client.mentions_cut_off and handler.processed_tweets.since_id == "4999"
+    assert handler.processed_tweets.backlog_until == "5100"
+    assert MentionStore(handler.data_dir).backlog_until == "5100"
+    handler.check_and_respond_to_mentions()
+    assert api.calls[-1]["since_id"] == "4999" and api.calls[-1]["until_id"] == "5100"
+    for _ in range(3):
+        handler.check_and_respond_to_mentions()
+    assert all(n in handler.processed_tweets for n in range(5000, 5300))
+    assert handler.processed_tweets.since_id == "5299" and handler.processed_tweets.backlog_until is None
+    settings.MENTION_PAGE_BUDGET = 5
+    print("✅ 300 mentions with a 2-page budget: the older end is fetched next check, none lost")
+
+    print("✨ Mention Ingestion Verification Complete!")
+
+if __name__ == "__main__":
+    verify_mention_ingestion()
@@ -0,0 +1,68 @@
+
+import sys
+import os
+import json
+import time
+import tempfile
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from core.mention_store import MentionStore, BloomFilter
+from config.settings import settings
+
+def verify_mention_store():
+    print("🧪 Verifying Mention Store...")
+
+    data_dir = tempfile.mkdtemp()
+    with open(os.path.join(data_dir, "processed_tweets.json"), "w") as f:
+        json.dump({"tweet_ids": ["100", "101"]}, f)
+
+    store = MentionStore(data_dir)
+    assert "100" in store and 101 in store and "102" not in store
+    assert store.since_id == "101"
+    print("✅ Legacy processed_tweets.json migrated")
+
+    store.add(105)
+    store.add("104")
+    assert store.since_id == "101"  # replies alone don't move the fetch cursor
+    store.advance(105)
+    store.advance(103)
+    reloaded = MentionStore(data_dir)
+    assert "104" in reloaded and "105" in reloaded and reloaded.since_id == "105"
+    print("✅ Appended IDs and since_id survive a restart")
+
+    # Age everything out of the window
+    for tweet_id in reloaded.recent:
+        reloaded.recent[tweet_id] = time.time() - settings.MENTION_RETENTION_HOURS * 3600 - 1
+    reloaded.evict()
+    reloaded.compact()
+    assert len(reloaded) == 0 and reloaded.floor == 105
+    assert "103" in reloaded and "106" not in reloaded
+    print("✅ Old IDs evicted; the floor still marks them processed")
+
+    started = time.perf_counter()
+    for tweet_id in range(1_000_000, 1_050_000):
+        reloaded.add(tweet_id)
+    per_add = (time.perf_counter() - started) * 1e6 / 50_000
+    with open(reloaded.log_path) as f:
+        lines = sum(1 for _ in f)
+    assert lines <= 2 * len(reloaded)
+    print(f"✅ {per_add:.1f} µs per add; log compacted to {lines:,} lines")
+
+    started = time.perf_counter()
+    MentionStore(data_dir)
+    print(f"✅ Reloaded {len(reloaded):,} live IDs in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    bloom = BloomFilter(100_000, 0.001)
+    for n in range(100_000):
+        bloom.add(str(n))
+    assert all(str(n) in bloom for n in range(100_000))
+    false_positives = sum(str(n) in bloom for n in range(100_000, 200_000))
+    assert false_positives < 300
+    print(f"✅ Bloom filter: no false negatives, {false_positives / 1000:.2f}% false positives")
+
+    print("✨ Mention Store Verification Complete!")
+
+if __name__ == "__main__":
+    verify_mention_store()
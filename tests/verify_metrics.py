@@ -0,0 +1,141 @@
+import sys
+import os
+import socket
+import urllib.request
+from unittest.mock import patch
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from utils import metrics
+from utils.retry import retry
+from simulation.harness import Simulation
+
+def verify_metrics():
+    print("🧪 Verifying Metrics...")
+
+    # Text format: counters, gauges and cumulative histogram buckets
+    registry = metrics.Registry()
+    counter = metrics.Counter("test_calls_total", "Calls", ["kind"], registry=registry)
+    counter.inc(kind="a")
+    counter.inc(2, kind='say "hi"')
+    gauge = metrics.Gauge("test_depth", "Depth", registry=registry)
+    gauge.set(3.5)
+    histogram = metrics.Histogram("test_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    text = registry.render()
+    assert "# TYPE test_calls_total counter" in text
+    assert 'test_calls_total{kind="a"} 1' in text
+    assert 'test_calls_total{kind="say \\"hi\\""} 2' in text
+    assert "test_depth 3.5" in text
+    assert 'test_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_seconds_bucket{le="1"} 2' in text
+    assert 'test_seconds_bucket{le="+Inf"} 3' in text
+    assert "test_seconds_count 3" in text
+    try:
+        counter.inc(wrong="label")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Counters, gauges and histograms render in Prometheus text format")
+
+    # timed() counts failures by exception type and still records latency
+    try:
+        with metrics.timed("test", "boom"):
+            raise TimeoutError("slow")
+    except TimeoutError:
+        pass
+    assert metrics.CALL_ERRORS.get(service="test", operation="boom", error="TimeoutError") == 1
+    assert metrics.CALL_SECONDS.get(service="test", operation="boom")[-1] == 1
+    print("✅ Timed calls record latency and errors by type")
+
+    # @retry reports retries and give-ups
+    attempts = []
+
+    @retry(max_attempts=3, delay=0)
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("flaky")
+        return "ok"
+
+    @retry(max_attempts=2, delay=0)
+    def broken():
+        raise ConnectionError("down")
+
+    assert flaky() == "ok"
+    try:
+        broken()
+    except ConnectionError:
+        pass
+    assert metrics.RETRIES.get(function="flaky") == 2
+    assert metrics.RETRIES.get(function="broken") == 1
+    assert metrics.RETRIES_EXHAUSTED.get(function="broken") == 1
+    print("✅ Retries and exhausted retries are counted per function")
+
+    # A simulated agent: every external call shows up, and the endpoint serves it
+    simulation = Simulation(gemini_latency=0.0)
+    server = metrics.start_server(0)
+    try:
+        simulation.run([("flood_mentions", {"count": 10}), ("check_mentions", {}),
+                        ("donate", {"count": 1, "amount": 0.001}), ("check_wallet", {}), ("tweet", {})])
+        simulation.run([("outage", {"service": "gemini"}), ("tweet", {})])
+
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            text = response.read().decode("utf-8")
+
+        for service, operation in [("twitter", "get_users_mentions"), ("twitter", "create_reply"),
+                                   ("twitter", "create_tweet"), ("gemini", "generate_replies"),
+                                   ("gemini", "generate_tweet"), ("rpc", "eth_blockNumber"), ("rpc", "batch")]:
+            assert f'polypuff_external_call_seconds_count{{service="{service}",operation="{operation}"}}' in text, \
+                (service, operation)
+        assert 'polypuff_external_call_errors_total{service="gemini",operation="generate_tweet",' \
+               'error="ServiceUnavailable"}' in text
+        assert 'polypuff_stage{agent="SimPuff",stage="egg"} 1' in text
+        assert 'polypuff_balance_eth{agent="SimPuff"} 0.001' in text
+        assert 'polypuff_reply_queue_depth{agent="SimPuff",queue="generate"} 0' in text
+        assert 'polypuff_processed_mentions{agent="SimPuff"} 11' in text
+        assert "polypuff_prompt_input_tokens_total" in text
+        limits = simulation.agent.twitter.rate_limiter.remaining()
+        assert f'polypuff_rate_limit_remaining{{agent="SimPuff",endpoint="create_tweet"}} ' \
+               f'{limits["create_tweet"]["remaining"]}' in text
+        assert 'polypuff_rate_limit_limit{agent="SimPuff",endpoint="get_users_mentions"}' in text
+        assert 'polypuff_rate_limit_wait_seconds_total{agent="SimPuff",endpoint="media_upload"} 0' in text
+        print("✅ Twitter, Gemini and RPC calls plus agent and rate-limit gauges served on /metrics")
+
+        try:
+            urllib.request.urlopen(url.replace("/metrics", "/nope"))
+            assert False, "expected 404"
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+    finally:
+        server.shutdown()
+        simulation.close()
+
+    # METRICS_PORT makes the entry point serve /metrics
+    import main
+    from config.settings import settings
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    servers, start_server = [], metrics.start_server
+    settings.METRICS_PORT, settings.FLEET_CONFIG_DIR = port, "fleet"
+    try:
+        with patch.object(main.metrics, "start_server", side_effect=lambda *a: servers.append(start_server(*a))), \
+             patch.object(main, "run_fleet"):
+            main.main()
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert b"polypuff_external_call_seconds" in response.read()
+    finally:
+        settings.METRICS_PORT, settings.FLEET_CONFIG_DIR = 0, ""
+        for started in servers:
+            started.shutdown()
+    print(f"✅ main() serves /metrics on METRICS_PORT ({port})")
+
+    print("\n✨ Metrics Verification Complete!")
+
+if __name__ == "__main__":
+    verify_metrics()
@@ -0,0 +1,111 @@
+import sys
+import os
+import asyncio
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+import google.generativeai as genai
+from utils.prompt_templates import PromptTemplate, Prompt, estimate_tokens, PROMPT_STATS
+from integrations.gemini_client import (GeminiClient, build_reply_prompt, build_donation_thanks_prompt,
+                                        stage_personality, stage_model, reply_prompt)
+from integrations.interaction_handler import InteractionHandler
+from simulation.gemini import FakeGenerativeModel, FakeStageModel
+from config.prompts import STAGE_PROMPTS
+from config.settings import settings
+
+def verify_prompt_templates():
+    print("🧪 Verifying Prompt Templates...")
+
+    assert estimate_tokens("") == 0 and estimate_tokens("abcd") == 1 and estimate_tokens("abcde") == 2
+    assert estimate_tokens("🥚✨") == 2
+    template = PromptTemplate("Stage: {stage}\nBalance: {balance:.4f} ETH\n{{json}}", stage="egg")
+    assert template.fields == {"balance"}
+    text, tokens = template.render({"balance": 0.5})
+    assert text == "Stage: egg\nBalance: 0.5000 ETH\n{json}"
+    assert abs(tokens - estimate_tokens(text)) <= 2
+    print("✅ Templates are compiled once with fixed fields baked in")
+
+    # Budget: optional sections go first (lowest drop order), then the truncatable field
+    prompt = Prompt([("head", "Reply to: {text}\n", None, None),
+                     ("note", "Note: {note}\n", 1, "note"),
+                     ("status", "Status: {status}\n", 2, None)], truncatable="text")
+    values = {"text": "hello " * 20, "note": "returning donor " * 10, "status": "ok"}
+    full = prompt.render(values)
+    assert not full["dropped"] and full["tokens"] > 60
+    trimmed = prompt.render(values, budget=40)
+    assert trimmed["dropped"] == ["note"] and not trimmed["truncated"] and trimmed["tokens"] <= 40
+    tight = prompt.render(values, budget=12)
+    assert tight["dropped"] == ["note", "status"] and tight["truncated"] and tight["tokens"] <= 12
+    assert tight["text"].startswith("Reply to: hello") and "…" in tight["text"]
+    assert "Note:" not in prompt.render({"text": "hi", "note": "", "status": "ok"})["text"]
+    assert Prompt([("rules", "x" * 400, None, None)]).render({}, budget=10)["over_budget"]
+    print("✅ Over budget: optional context dropped first, then the mention truncated")
+
+    # Replies leave out the tweet-variety examples
+    for stage in STAGE_PROMPTS:
+        core = stage_personality(stage, "reply")
+        assert "TWEET VARIETY" not in core and core.startswith("You are PolyPuff")
+        assert estimate_tokens(core) < estimate_tokens(stage_personality(stage))
+    assert reply_prompt("egg", "greeting") is reply_prompt("egg", "greeting")
+    assert reply_prompt("egg", "unknown") is not None
+    print("✅ Reply personality is the core without tweet examples; templates are cached per (stage, type)")
+
+    inline = build_reply_prompt("slime", 0.002, "when do you hatch?", "evolution_inquiry")
+    system = build_reply_prompt("slime", 0.002, "when do you hatch?", "evolution_inquiry", system=True)
+    assert stage_personality("slime", "reply") in inline["text"]
+    assert "You are PolyPuff" not in system["text"] and "Balance: 0.0020 ETH" in system["text"]
+    assert system["system"] and system["kind"] == "reply" and system["tokens"] == inline["tokens"]
+    long_mention = build_reply_prompt("egg", 0.0, "please " * 2000, "question")
+    assert long_mention["truncated"] and long_mention["tokens"] <= settings.GEMINI_INPUT_TOKEN_BUDGET
+    print(f"✅ Reply prompt ~{inline['tokens']} tokens; a 14k-char mention is cut to the "
+          f"{settings.GEMINI_INPUT_TOKEN_BUDGET}-token budget")
+
+    # Personality travels as the system instruction on a cached stage handle
+    model = FakeGenerativeModel(latency=0)
+    client = GeminiClient(model=model)
+    assert client.uses_system_instruction
+    tweet = client.build_tweet_prompt("egg", {"balance": 0.001})
+    assert "You are PolyPuff" not in tweet["text"] and "Balance: 0.0010 ETH" in tweet["text"]
+    handle = client.model_for(tweet)
+    assert isinstance(handle, FakeStageModel) and handle.system_instruction == STAGE_PROMPTS["egg"]["personality"]
+    assert client.model_for(tweet) is handle
+    assert GeminiClient(model=model).model_for(tweet) is handle  # shared by clients on the same model
+    client.generate_tweet("egg", {"balance": 0.001})
+    asyncio.run(client.generate_reply_async("egg", 0.0, "gm", "greeting"))
+    assert model.stats["calls"] == 2
+    print("✅ Personality sent as a system instruction on one shared handle per stage")
+
+    real = genai.GenerativeModel("gemini-1.5-flash")
+    real_client = GeminiClient(model=real)
+    assert real_client.uses_system_instruction
+    sdk_handle = stage_model(real, "beast", "reply")
+    assert sdk_handle.model_name == real.model_name
+    assert "EVOLVED" in sdk_handle._system_instruction.parts[0].text
+    print("✅ SDK models get a GenerativeModel per stage with system_instruction")
+
+    # Test doubles and disabled setting keep the personality inline
+    assert not GeminiClient(model=MagicMock()).uses_system_instruction
+    settings.GEMINI_SYSTEM_INSTRUCTION = False
+    try:
+        assert not GeminiClient(model=model).uses_system_instruction
+    finally:
+        settings.GEMINI_SYSTEM_INSTRUCTION = True
+    mock_ai = MagicMock()
+    mock_ai.model.generate_content.return_value.text = "hi 🥚"
+    handler = InteractionHandler(MagicMock(), mock_ai, "egg", 0.0)
+    assert handler.request_reply(build_reply_prompt("egg", 0.0, "gm", "greeting")) == "hi 🥚"
+    sent = mock_ai.model.generate_content.call_args.args[0]
+    assert stage_personality("egg", "reply") in sent
+    thanks = build_donation_thanks_prompt("egg", "0x" + "ab" * 20, 0.01)
+    assert "0.0100 ETH" in thanks["text"] and "0xabababab..." in thanks["text"]
+    print("✅ Without stage handles the personality stays in the prompt")
+
+    assert PROMPT_STATS["prompts"] > 0 and PROMPT_STATS["trimmed"] >= 1
+    print(f"✅ Prompt stats: {PROMPT_STATS}")
+
+    print("\n✨ Prompt Template Verification Complete!")
+
+if __name__ == "__main__":
+    verify_prompt_templates()
@@ -0,0 +1,88 @@
+
+import sys
+import os
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+import requests
+from utils.rate_limiter import RateLimiter, TokenBucket, endpoint_for
+from integrations.twitter import TwitterClient
+
+class FakeTwitter(BaseHTTPRequestHandler):
+    """Answers every request with rate-limit headers: 2 left, reset in 1s"""
+
+    def do_GET(self):
+        status = 429 if self.path.endswith("/mentions") else 200
+        self.send_response(status)
+        self.send_header("x-rate-limit-limit", "75")
+        self.send_header("x-rate-limit-remaining", "2")
+        self.send_header("x-rate-limit-reset", str(int(time.time()) + 1))
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+def verify_rate_limiter():
+    print("🧪 Verifying Rate Limiter...")
+
+    assert endpoint_for("POST", "https://api.twitter.com/2/tweets") == "create_tweet"
+    assert endpoint_for("GET", "https://api.twitter.com/2/users/42/mentions") == "get_users_mentions"
+    assert endpoint_for("POST", "https://upload.twitter.com/1.1/media/upload.json") == "media_upload"
+    assert endpoint_for("GET", "https://api.twitter.com/2/users/me") == "get_me"
+    print("✅ Requests mapped to endpoints")
+
+    # Local bucket: 4 requests per second
+    limiter = RateLimiter({"create_tweet": (4, 1.0)})
+    started = time.perf_counter()
+    for _ in range(6):
+        limiter.acquire("create_tweet")
+    elapsed = time.perf_counter() - started
+    assert 0.4 <= elapsed < 0.8, elapsed
+    print(f"✅ Burst of 6 on a 4/s bucket took {elapsed:.2f}s (waits only for the missing tokens)")
+
+    # Headers from a real HTTP round trip
+    server = HTTPServer(("127.0.0.1", 0), FakeTwitter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    limiter = RateLimiter()
+    session = requests.Session()
+    limiter.install(session)
+
+    session.get(f"{base}/2/users/me")
+    quota = limiter.remaining()["get_me"]
+    assert quota["remaining"] == 2 and quota["limit"] == 75
+    print("✅ x-rate-limit-* headers update the bucket")
+
+    session.get(f"{base}/2/users/42/mentions")
+    assert limiter.remaining()["get_users_mentions"]["remaining"] == 0
+    started = time.perf_counter()
+    limiter.acquire("get_users_mentions")
+    waited = time.perf_counter() - started
+    assert waited > 0
+    print(f"✅ After a 429 the caller waited {waited:.2f}s for the reset instead of failing")
+    server.shutdown()
+
+    bucket = TokenBucket(10, 10)
+    bucket.update(0, time.time() + 0.2)
+    assert bucket.try_acquire() > 0
+    time.sleep(0.25)
+    assert bucket.try_acquire() == 0 and int(bucket.tokens) == 9
+    print("✅ Bucket refills to the full limit when the API window resets")
+
+    client = TwitterClient(credentials={"api_key": "k", "api_secret": "s",
+                                        "access_token": "t", "access_secret": "a"})
+    assert client.rate_limiter.on_response in client.client.session.hooks["response"]
+    assert client.api_v1.session is client.client.session
+    print("✅ TwitterClient installs its limiter on the v1 and v2 sessions")
+
+    print("✨ Rate Limiter Verification Complete!")
+
+if __name__ == "__main__":
+    verify_rate_limiter()
@@ -0,0 +1,110 @@
+
+import sys
+import os
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from integrations.reply_cache import ReplyCache, normalize_mention
+from integrations.interaction_handler import InteractionHandler
+from integrations.reply_pipeline import ReplyPipeline
+
+def verify_reply_cache():
+    print("🧪 Verifying Reply Cache...")
+
+    assert normalize_mention("@PolyPuff GM!!! https://t.co/x") == "gm"
+    assert normalize_mention("hiiiii puff") == normalize_mention("Hi Puff.")
+    print("✅ Mentions normalized (handles, links, punctuation, stretched letters)")
+
+    # Single flight: 20 concurrent identical requests share one call
+    cache = ReplyCache(max_size=10, ttl=60, variants=3)
+    calls = []
+    lock = threading.Lock()
+
+    def slow_generate():
+        with lock:
+            calls.append(1)
+            n = len(calls)
+        time.sleep(0.1)
+        return f"reply {n}"
+
+    key = ReplyCache.make_key("egg", "greeting", "gm")
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        replies = list(executor.map(lambda _: cache.get_or_generate(key, slow_generate), range(20)))
+    assert len(calls) == 1 and set(replies) == {"reply 1"}
+    print(f"✅ 20 concurrent identical prompts -> 1 Gemini call ({cache.stats['coalesced']} coalesced)")
+
+    # Pool fills to 3 variants, then every request is a hit
+    for author in range(100):
+        cache.get_or_generate(key, slow_generate, author=f"user{author}")
+    assert len(calls) == 3 and cache.stats["hits"] == 98
+    seen = {cache.get_or_generate(key, slow_generate, author=f"user{n}") for n in range(30)}
+    assert len(seen) == 3
+    assert cache.get_or_generate(key, slow_generate, author="user7") == \
+        cache.get_or_generate(key, slow_generate, author="user7")
+    print("✅ 3 variants generated, then reused; each author consistently gets one")
+
+    # Failures propagate and are not cached
+    def broken():
+        raise RuntimeError("gemini down")
+    other = ReplyCache.make_key("egg", "question", "why")
+    try:
+        cache.get_or_generate(other, broken)
+        assert False
+    except RuntimeError:
+        pass
+    assert cache.get_or_generate(other, lambda: "ok") == "ok"
+    print("✅ Errors are not cached")
+
+    # TTL and LRU
+    short = ReplyCache(max_size=2, ttl=0.05, variants=1)
+    short.get_or_generate("a", lambda: "first")
+    time.sleep(0.06)
+    assert short.get_or_generate("a", lambda: "second") == "second"
+    short.get_or_generate("b", lambda: "b")
+    short.get_or_generate("c", lambda: "c")
+    assert len(short) == 2 and "a" not in short._entries
+    print("✅ Entries expire after the TTL and the least recently used is evicted")
+
+    # A reply text is only handed out once per duplicate window
+    claims = ReplyCache()
+    texts = [claims.claim("gm fren 🥚", author=f"user{n}") for n in range(50)]
+    assert texts[0] == "gm fren 🥚" and len(set(texts)) == 50
+    assert all("gm fren 🥚" in text for text in texts)
+    assert claims.claim("gm fren 🥚", author="user3") not in texts
+    claims.release(texts[7])
+    assert claims.claim("gm fren 🥚", author="user7") == texts[7]  # a reply that wasn't posted frees its wording
+    long_reply = "x" * 280
+    assert claims.claim(long_reply) == long_reply and len(claims.claim(long_reply, author="b")) <= 280
+    tiny = ReplyCache()
+    for _ in range(100):
+        tiny.claim("hi")
+    assert tiny.claim("hi") is None
+    tiny.duplicate_window = 0
+    time.sleep(0.01)
+    assert tiny.claim("hi") == "hi"
+    print(f"✅ Repeated replies get a per-person wording ({claims.stats['varied']} varied), never the same text twice")
+
+    # End to end: a spike of 60 "gm"s through the reply pipeline
+    mock_ai = MagicMock()
+    mock_ai.model.generate_content.side_effect = lambda *args, **kwargs: (time.sleep(0.05), MagicMock(text="gm fren 🥚"))[1]
+    handler = InteractionHandler(MagicMock(), mock_ai, "egg", 0.0, data_dir=tempfile.mkdtemp())
+    handler.twitter.reply_to_tweet.return_value = True
+    pipeline = ReplyPipeline(handler, concurrency=10, post_interval=0, batch_size=1)
+    texts = ["@polypuff gm", "GM!!", "gmmm @polypuff"]
+    mentions = [MagicMock(id=n, text=texts[n % 3], author_id=f"user{n}") for n in range(60)]
+    assert pipeline.run(mentions) == 60
+    posted = [call.args[1] for call in handler.twitter.reply_to_tweet.call_args_list]
+    assert len(set(posted)) == 60
+    assert mock_ai.model.generate_content.call_count <= 3
+    print(f"✅ 60 'gm' mentions answered with {mock_ai.model.generate_content.call_count} Gemini calls")
+
+    print("✨ Reply Cache Verification Complete!")
+
+if __name__ == "__main__":
+    verify_reply_cache()
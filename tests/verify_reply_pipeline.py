@@ -0,0 +1,86 @@
+
+import sys
+import os
+import time
+import tempfile
+import threading
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from integrations.interaction_handler import InteractionHandler
+from integrations.reply_pipeline import ReplyPipeline
+from config.settings import settings
+
+GEMINI_LATENCY = 0.05
+
+def verify_reply_pipeline():
+    print("🧪 Verifying Reply Pipeline...")
+
+    mentions = [MagicMock(id=1000 + n, text=f"hey puff #{n}", author_id="user") for n in range(100)]
+    mock_twitter = MagicMock()
+    mock_twitter.get_recent_mentions.return_value = mentions
+    mock_twitter.reply_to_tweet.return_value = True
+
+    handler = InteractionHandler(mock_twitter, MagicMock(), "egg", 0.0, data_dir=tempfile.mkdtemp())
+
+    in_flight = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def slow_reply(text, interaction_type, mention):
+        with lock:
+            in_flight.append(mention.id)
+            peak[0] = max(peak[0], len(in_flight))
+        time.sleep(GEMINI_LATENCY)
+        with lock:
+            in_flight.remove(mention.id)
+        return f"reply to {mention.id}"
+
+    handler.generate_reply = slow_reply
+    handler.pipeline = ReplyPipeline(handler, concurrency=10, post_interval=0, batch_size=1)
+
+    started = time.perf_counter()
+    handler.check_and_respond_to_mentions()
+    elapsed = time.perf_counter() - started
+
+    posted = [call.args for call in mock_twitter.reply_to_tweet.call_args_list]
+    assert posted == [(m.id, f"reply to {m.id}") for m in mentions]
+    assert handler.processed_tweets.since_id == str(mentions[-1].id)
+    print("✅ 100 replies posted in mention order")
+
+    assert peak[0] <= 10
+    assert elapsed < len(mentions) * GEMINI_LATENCY / 3
+    print(f"✅ {elapsed:.2f}s with 10 workers (sequential would take {len(mentions) * GEMINI_LATENCY:.0f}s), peak {peak[0]} in flight")
+
+    stats = handler.pipeline.stats
+    assert all(stats[stage]["completed"] == 100 for stage in ReplyPipeline.STAGES)
+    assert all(depth == 0 for depth in handler.pipeline.queue_depths().values())
+    rates = handler.pipeline.throughput()
+    print(f"✅ Stage stats: " + ", ".join(f"{stage} {rate:.0f}/s" for stage, rate in rates.items()))
+
+    # A failed post mid-run leaves since_id just before it, whatever the workers finish first
+    retry = [MagicMock(id=2000 + n, text=f"hey puff #{n}", author_id="user") for n in range(20)]
+    mock_twitter.get_recent_mentions.return_value = retry
+    mock_twitter.reply_to_tweet.side_effect = lambda tweet_id, reply: tweet_id != retry[7].id
+    handler.check_and_respond_to_mentions()
+    assert retry[7].id not in handler.processed_tweets and retry[8].id in handler.processed_tweets
+    assert handler.processed_tweets.since_id == str(retry[6].id)
+    mock_twitter.reply_to_tweet.side_effect = None
+    handler.check_and_respond_to_mentions()
+    assert handler.processed_tweets.since_id == str(retry[-1].id)
+    print("✅ A failed post holds since_id back until it's retried")
+
+    # Posting stage paces replies
+    mock_twitter.reply_to_tweet.reset_mock()
+    pacer = ReplyPipeline(handler, concurrency=4, post_interval=0.1, batch_size=1)
+    started = time.perf_counter()
+    pacer.run([MagicMock(id=n, text="gm", author_id="user") for n in range(5)])
+    assert time.perf_counter() - started >= 0.4
+    print("✅ Posts paced at the configured interval")
+
+    print("✨ Reply Pipeline Verification Complete!")
+
+if __name__ == "__main__":
+    verify_reply_pipeline()
@@ -0,0 +1,128 @@
+
+import sys
+import os
+import time
+import asyncio
+import signal
+import subprocess
+import tempfile
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from core.runtime import AgentRuntime
+from config.settings import settings
+
+def verify_runtime():
+    print("🧪 Verifying Async Runtime...")
+
+    # Tweet every second, poll everything else every 0.1 seconds
+    settings.TWEET_INTERVAL_MINUTES = 1 / 60
+    settings.CHECK_MENTIONS_INTERVAL_MINUTES = 0.1 / 60
+    settings.CHECK_BALANCE_INTERVAL_MINUTES = 0.1 / 60
+    settings.SHUTDOWN_TIMEOUT_SECONDS = 2
+
+    agent = MagicMock()
+    agent.blockchain_enabled = True
+
+    # A slow tweet job must not hold up mentions or wallet checks
+    loops = []
+    agent.think_and_tweet.side_effect = lambda check_wallet=True: (loops.append(agent.ai.loop), time.sleep(0.5))
+    agent.ai.generate_tweet_async = AsyncMock(return_value="gm from the event loop")
+
+    runtime = AgentRuntime(agent)
+
+    async def run_for(seconds):
+        stopper = threading.Timer(seconds, runtime.request_stop)
+        stopper.start()
+        await runtime.run()
+
+    asyncio.run(run_for(0.6))
+
+    assert agent.think_and_tweet.call_count == 1
+    agent.think_and_tweet.assert_called_with(check_wallet=False)
+    print("✅ Tweet job ran once without re-checking the wallet")
+
+    agent.ai.generate_tweet_async.assert_awaited_once()
+    assert agent.tweet_buffer.put.call_args.args[2] == "gm from the event loop"
+    print("✅ Tweet generated on the event loop and handed to the buffer")
+
+    assert isinstance(loops[0], asyncio.AbstractEventLoop) and agent.ai.loop is None
+    print("✅ Gemini client handed the runtime loop while it runs, released on shutdown")
+
+    assert agent.check_interactions.call_count >= 3
+    print(f"✅ Mentions checked {agent.check_interactions.call_count} times during a slow tweet")
+
+    assert agent.check_wallet_and_evolve.call_count >= 3
+    print(f"✅ Wallet checked {agent.check_wallet_and_evolve.call_count} times during a slow tweet")
+
+    agent.save_state.assert_called_once()
+    print("✅ State saved on shutdown")
+
+    # Shutdown lets a job that is mid-run finish before the final save...
+    events = []
+
+    def slow_tweet(seconds):
+        time.sleep(seconds)
+        events.append("tweeted")
+
+    agent = MagicMock()
+    agent.name = "PolyPuff"
+    agent.blockchain_enabled = False
+    agent.ai.generate_tweet_async = AsyncMock(return_value="gm")
+    agent.think_and_tweet.side_effect = lambda check_wallet=True: slow_tweet(0.3)
+    agent.save_state.side_effect = lambda: events.append("saved")
+    runtime = AgentRuntime(agent)
+    asyncio.run(run_for(0.1))
+    assert events == ["tweeted", "saved"], events
+
+    # ...but saves anyway once SHUTDOWN_TIMEOUT_SECONDS runs out
+    settings.SHUTDOWN_TIMEOUT_SECONDS = 0.2
+    events.clear()
+    agent.think_and_tweet.side_effect = lambda check_wallet=True: slow_tweet(0.6)
+    runtime = AgentRuntime(agent)
+    started = time.perf_counter()
+    asyncio.run(run_for(0.1))
+    elapsed = time.perf_counter() - started
+    assert events == ["saved"] and elapsed < 0.5, (events, elapsed)
+    time.sleep(0.6)
+    print(f"✅ Shutdown waits for running jobs before saving, up to the timeout ({elapsed:.2f}s)")
+
+    verify_signal()
+
+    print("✨ Runtime Verification Complete!")
+
+def verify_signal():
+    """SIGTERM to main.py (ASYNC_RUNTIME=true) drains the runtime and saves state"""
+    workdir = tempfile.mkdtemp(prefix="polypuff-main-")  # data/ lands here, not in the tree
+    output = os.path.join(workdir, "main.out")
+    env = dict(os.environ, SIMULATION="true", ASYNC_RUNTIME="true", PYTHONPATH=os.getcwd(),
+               LOG_FILE=os.path.join(workdir, "polypuff.jsonl"), TRACE_FILE=os.path.join(workdir, "traces.jsonl"),
+               IMAGE_CACHE_DIR=os.path.join(workdir, "image_cache"))
+    with open(output, "w") as out:
+        process = subprocess.Popen([sys.executable, "-u", os.path.join(os.getcwd(), "main.py")],
+                                   cwd=workdir, env=env, stdout=out, stderr=subprocess.STDOUT)
+
+    def logged(text):
+        with open(output, encoding="utf-8") as f:
+            return text in f.read()
+
+    try:
+        deadline = time.time() + 60
+        while not logged("job 'tweet' finished") and time.time() < deadline and process.poll() is None:
+            time.sleep(0.2)
+        assert logged("job 'tweet' finished"), open(output, encoding="utf-8").read()[-2000:]
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+
+    assert logged("Stopping async runtime") and logged("State saved") and logged("Runtime stopped")
+    assert os.path.exists(os.path.join(workdir, "data", "state.json"))
+    print("✅ SIGTERM to main.py drains the async runtime and saves state")
+
+if __name__ == "__main__":
+    verify_runtime()
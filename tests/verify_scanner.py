@@ -0,0 +1,130 @@
+
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from integrations.base_scanner import BaseScanner, TRANSFER_TOPIC
+from config.settings import settings
+
+PUFF = "0x00000000000000000000000000000000000000AA"
+OTHER = "0x00000000000000000000000000000000000000bb"
+DONOR = "0x00000000000000000000000000000000000000cc"
+TOKEN = "0x00000000000000000000000000000000000000dd"
+
+def topic(address):
+    return "0x" + "0" * 24 + address[2:].lower()
+
+class FakeChain:
+    """
+    Minimal JSON-RPC node: 30 blocks, a few transfers, picky eth_getLogs
+    """
+
+    def __init__(self):
+        self.head = 30
+        self.requested_blocks = []
+        self.log_ranges = []
+        self.txs = {
+            5: [self.tx("0xa1", DONOR, PUFF, 10**16, 5)],        # donation
+            6: [self.tx("0xa2", DONOR, PUFF, 10**16, 6),         # reverted
+                self.tx("0xa3", DONOR, OTHER, 10**16, 6),        # someone else
+                self.tx("0xa4", DONOR, PUFF, 0, 6)],             # contract call
+            25: [self.tx("0xa5", OTHER, PUFF, 2 * 10**16, 25)],  # after restart
+        }
+        self.failed = {"0xa2"}
+        self.logs = [
+            self.log("0xb1", 12, [TRANSFER_TOPIC, topic(DONOR), topic(PUFF)], hex(500)),
+            # ERC-721 transfer (tokenId indexed) must be ignored
+            self.log("0xb2", 13, [TRANSFER_TOPIC, topic(DONOR), topic(PUFF), hex(7)], "0x"),
+        ]
+
+    def tx(self, tx_hash, sender, to, value, block):
+        return {"hash": tx_hash, "from": sender, "to": to, "value": hex(value), "blockNumber": hex(block)}
+
+    def log(self, tx_hash, block, topics, data):
+        return {"transactionHash": tx_hash, "blockNumber": hex(block), "logIndex": "0x0",
+                "address": TOKEN, "topics": topics, "data": data, "removed": False}
+
+    def answer(self, call):
+        method, params = call["method"], call["params"]
+
+        if method == "eth_getBlockByNumber":
+            number = int(params[0], 16)
+            self.requested_blocks.append(number)
+            return {"number": params[0], "timestamp": hex(1700000000 + number),
+                    "transactions": self.txs.get(number, [])}
+
+        if method == "eth_getTransactionReceipt":
+            return {"status": "0x0" if params[0] in self.failed else "0x1"}
+
+        if method == "eth_getLogs":
+            start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+            if end - start >= 4:
+                return {"error": {"code": -32005, "message": "query returned more than 10000 results"}}
+            self.log_ranges.append((start, end))
+            return [log for log in self.logs if start <= int(log["blockNumber"], 16) <= end]
+
+    def handle(self, endpoint_uri, data, **kwargs):
+        response = []
+        for call in json.loads(data):
+            result = self.answer(call)
+            if isinstance(result, dict) and "error" in result:
+                response.append({"jsonrpc": "2.0", "id": call["id"], "error": result["error"]})
+            else:
+                response.append({"jsonrpc": "2.0", "id": call["id"], "result": result})
+        return json.dumps(response).encode()
+
+def verify_scanner():
+    print("🧪 Verifying Donation Scanner...")
+
+    settings.SCANNER_START_BLOCK = 1
+    settings.SCANNER_CONFIRMATIONS = 0
+    settings.SCANNER_BLOCK_BATCH_SIZE = 10
+    settings.SCANNER_LOG_RANGE = 8
+
+    chain = FakeChain()
+    mock_w3 = MagicMock()
+    mock_w3.provider.get_request_kwargs.return_value = {}
+    mock_w3.eth.block_number = 20
+    cursor_path = os.path.join(tempfile.mkdtemp(), "cursor.json")
+
+    with patch('utils.rpc.post_json', side_effect=chain.handle):
+        scanner = BaseScanner(mock_w3, [PUFF], cursor_path=cursor_path)
+        events = scanner.scan()
+
+        assert [event["tx_hash"] for event in events] == ["0xa1", "0xb1"]
+        native, token = events
+        assert native["type"] == "native" and native["amount"] == 0.01
+        assert native["sender"].lower() == DONOR.lower()
+        assert native["timestamp"] == 1700000005
+        assert token["type"] == "erc20" and token["value"] == 500
+        assert token["token"].lower() == TOKEN.lower()
+        print("✅ Found 1 native and 1 ERC-20 donation (skipped reverted, zero-value, NFT and other wallets)")
+
+        assert sorted(chain.requested_blocks) == list(range(1, 21))
+        assert all(end - start < 4 for start, end in chain.log_ranges)
+        print("✅ Blocks 1-20 read once; oversized eth_getLogs ranges were split")
+
+        with open(cursor_path) as f:
+            assert json.load(f)["last_block"] == 20
+        print("✅ Cursor checkpointed at block 20")
+
+        # Restart: a new scanner resumes from the cursor
+        chain.requested_blocks = []
+        mock_w3.eth.block_number = 30
+        restarted = BaseScanner(mock_w3, [PUFF], cursor_path=cursor_path)
+        donations = restarted.poll(PUFF)
+
+        assert sorted(chain.requested_blocks) == list(range(21, 31))
+        assert [event["tx_hash"] for event in donations] == ["0xa5"]
+        assert restarted.poll(PUFF) == []
+        print("✅ Restart resumed at block 21 and poll() hands each donation out once")
+
+    print("✨ Scanner Verification Complete!")
+
+if __name__ == "__main__":
+    verify_scanner()
@@ -0,0 +1,127 @@
+import sys
+import os
+import time
+import itertools
+import threading
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from simulation.chain import FakeChain
+from simulation.gemini import FakeGenerativeModel
+from simulation.harness import Simulation, SCENARIOS, run_scenario
+from core.agent import PolyPuffAgent
+from core.wallet import WalletManager
+from config.settings import settings
+
+def verify_simulation():
+    print("🧪 Verifying Simulation...")
+
+    # The fake chain is a real JSON-RPC node
+    chain = FakeChain().start()
+    address = "0x000000000000000000000000000000000000bEEF"
+    chain.fund(address, 0.5)
+    chain.send("0x" + "1" * 40, address, 0.25)
+    wallet = WalletManager(address, w3=chain.web3())
+    assert wallet.w3.is_connected()
+    assert abs(wallet.get_balance() - 0.75) < 1e-9
+    chain.outage()
+    assert not wallet.w3.is_connected()
+    chain.outage(False)
+    chain.stop()
+    print("✅ Fake chain serves balances over HTTP and can go down")
+
+    # Fake Gemini honours deadlines like the SDK
+    model = FakeGenerativeModel(latency=0.2)
+    started = time.perf_counter()
+    try:
+        model.generate_content("hi", request_options={"timeout": 0.05})
+        assert False, "expected DeadlineExceeded"
+    except Exception as e:
+        assert type(e).__name__ == "DeadlineExceeded"
+    assert time.perf_counter() - started < 0.15
+    print("✅ Fake Gemini times out at the request deadline")
+
+    # Mention flood: 100 replies per check, nothing answered twice
+    report = run_scenario("mention_flood", gemini_latency=0.01)
+    assert report["counts"]["replies"] == settings.MAX_REPLIES_PER_CHECK * 3
+    assert report["mentions_unanswered"] == 500 - settings.MAX_REPLIES_PER_CHECK * 3
+    print(f"✅ Mention flood: {report['counts']['replies']} replies in {report['seconds']:.2f}s")
+
+    # Donation burst: the scanner sees every donation and the egg evolves
+    report = run_scenario("donation_burst", gemini_latency=0.01)
+    assert report["agent"]["stage"] == "slime"
+    assert abs(report["agent"]["balance"] - 0.01) < 1e-9
+    assert report["counts"]["tweets"] >= 2  # evolution + regular tweet (thank-yous are capped per check)
+    print(f"✅ Donation burst: evolved to {report['agent']['stage']} after {report['counts']['tweets']} tweets")
+
+    # Outages: the agent survives and catches up once services return
+    report = run_scenario("api_outage", gemini_latency=0.01)
+    assert report["counts"]["gemini_failures"] >= 1
+    assert report["mentions_unanswered"] == 0
+    assert abs(report["agent"]["balance"] - 0.002) < 1e-9
+    print(f"✅ API outage: recovered, {report['counts']['replies']} replies and balance caught up")
+
+    # The wallet job and a tweet cycle checking the wallet at the same time evolve once
+    simulation = Simulation(gemini_latency=0.0)
+    try:
+        with simulation.settings():
+            agent = simulation.agent
+            get_reading, check_evolution = agent.wallet.get_balance_reading, agent.evolution.check_evolution
+            reads, deciding = itertools.count(), threading.Event()
+            both_decided = threading.Barrier(2, timeout=0.5)
+            evolutions = []
+
+            def read_new_block():
+                if next(reads):
+                    deciding.wait(1)  # the second check reads while the first decides
+                simulation.chain.mine(1)
+                return get_reading()
+
+            def record_evolution(*args):
+                deciding.set()
+                result = check_evolution(*args)
+                try:
+                    both_decided.wait()  # without the lock both see the egg crossing the threshold
+                except threading.BrokenBarrierError:
+                    pass
+                if result["should_evolve"]:
+                    evolutions.append(result["new_stage"])
+                return result
+
+            agent.wallet.get_balance_reading = read_new_block
+            agent.evolution.check_evolution = record_evolution
+            simulation.donate(1, 0.01)
+            checks = [threading.Thread(target=agent.check_wallet_and_evolve) for _ in range(2)]
+            for check in checks:
+                check.start()
+            for check in checks:
+                check.join()
+            assert evolutions == ["slime"] and agent.stage == "slime", evolutions
+    finally:
+        simulation.close()
+    print("✅ Concurrent wallet checks announce one evolution")
+
+    # Scenarios are steps the harness knows
+    for name, (description, steps) in SCENARIOS.items():
+        assert all(hasattr(Simulation, step) for step, _ in steps), name
+    print("✅ Every scenario step exists")
+
+    # SIMULATION=true builds a working agent with no credentials
+    import tempfile
+    previous = (settings.SIMULATION, settings.SIM_GEMINI_LATENCY_MS, settings.SIM_TWITTER_LATENCY_MS)
+    settings.SIMULATION, settings.SIM_GEMINI_LATENCY_MS, settings.SIM_TWITTER_LATENCY_MS = True, 10, 0
+    try:
+        agent = PolyPuffAgent(data_dir=tempfile.mkdtemp())
+        assert type(agent.twitter).__name__ == "FakeTwitterClient"
+        assert agent.wallet.w3.is_connected()
+        agent.tweet_buffer.stop()
+        agent.state_store.close()
+    finally:
+        settings.SIMULATION, settings.SIM_GEMINI_LATENCY_MS, settings.SIM_TWITTER_LATENCY_MS = previous
+    print("✅ SIMULATION=true wires the agent to the fakes")
+
+    print("\n✨ Simulation Verification Complete!")
+
+if __name__ == "__main__":
+    verify_simulation()
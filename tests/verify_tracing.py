@@ -0,0 +1,124 @@
+import sys
+import os
+import json
+import tempfile
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from utils import tracing
+from simulation.harness import Simulation
+
+def verify_tracing():
+    print("🧪 Verifying Tracing...")
+
+    trace_dir = tempfile.mkdtemp()
+    trace_file = os.path.join(trace_dir, "traces.jsonl")
+    tracing.configure(trace_file)
+
+    def children(spans, parent):
+        return {span["name"] for span in spans if span["parent_id"] == parent["span_id"]}
+
+    # Child spans outside a trace are free no-ops
+    with tracing.span("orphan") as attributes:
+        attributes["ignored"] = True
+    assert tracing.read_spans(trace_file) == []
+    print("✅ Child spans outside a trace aren't written")
+
+    simulation = Simulation(gemini_latency=0.0)
+    try:
+        with simulation.settings():  # no block-time caching, no evolution pause
+            agent = simulation.agent
+            agent.should_post_progress_update = lambda: False
+            agent.twitter.media_cache.entries.clear()  # upload the stage image inside the cycle
+
+            # Tweet cycle: wallet check, generation, upload, post and journaled state under one trace
+            simulation.donate(1, 0.001)
+            written = len(tracing.read_spans(trace_file))  # the simulation's warm-up is traced too
+            agent.think_and_tweet()
+            spans = tracing.read_spans(trace_file)[written:]
+            cycle = next(span for span in spans if span["name"] == "tweet_cycle")
+            assert cycle["parent_id"] is None and cycle["attributes"]["agent"] == "SimPuff"
+            assert cycle["attributes"]["type"] == "ai"
+            assert {"check_wallet_and_evolve", "generate_tweet", "media_upload", "create_tweet",
+                    "save_state"} <= children(spans, cycle), children(spans, cycle)
+            assert all(span["trace_id"] == cycle["trace_id"] for span in spans)
+            wallet_check = next(span for span in spans if span["name"] == "check_wallet_and_evolve")
+            assert {"save_state", "scan_donations"} <= children(spans, wallet_check)
+            assert cycle["duration_ms"] >= max(span["duration_ms"] for span in spans if span is not cycle)
+            print(f"✅ Tweet cycle traced: {len(spans)} spans, {cycle['duration_ms']:.1f}ms")
+
+            # Mention check: reply generation on worker threads joins the same trace
+            simulation.twitter.flood(5)
+            written = len(tracing.read_spans(trace_file))
+            agent.check_interactions()
+            spans = tracing.read_spans(trace_file)[written:]
+            check = next(span for span in spans if span["name"] == "mention_check")
+            assert check["attributes"]["mentions"] == 5
+            assert {"fetch_mentions", "classify", "generate_replies", "post_reply"} <= children(spans, check)
+            assert sum(span["name"] == "create_reply" for span in spans) == 5
+            assert all(span["trace_id"] == check["trace_id"] for span in spans)
+            print("✅ Mention check traced across the reply workers")
+
+            # Every mention gets its own classify and post_reply spans
+            classified = [span for span in spans if span["name"] == "classify"]
+            posted = [span for span in spans if span["name"] == "post_reply"]
+            assert len(classified) == len(posted) == 5
+            assert [span["attributes"]["mention_id"] for span in classified] == \
+                   [span["attributes"]["mention_id"] for span in posted]
+            assert all(span["attributes"]["interaction_type"] for span in classified)
+            assert all(span["attributes"]["posted"] and "create_reply" in children(spans, span) for span in posted)
+            print("✅ Per-mention spans: classify (with interaction_type) and post_reply > create_reply")
+
+            # Caught errors still mark the span failed
+            simulation.outage("gemini")
+            agent.tweet_buffer.invalidate()
+            agent.think_and_tweet(check_wallet=False)
+            simulation.outage("gemini", down=False)
+            cycle = tracing.read_spans(trace_file)[-1]
+            assert cycle["name"] == "tweet_cycle" and cycle["status"] == "error"
+            assert "ServiceUnavailable" in cycle["error"]
+            print("✅ Failed cycles are marked as errors")
+    finally:
+        simulation.close()
+
+    # Summary percentiles per span name
+    assert tracing.percentile([10, 20, 30, 40], 50) == 25
+    assert tracing.percentile([1.0], 99) == 1.0
+    rows = {row["name"]: row for row in tracing.main(["--file", trace_file, "--window", "1h", "--json"])}
+    assert rows["tweet_cycle"]["count"] >= 2 and rows["tweet_cycle"]["errors"] == 1
+    assert rows["create_reply"]["p50"] <= rows["create_reply"]["p99"] <= rows["create_reply"]["max"]
+    assert tracing.main(["--file", trace_file, "--window", "1h", "-k", "nothing"]) == []
+    assert tracing.parse_window("15m") == 900 and tracing.parse_window("2d") == 172800
+    print(f"✅ Summary: {len(rows)} span names with p50/p95/p99")
+
+    # Rotation keeps backups, and the reader goes through them too
+    total = len(tracing.read_spans(trace_file))
+    rotated = os.path.join(trace_dir, "rotated.jsonl")
+    tracing.configure(rotated, max_bytes=2000, backups=50)
+    for n in range(100):
+        with tracing.trace("tick", n=n):
+            pass
+    tracing.flush()  # spans are written on the logging thread
+    assert os.path.exists(rotated + ".1")
+    ticks = tracing.read_spans(rotated)
+    assert [span["attributes"]["n"] for span in ticks] == list(range(100))
+    with open(rotated) as f:
+        assert all(json.loads(line)["name"] == "tick" for line in f)
+    print(f"✅ Trace file rotates ({total} spans earlier, 100 ticks over {len(os.listdir(trace_dir)) - 1} files)")
+
+    # Closing (at exit) writes out whatever is still queued
+    closing = os.path.join(trace_dir, "closing.jsonl")
+    tracing.configure(closing)
+    with tracing.trace("last_cycle"):
+        pass
+    tracing.close()
+    assert [span["name"] for span in tracing.read_spans(closing)] == ["last_cycle"]
+    print("✅ close() writes queued spans before exit")
+
+    tracing.configure()
+
+    print("\n✨ Tracing Verification Complete!")
+
+if __name__ == "__main__":
+    verify_tracing()
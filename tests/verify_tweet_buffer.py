@@ -0,0 +1,106 @@
+
+import sys
+import os
+import time
+import threading
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from core.tweet_buffer import TweetBuffer
+from config.settings import settings
+
+GEMINI_LATENCY = 0.1
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+def verify_tweet_buffer():
+    print("🧪 Verifying Tweet Buffer...")
+
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    def generate_tweet(stage, context):
+        time.sleep(GEMINI_LATENCY)
+        with lock:
+            counter["n"] += 1
+            return f"{stage} tweet {counter['n']}"
+
+    ai = MagicMock()
+    ai.generate_tweet.side_effect = generate_tweet
+    buffer = TweetBuffer(ai, size=2)
+
+    egg = {"balance": 0.0005, "time_of_day": "morning"}
+    buffer.refill("egg", egg)
+    assert wait_for(lambda: len(buffer.tweets) == 2)
+    assert ai.generate_tweet.call_count == 2
+    print("✅ Background thread fills the buffer and stops at its size")
+
+    started = time.perf_counter()
+    tweet = buffer.take("egg", egg)
+    took = (time.perf_counter() - started) * 1000
+    assert tweet.startswith("egg tweet") and took < GEMINI_LATENCY * 1000 / 10
+    print(f"✅ take() returned a ready tweet in {took:.3f} ms (Gemini takes {GEMINI_LATENCY * 1000:.0f} ms)")
+
+    buffer.refill("egg", egg)
+    assert wait_for(lambda: len(buffer.tweets) == 2)
+
+    # Evolution: nothing written for the egg may go out as slime
+    slime = {"balance": 0.0015, "time_of_day": "morning"}
+    assert buffer.take("slime", slime) is None
+    assert len(buffer.tweets) == 0 and buffer.stats["invalidated"] == 2
+    buffer.refill("slime", slime)
+    assert wait_for(lambda: len(buffer.tweets) == 2)
+    assert all(text.startswith("slime") for _, text in buffer.tweets)
+    print("✅ Stage change drops buffered egg tweets and refills for slime")
+
+    # Balance bucket / time of day changes invalidate too
+    assert buffer.take("slime", {"balance": 0.0025, "time_of_day": "morning"}) is None
+    assert buffer.take("slime", {"balance": 0.0025, "time_of_day": "night"}) is None
+    print("✅ Balance bucket and time-of-day changes invalidate the buffer")
+
+    # A tweet still being generated for the old state is discarded
+    buffer.refill("egg", egg)
+    time.sleep(GEMINI_LATENCY / 2)
+    buffer.invalidate()
+    time.sleep(GEMINI_LATENCY)
+    assert len(buffer.tweets) == 0
+    print("✅ In-flight generation for a stale state is discarded")
+
+    # Gemini outage: take() misses, caller generates inline
+    ai.generate_tweet.side_effect = RuntimeError("gemini down")
+    buffer.refill("beast", {"balance": 0.03, "time_of_day": "night"})
+    time.sleep(0.05)
+    assert buffer.take("beast", {"balance": 0.03, "time_of_day": "night"}) is None
+    print("✅ Refill failures are logged and leave the posting path to generate inline")
+
+    settings.TWEET_BUFFER_MAX_AGE_MINUTES = 0
+    stale = TweetBuffer(ai, size=1)
+    stale.key = TweetBuffer.bucket_key("egg", egg)
+    stale.tweets.append((time.time() - 1, "old"))
+    assert stale.take("egg", egg) is None
+    print("✅ Tweets past the max age are dropped")
+
+    # Tweets generated elsewhere (the async runtime) go in through put()
+    settings.TWEET_BUFFER_MAX_AGE_MINUTES = 180
+    async_buffer = TweetBuffer(ai, size=1)
+    assert async_buffer.wants("egg", egg)
+    async_buffer.put("egg", egg, "generated on the loop")
+    assert not async_buffer.wants("egg", egg) and async_buffer.wants("slime", slime)
+    async_buffer.put("egg", egg, "one too many")
+    assert async_buffer.take("egg", egg) == "generated on the loop" and async_buffer.take("egg", egg) is None
+    assert not TweetBuffer(ai, size=0).wants("egg", egg)
+    print("✅ put() buffers a tweet generated elsewhere; wants() only while none is ready")
+
+    buffer.stop()
+    print("✨ Tweet Buffer Verification Complete!")
+
+if __name__ == "__main__":
+    verify_tweet_buffer()
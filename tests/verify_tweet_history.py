@@ -0,0 +1,107 @@
+import sys
+import os
+import json
+import time
+import tempfile
+from unittest.mock import MagicMock
+
+sys.path.append(os.getcwd())
+import sandbox  # logs, traces and image cache go to a temp dir
+
+from core.tweet_history import TweetHistory, signature, similarity, NUM_PERM
+from core.agent import PolyPuffAgent
+from integrations.interaction_handler import InteractionHandler
+from config.settings import settings
+
+def verify_tweet_history():
+    print("🧪 Verifying Tweet History...")
+
+    tweet = "so hungry in my little shell today, anyone got snacks for a tiny egg?"
+    assert similarity(signature(tweet), signature("SO hungry in my little shell today!! anyone got snacks for a tiny egg 🥺")) == 1.0
+    assert similarity(signature(tweet), signature("so hungry in my little shell tonight, anyone got snacks for a tiny egg?")) >= 0.6
+    assert similarity(signature(tweet), signature("the mempool is sparkly tonight ✨ hunting for crumbs")) < 0.2
+    assert signature("🥚🥚🥚") == b""
+    print("✅ Repeats and light paraphrases score high, new tweets low")
+
+    data_dir = tempfile.mkdtemp()
+    history = TweetHistory(data_dir, threshold=0.6)
+    history.add(tweet)
+    assert history.is_duplicate("so hungry in my little shell tonight... anyone got snacks for a tiny egg?")
+    assert not history.is_duplicate("wiggled so hard the whole shell rolled off the table")
+    assert len(TweetHistory(data_dir)) == 1
+    print("✅ Posted tweets are persisted and survive a restart")
+
+    # 100k historical tweets: load and check times
+    big_dir = tempfile.mkdtemp()
+    with open(os.path.join(big_dir, "posted_tweets.log"), "w") as f:
+        for n in range(100000):
+            f.write(json.dumps({"ts": n, "sig": os.urandom(NUM_PERM * 4).hex(), "text": f"tweet {n}"}) + "\n")
+        f.write('{"ts": 1, "sig": "ab')  # torn last line
+    started = time.perf_counter()
+    big = TweetHistory(big_dir, threshold=0.6)
+    loaded = time.perf_counter() - started
+    assert len(big) == 100000
+    big.add(tweet)
+
+    candidates = ["wiggled so hard the whole shell rolled off the table",
+                  "so hungry in my little shell today... anyone got snacks for a tiny egg?"] * 250
+    started = time.perf_counter()
+    results = [big.is_duplicate(text) for text in candidates]
+    per_check = (time.perf_counter() - started) / len(candidates) * 1000
+    assert results[:2] == [False, True] and per_check < 1.0
+    print(f"✅ 100k history: loaded in {loaded:.1f}s, {per_check:.3f} ms per check")
+
+    # Agent regenerates repeats before posting, and skips if it can't escape them
+    agent = PolyPuffAgent.__new__(PolyPuffAgent)
+    agent.stage = "egg"
+    agent.get_tweet_context = lambda: {"balance": 0.0}
+    agent.tweet_buffer = MagicMock()
+    agent.tweet_buffer.take.return_value = tweet
+    agent.tweet_history = history
+    agent.ai = MagicMock()
+    agent.ai.generate_tweet.side_effect = [tweet, "a brand new thought about warm blocks"]
+    settings.TWEET_DEDUP_RETRIES = 2
+    assert agent.get_fresh_tweet() == "a brand new thought about warm blocks"
+    assert agent.ai.generate_tweet.call_count == 2
+    print("✅ Repeat from the buffer regenerated until something new came back")
+
+    agent.ai.generate_tweet.side_effect = None
+    agent.ai.generate_tweet.return_value = tweet
+    assert agent.get_fresh_tweet() is None
+    print("✅ Tweet skipped when every attempt is a repeat")
+
+    # Every tweet goes through the same check: evolution, sickness and thank-you tweets too
+    agent.twitter = MagicMock()
+    agent.twitter.post_tweet.return_value = True
+    sick = "oh no... im not feeling good... balance dropping... 😢💀"
+    assert agent.post_tweet(sick)
+    assert not agent.post_tweet(sick)
+    assert agent.twitter.post_tweet.call_count == 1
+    handler = InteractionHandler(agent.twitter, agent.ai, "egg", 0.0, data_dir=tempfile.mkdtemp(),
+                                 post_tweet=agent.post_tweet)
+    handler.model_for = lambda context: MagicMock(generate_content=lambda *args, **kwargs: MagicMock(
+        text="thank u for the snack fren, my tummy is warm and happy now"))
+    handler.handle_donation_thanks("0xabc", 0.01)
+    handler.handle_donation_thanks("0xdef", 0.02)
+    assert agent.twitter.post_tweet.call_count == 2
+    print("✅ Evolution, sickness and thank-you tweets are checked against the history too")
+
+    # An unchanged progress update gives way to an AI tweet instead of posting nothing
+    progress = "egg progress: ▓▓░░░░░░░░ 20%\n\nbalance: 0.0010 ETH"
+    agent.name, agent.balance, agent.tweet_count, agent.wallet = "PolyPuff", 0.001, 0, None
+    agent.is_balance_stale = lambda: False
+    agent.should_post_progress_update = lambda: True
+    agent.generate_progress_tweet = lambda: progress
+    agent.record_state = MagicMock()
+    agent.tweet_buffer.take.return_value = "dreaming about the day i finally crack open"
+    agent.think_and_tweet(check_wallet=False)
+    agent.think_and_tweet(check_wallet=False)
+    posted = [call.args[0] for call in agent.twitter.post_tweet.call_args_list[-2:]]
+    assert posted == [progress, "dreaming about the day i finally crack open"], posted
+    assert agent.tweet_count == 2
+    print("✅ Repeated progress update replaced by an AI tweet")
+
+    print("✨ Tweet History Verification Complete!")
+
+if __name__ == "__main__":
+    verify_tweet_history()
@@ -2,8 +2,8 @@
 Health check to ensure bot is running properly
 """
 from datetime import datetime, timedelta
-import json
 import os
+from core.state_store import StateStore
 from utils.logger import logger
 
 def check_agent_health() -> dict:
@@ -21,15 +21,15 @@ def check_agent_health() -> dict:
     }
     
     # Check if state file exists
-    if not os.path.exists("data/state.json"):
+    if not os.path.exists("data/state.json") and not os.path.exists("data/state.journal"):
         health["issues"].append("No state file found")
         health["status"] = "unhealthy"
         return health
     
     # Load state
     try:
-        with open("data/state.json", "r") as f:
-            state = json.load(f)
+        # Snapshot plus any journaled transitions since
+        state = StateStore("data").load()
         
         health["tweet_count"] = state.get("tweet_count", 0)
         last_updated = state.get("last_updated")
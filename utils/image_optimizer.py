@@ -0,0 +1,193 @@
+"""
+Size-optimized copies of image assets, cached by content hash
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from PIL import Image
+from config.settings import settings
+from utils.logger import logger
+
+# Bump when the output for the same input would change
+OPTIMIZER_VERSION = 1
+
+# Where an image is shown on Twitter: largest side it is displayed at and
+# the formats the endpoint accepts
+PROFILES = {
+    "tweet": {"max_side": 1200, "formats": ("WEBP", "JPEG", "PNG")},
+    "profile": {"max_side": 400, "formats": ("JPEG", "PNG")},
+}
+
+EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg", "PNG": ".png"}
+
+_hashes = {}  # file path -> (mtime, size, content hash)
+_hashes_lock = threading.Lock()
+
+
+def content_hash(image_path: str) -> str:
+    """
+    SHA-256 of a file, only re-read when its mtime or size changes (the
+    media cache keys uploads on it too)
+    """
+    stat = os.stat(image_path)
+    with _hashes_lock:
+        cached = _hashes.get(image_path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    with _hashes_lock:
+        _hashes[image_path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+class ImageOptimizer:
+    """
+    Resizes and recompresses images for a Twitter profile, once per content
+
+    The output is keyed on the SHA-256 of the source file plus the profile
+    and settings, and written to IMAGE_CACHE_DIR. An unchanged asset is
+    never processed twice (not even across restarts). If optimizing fails
+    or doesn't make the file smaller, the original path is used.
+    """
+
+    def __init__(self, cache_dir: str = None, quality: int = None):
+        """
+        Args:
+            cache_dir: Where optimized files go (IMAGE_CACHE_DIR)
+            quality: JPEG/WebP quality 1-100 (IMAGE_QUALITY)
+        """
+        self.cache_dir = cache_dir or settings.IMAGE_CACHE_DIR
+        self.quality = quality or settings.IMAGE_QUALITY
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.index = {}  # cache key -> optimized file name
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "optimized": 0, "bytes_saved": 0}
+
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path) as f:
+                    self.index = json.load(f)
+            except Exception as e:
+                logger.warning(f"Could not load image cache index: {e}")
+
+    def optimize(self, image_path: str, profile: str = "tweet") -> str:
+        """
+        Path of the optimized version of an image
+
+        Args:
+            image_path: Source image
+            profile: "tweet" or "profile" (see PROFILES)
+
+        Returns:
+            Cached optimized file, or image_path if it can't be improved
+        """
+        if not settings.IMAGE_OPTIMIZE:
+            return image_path
+
+        try:
+            key = f"{content_hash(image_path)}-{profile}-{self.quality}-v{OPTIMIZER_VERSION}"
+            with self._lock:
+                name = self.index.get(key)
+            if name is not None:
+                path = os.path.join(self.cache_dir, name) if name else image_path
+                if not name or os.path.exists(path):
+                    self.stats["hits"] += 1
+                    return path
+
+            name = self._build(image_path, key, PROFILES[profile])
+            with self._lock:
+                self.index[key] = name
+                self._save_index()
+            return os.path.join(self.cache_dir, name) if name else image_path
+        except Exception as e:
+            logger.warning(f"Could not optimize {image_path}: {e}")
+            return image_path
+
+    def _build(self, image_path: str, key: str, profile: dict) -> str:
+        """
+        Write the smallest encoding of the resized image
+
+        Returns:
+            File name in cache_dir, or "" if the original is already best
+        """
+        original_size = os.path.getsize(image_path)
+        with Image.open(image_path) as image:
+            image.load()
+            resized = max(image.size) > profile["max_side"]
+            if resized:
+                image.thumbnail((profile["max_side"], profile["max_side"]), Image.LANCZOS)
+
+            has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+            formats = [f for f in profile["formats"] if not (f == "JPEG" and has_alpha)]
+            # Lossless PNG only wins for images with transparency
+            if not has_alpha and len(formats) > 1:
+                formats = [f for f in formats if f != "PNG"]
+
+            best = None
+            for image_format in formats:
+                encoded = self._encode(image, image_format)
+                if best is None or len(encoded) < len(best[1]):
+                    best = (image_format, encoded)
+
+        image_format, data = best
+        if len(data) >= original_size and not resized:
+            return ""
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        name = key + EXTENSIONS[image_format]
+        tmp_path = os.path.join(self.cache_dir, name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.cache_dir, name))
+
+        self.stats["optimized"] += 1
+        self.stats["bytes_saved"] += original_size - len(data)
+        logger.info(f"Optimized {image_path}: {original_size // 1024}KB -> {len(data) // 1024}KB {image_format}")
+        return name
+
+    def _encode(self, image, image_format: str) -> bytes:
+        output = io.BytesIO()
+        if image_format == "JPEG":
+            image.convert("RGB").save(output, "JPEG", quality=self.quality, optimize=True, progressive=True)
+        elif image_format == "WEBP":
+            image.save(output, "WEBP", quality=self.quality, method=6)
+        else:
+            image.save(output, "PNG", optimize=True)
+        return output.getvalue()
+
+    def _save_index(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.error(f"Error saving image cache index: {e}")
+
+
+def test_image_optimizer():
+    """
+    Optimize every stage image and show the savings
+    """
+    from config.prompts import STAGE_PROMPTS
+
+    optimizer = ImageOptimizer()
+    for stage, prompt in STAGE_PROMPTS.items():
+        image_path = prompt.get("image")
+        if not image_path or not os.path.exists(image_path):
+            continue
+        for profile in PROFILES:
+            optimized = optimizer.optimize(image_path, profile)
+            print(f"{stage:>6} {profile:>7}: {os.path.getsize(image_path) // 1024}KB -> "
+                  f"{os.path.getsize(optimized) // 1024}KB ({optimized})")
+
+
+if __name__ == "__main__":
+    test_image_optimizer()
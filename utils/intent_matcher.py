@@ -0,0 +1,90 @@
+"""
+Compiled multi-keyword intent matcher
+"""
+import re
+
+# Words (keeping "what's" whole) and single punctuation/emoji characters
+TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)*|[^\w\s]")
+
+
+def tokenize(text: str) -> list:
+    """Lowercased tokens, the unit keywords are matched on"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class IntentMatcher:
+    """
+    Scores text against keyword tables in one pass
+
+    Keywords are matched on whole tokens, so "hi" doesn't fire on "this"
+    and "eth" doesn't fire on "something". The text is tokenized once and
+    intersected with the keyword index; only when a multi-word phrase could
+    be present does it walk the tokens, taking the longest phrase first
+    ("how are you" over "how"). Every match adds its keyword's weight to
+    each intent that lists it.
+    """
+
+    def __init__(self, intents: dict):
+        """
+        Args:
+            intents: {intent: {keyword: weight}}. Order is the tie-break
+                priority (earlier wins).
+        """
+        self.priority = {intent: rank for rank, intent in enumerate(intents)}
+        self.hits = {}  # keyword tokens -> [(intent, weight)]
+        for intent, table in intents.items():
+            for keyword, weight in table.items():
+                self.hits.setdefault(tuple(tokenize(keyword)), []).append((intent, weight))
+
+        # First token -> keywords starting with it, longest first
+        self.index = {}
+        for phrase in sorted(self.hits, key=len, reverse=True):
+            self.index.setdefault(phrase[0], []).append(phrase)
+        self.heads = frozenset(self.index)
+        self.phrase_heads = frozenset(phrase[0] for phrase in self.hits if len(phrase) > 1)
+
+    def scores(self, text: str) -> dict:
+        """
+        Returns:
+            {intent: score} for every intent with at least one match
+        """
+        tokens = tokenize(text)
+        present = self.heads.intersection(tokens)
+        scores = {}
+        if not present:
+            return scores
+
+        if present.isdisjoint(self.phrase_heads):
+            # Only single-token keywords: count them
+            for token in present:
+                count = tokens.count(token)
+                for intent, weight in self.hits[(token,)]:
+                    scores[intent] = scores.get(intent, 0) + weight * count
+            return scores
+
+        i = 0
+        while i < len(tokens):
+            width = 1
+            for phrase in self.index.get(tokens[i], ()):
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    for intent, weight in self.hits[phrase]:
+                        scores[intent] = scores.get(intent, 0) + weight
+                    width = len(phrase)
+                    break
+            i += width
+        return scores
+
+    def match(self, text: str) -> list:
+        """
+        Returns:
+            [(intent, score)] best first
+        """
+        scores = self.scores(text)
+        return sorted(scores.items(), key=lambda item: (-item[1], self.priority[item[0]]))
+
+    def best(self, text: str, default: str = "general") -> str:
+        """Highest-scoring intent, or default if nothing matched"""
+        scores = self.scores(text)
+        if not scores:
+            return default
+        return min(scores, key=lambda intent: (-scores[intent], self.priority[intent]))
@@ -1,20 +1,278 @@
+"""
+Logging that never blocks the agent
+
+Records are handed to a background thread through a bounded queue (dropped,
+and counted, if it ever fills up). That thread writes them to the console and
+as JSON lines to LOG_FILE, which rotates on LOG_ROTATE_WHEN (midnight by
+default) and gzips the old file. Lines logged inside a trace carry its
+trace_id/span_id, so they can be matched to a cycle or mention in
+logs/traces.jsonl.
+
+LOG_LEVELS sets levels per module ("core.wallet=WARNING,integrations=DEBUG")
+and LOG_SAMPLE keeps only every Nth INFO/DEBUG line per call site of noisy
+modules ("core.wallet=10").
+"""
+import atexit
+import copy
+import gzip
+import json
 import logging
 import os
+import queue
+import shutil
+import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from config.settings import settings
+from utils import tracing
+
+CONSOLE_FORMAT = '%(asctime)s | %(levelname)s | %(message)s'
+_plain = logging.Formatter()
+
+# Project root, for turning file paths into module names (core/wallet.py -> core.wallet)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Attributes every LogRecord has - anything else was passed in `extra`
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "source", "trace_id", "span_id", "sampled"}
+
+
+def parse_levels(text: str) -> dict:
+    """'core.wallet=WARNING, integrations=DEBUG' -> {"core.wallet": 30, "integrations": 10}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+        if not isinstance(levels[name.strip()], int):
+            raise ValueError(f"Unknown log level in LOG_LEVELS: {item}")
+    return levels
+
+
+def parse_sampling(text: str) -> dict:
+    """'core.wallet=10' -> {"core.wallet": 10} (keep 1 line in 10)"""
+    sampling = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        name, _, every = item.partition("=")
+        sampling[name.strip()] = max(int(every), 1)
+    return sampling
+
+
+def longest_prefix(names: tuple, table: dict):
+    """Value of the most specific table key that is one of names or a package of one"""
+    best, best_length = None, -1
+    for key, value in table.items():
+        for name in names:
+            if (name == key or name.startswith(key + ".")) and len(key) > best_length:
+                best, best_length = value, len(key)
+    return best
+
+
+class ModuleFilter(logging.Filter):
+    """
+    Per-module levels and sampling, applied before a record is queued
+
+    A module is matched by its dotted path in the project (core.wallet) or
+    by logger name (web3, tweepy). WARNING and above are never sampled.
+    """
+
+    def __init__(self, level: int = logging.INFO, levels: dict = None, sampling: dict = None):
+        super().__init__()
+        self.level = level
+        self.levels = levels or {}
+        self.sampling = sampling or {}
+        self._modules = {}  # pathname -> dotted module
+        self._rules = {}  # (module, logger name) -> (level, every)
+        self._counts = {}  # (pathname, lineno) -> records seen
+
+    def module_of(self, record) -> str:
+        module = self._modules.get(record.pathname)
+        if module is None:
+            path = os.path.abspath(record.pathname)
+            if path.endswith(".py") and path.startswith(ROOT_DIR + os.sep):
+                module = os.path.splitext(os.path.relpath(path, ROOT_DIR))[0].replace(os.sep, ".")
+            else:
+                module = record.name
+            self._modules[record.pathname] = module
+        return module
+
+    def filter(self, record) -> bool:
+        record.source = self.module_of(record)
+        rule = self._rules.get((record.source, record.name))
+        if rule is None:
+            names = (record.source, record.name)
+            level = longest_prefix(names, self.levels)
+            rule = self._rules[(record.source, record.name)] = (
+                self.level if level is None else level, longest_prefix(names, self.sampling) or 1)
+        level, every = rule
+        if record.levelno < level:
+            return False
+        if every > 1 and record.levelno < logging.WARNING:
+            site = (record.pathname, record.lineno)
+            seen = self._counts.get(site, 0)
+            self._counts[site] = seen + 1
+            if seen % every:
+                return False
+            record.sampled = every
+        return True
+
+
+def add_trace_context(record) -> bool:
+    """Tag a record with the trace it was logged in (runs on the logging thread's caller)"""
+    span = tracing.current_span()
+    if span is not None:
+        record.trace_id = span["trace_id"]
+        record.span_id = span["span_id"]
+    return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, module, message, trace ids and any `extra` fields"""
+
+    def format(self, record) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "module": getattr(record, "source", record.name),
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for name in ("trace_id", "span_id", "sampled"):
+            if hasattr(record, name):
+                entry[name] = getattr(record, name)
+        for name, value in vars(record).items():
+            if name not in STANDARD_ATTRIBUTES and not name.startswith("_"):
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Queues records for `handlers`, which run on a listener thread
+
+    Never blocks the caller: when the queue is full the record is dropped
+    and counted in `dropped`.
+    """
+
+    def __init__(self, handlers: list, queue_size: int = 10000):
+        super().__init__(queue.Queue(queue_size))
+        self.handlers = handlers
+        self.dropped = 0
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Resolve the message and traceback now (args may change, tracebacks
+        # pin frames) but keep them apart, unlike QueueHandler.prepare
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _plain.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until everything queued so far is written"""
+        if self.listener._thread is not None:
+            self.queue.join()
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.queue.put(self.listener._sentinel)  # blocking: the thread is draining
+            self.listener._thread.join()
+            self.listener._thread = None
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+
+def gzip_rotator(source: str, dest: str):
+    """Compress a rotated log file (runs on the listener thread)"""
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def create_file_handler(path: str, when: str = "midnight", backups: int = 14,
+                        compress: bool = True) -> TimedRotatingFileHandler:
+    """JSON-lines file rotated on a schedule, keeping `backups` old files (gzipped if compress)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = TimedRotatingFileHandler(path, when=when, backupCount=backups, encoding="utf-8")
+    if compress:
+        handler.namer = lambda name: name + ".gz"
+        handler.rotator = gzip_rotator
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+_handler = None
+
+
+def configure_logging(log_file: str = None, level: str = None, levels: str = None, sampling: str = None,
+                      console: bool = True) -> BackgroundHandler:
+    """
+    (Re)build the logging pipeline from settings
+
+    Replaces the handler installed by a previous call. Arguments override
+    the matching LOG_* settings.
+
+    Returns:
+        The BackgroundHandler on the root logger
+    """
+    global _handler
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+        _handler.close()
+
+    base_level = logging.getLevelName((level or settings.LOG_LEVEL).upper())
+    module_levels = parse_levels(settings.LOG_LEVELS if levels is None else levels)
+
+    handlers = [create_file_handler(log_file or settings.LOG_FILE, settings.LOG_ROTATE_WHEN,
+                                    settings.LOG_BACKUP_COUNT, settings.LOG_COMPRESS)]
+    if console:
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(stream)
+
+    _handler = BackgroundHandler(handlers, settings.LOG_QUEUE_SIZE)
+    _handler.addFilter(ModuleFilter(base_level, module_levels,
+                                    parse_sampling(settings.LOG_SAMPLE if sampling is None else sampling)))
+    _handler.addFilter(add_trace_context)
+    root.addHandler(_handler)
+    # Records below every configured level aren't even created
+    root.setLevel(min([base_level] + list(module_levels.values())))
+    return _handler
+
+
+def flush():
+    """Block until every record logged so far has been written"""
+    if _handler is not None:
+        _handler.flush()
+
 
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
+def dropped_records() -> int:
+    """Records lost because the queue was full"""
+    return _handler.dropped if _handler is not None else 0
 
-# Configure logging
-log_filename = f"logs/polypuff_{datetime.now().strftime('%Y%m%d')}.log"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s | %(levelname)s | %(message)s',
-    handlers=[
-        logging.FileHandler(log_filename, encoding='utf-8'),
-        logging.StreamHandler()  # Also print to console
-    ]
-)
+configure_logging()
+atexit.register(lambda: _handler is not None and _handler.close())
 
 logger = logging.getLogger("PolyPuff")
@@ -0,0 +1,370 @@
+"""
+Latency histograms, error counters and agent gauges in Prometheus text format
+
+    from utils import metrics
+    with metrics.timed("twitter", "create_tweet"):
+        client.create_tweet(...)
+
+start_server() serves everything on http://host:port/metrics for a
+Prometheus scraper (or curl).
+"""
+import math
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.logger import logger, dropped_records
+from utils.rate_limiter import RateLimiter
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds - from a cached RPC read up to a slow Gemini call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """
+    Metrics and collectors rendered together by render()
+
+    Collectors are functions called at scrape time that yield
+    (name, type, help, [(labels dict, value)]) - for values that already
+    live somewhere else (agent stage, queue lengths).
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        with self._lock:
+            self.collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self.metrics.values())
+            collectors = list(self.collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help_text: str, labelnames=(), registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values tuple -> value
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def get(self, **labels):
+        """Current value for one set of labels (None if never set)"""
+        with self._lock:
+            return self.values.get(self._key(labels))
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def _labels(self, key: tuple) -> dict:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    """Only goes up (resets when the process restarts)"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted(self.values.items())
+        return self._header() + [f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+                                 for key, value in values]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down"""
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted(self.values.items())
+        return self._header() + [f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+                                 for key, value in values]
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into cumulative buckets, plus their sum and count
+
+    Per label set the value is [bucket counts..., sum, count].
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=LATENCY_BUCKETS,
+                 registry: Registry = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames, registry)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[index] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted((key, list(entry)) for key, entry in self.values.items())
+        lines = self._header()
+        for key, entry in values:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(float(bound))})} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {entry[-1]}")
+        return lines
+
+
+# --- external calls ------------------------------------------------------------
+
+CALL_SECONDS = Histogram("polypuff_external_call_seconds",
+                         "Latency of calls to Twitter, Gemini and the RPC", ["service", "operation"])
+CALL_ERRORS = Counter("polypuff_external_call_errors_total",
+                      "Failed calls to Twitter, Gemini and the RPC by error type",
+                      ["service", "operation", "error"])
+RETRIES = Counter("polypuff_retries_total", "Retries made by utils.retry", ["function"])
+RETRIES_EXHAUSTED = Counter("polypuff_retries_exhausted_total",
+                            "Calls that failed on every utils.retry attempt", ["function"])
+
+
+@contextmanager
+def timed(service: str, operation: str):
+    """
+    Time one external call (failures are counted by exception type and
+    re-raised)
+
+    Args:
+        service: "twitter", "gemini" or "rpc"
+        operation: Endpoint or method (create_tweet, generate_reply,
+            eth_getBalance...)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        CALL_ERRORS.inc(service=service, operation=operation, error=type(e).__name__)
+        raise
+    finally:
+        CALL_SECONDS.observe(time.perf_counter() - started, service=service, operation=operation)
+
+
+def record_error(service: str, operation: str, error: str):
+    """Count a failure that came back as a value instead of an exception"""
+    CALL_ERRORS.inc(service=service, operation=operation, error=error)
+
+
+def web3_middleware(make_request, w3):
+    """
+    Web3 middleware timing every JSON-RPC call (JSON-RPC errors count as
+    failures too)
+    """
+    def middleware(method, params):
+        with timed("rpc", method):
+            response = make_request(method, params)
+        if isinstance(response, dict) and "error" in response:
+            record_error("rpc", method, "RPCError")
+        return response
+    return middleware
+
+
+def instrument_web3(w3):
+    """Add web3_middleware to a Web3 instance (once - fleet wallets share one)"""
+    if "metrics" not in w3.middleware_onion:
+        w3.middleware_onion.add(web3_middleware, name="metrics")
+    return w3
+
+
+# --- agents ----------------------------------------------------------------------
+
+_agents = weakref.WeakSet()
+
+
+def watch_agent(agent):
+    """
+    Report an agent's stage, balance, queues, processed mentions and
+    Twitter rate-limit quota on every scrape (until the agent is garbage collected)
+    """
+    _agents.add(agent)
+
+
+def collect_agents():
+    stage, balance, tweets, buffered, queues, processed = [], [], [], [], [], []
+    quota, quota_limit, quota_waited = [], [], []
+    for agent in sorted(list(_agents), key=lambda agent: agent.name):
+        labels = {"agent": agent.name}
+        stage.append(({**labels, "stage": agent.stage}, 1))
+        balance.append((labels, agent.balance))
+        tweets.append((labels, agent.tweet_count))
+        buffered.append((labels, len(agent.tweet_buffer.tweets)))
+        handler = agent.interaction_handler
+        if handler is not None:
+            for queue, depth in handler.pipeline.queue_depths().items():
+                queues.append(({**labels, "queue": queue}, depth))
+            processed.append((labels, len(handler.processed_tweets)))
+        limiter = getattr(agent.twitter, "rate_limiter", None)
+        if isinstance(limiter, RateLimiter):
+            for endpoint, window in limiter.remaining().items():
+                endpoint_labels = {**labels, "endpoint": endpoint}
+                quota.append((endpoint_labels, window["remaining"]))
+                quota_limit.append((endpoint_labels, window["limit"]))
+                quota_waited.append((endpoint_labels, window["waited_seconds"]))
+    yield "polypuff_stage", "gauge", "Current evolution stage (1 for the agent's stage)", stage
+    yield "polypuff_balance_eth", "gauge", "Last wallet balance read (ETH)", balance
+    yield "polypuff_tweets_posted", "gauge", "Tweets posted so far", tweets
+    yield "polypuff_tweet_buffer_depth", "gauge", "Pre-generated tweets ready to post", buffered
+    yield "polypuff_reply_queue_depth", "gauge", "Mentions waiting in or being worked on by each reply stage", queues
+    yield "polypuff_processed_mentions", "gauge", "Mention IDs kept in the processed store", processed
+    yield "polypuff_rate_limit_remaining", "gauge", "Twitter requests left in the current window", quota
+    yield "polypuff_rate_limit_limit", "gauge", "Twitter requests allowed per window", quota_limit
+    yield ("polypuff_rate_limit_wait_seconds_total", "counter", "Seconds spent waiting for Twitter rate limits",
+           quota_waited)
+
+
+def collect_prompts():
+    from utils.prompt_templates import PROMPT_STATS
+    stats = dict(PROMPT_STATS)
+    yield "polypuff_prompts_total", "counter", "Prompts rendered", [({}, stats["prompts"])]
+    yield ("polypuff_prompt_input_tokens_total", "counter", "Estimated input tokens sent to Gemini",
+           [({}, stats["input_tokens"])])
+    yield "polypuff_prompts_trimmed_total", "counter", "Prompts trimmed to fit the token budget", [({}, stats["trimmed"])]
+
+
+def collect_logging():
+    yield ("polypuff_log_records_dropped_total", "counter",
+           "Log records dropped because the logging queue was full", [({}, dropped_records())])
+
+
+REGISTRY.add_collector(collect_agents)
+REGISTRY.add_collector(collect_prompts)
+REGISTRY.add_collector(collect_logging)
+
+
+# --- endpoint ----------------------------------------------------------------------
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # a scrape every few seconds would flood the log
+
+
+def start_server(port: int, host: str = "127.0.0.1", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serve /metrics on a background thread
+
+    Args:
+        port: TCP port (0 picks a free one - see server.server_address)
+        host: Interface to listen on (localhost only by default)
+
+    Returns:
+        The server (call shutdown() to stop it)
+    """
+    handler = type("Handler", (MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="polypuff-metrics", daemon=True).start()
+    logger.info(f"Metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
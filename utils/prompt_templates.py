@@ -0,0 +1,179 @@
+"""
+Prompt templates compiled once, with token estimates and an input budget
+"""
+import string
+import threading
+
+# Totals over every rendered prompt (read by health checks and benchmarks)
+PROMPT_STATS = {"prompts": 0, "input_tokens": 0, "trimmed": 0, "over_budget": 0}
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough Gemini token count, without a network call
+
+    About four characters per token for English text. Emoji and other
+    non-ASCII characters cost roughly one token each.
+    """
+    if not text:
+        return 0
+    if text.isascii():
+        return (len(text) + 3) // 4
+    ascii_count = len(text.encode("ascii", "ignore"))
+    return (ascii_count + 3) // 4 + len(text) - ascii_count
+
+
+class PromptTemplate:
+    """
+    A str.format template parsed once
+
+    Fields given at compile time (stage, personality) are baked into the
+    literal text; the rest are filled in by render(). The token estimate of
+    the literal text is computed once too, so a render only estimates the
+    values it inserts.
+    """
+
+    def __init__(self, template: str, **fixed):
+        self.parts = []  # literal text or (field, format spec)
+        literal = []
+        for text, field, spec, _ in string.Formatter().parse(template):
+            literal.append(text)
+            if field is None:
+                continue
+            if field in fixed:
+                literal.append(format(fixed[field], spec or ""))
+            else:
+                self.parts.append("".join(literal))
+                self.parts.append((field, spec or ""))
+                literal = []
+        self.parts.append("".join(literal))
+        self.parts = [part for part in self.parts if part != ""]
+        self.fields = {part[0] for part in self.parts if isinstance(part, tuple)}
+        self.static_tokens = sum(estimate_tokens(part) for part in self.parts if isinstance(part, str))
+        # The same template as one str.format string (for Prompt's fast path)
+        self.format_string = "".join(
+            part.replace("{", "{{").replace("}", "}}") if isinstance(part, str)
+            else "{%s%s}" % (part[0], ":" + part[1] if part[1] else "")
+            for part in self.parts
+        )
+
+    def render(self, values: dict) -> tuple:
+        """
+        Returns:
+            (text, estimated tokens)
+        """
+        pieces = []
+        tokens = self.static_tokens
+        for part in self.parts:
+            if isinstance(part, str):
+                pieces.append(part)
+            else:
+                value = format(values[part[0]], part[1])
+                pieces.append(value)
+                tokens += estimate_tokens(value)
+        return "".join(pieces), tokens
+
+
+class Prompt:
+    """
+    A prompt made of sections, some of them optional, rendered under a
+    token budget
+
+    Sections are (name, template, drop, when):
+        template: str.format text (compile-time fields are baked in)
+        drop: None for required sections, otherwise the drop order when
+            over budget (lowest goes first)
+        when: Field that must be non-empty for the section to be included
+
+    When dropping every optional section isn't enough, the `truncatable`
+    field (e.g. the mention text) is shortened to fit. The system
+    instruction sent with the prompt counts towards the budget, since it
+    is billed as input on every call.
+    """
+
+    def __init__(self, sections: list, fixed: dict = None, truncatable: str = None,
+                 system_instruction: str = ""):
+        fixed = fixed or {}
+        self.sections = [(name, PromptTemplate(template, **fixed), drop, when)
+                         for name, template, drop, when in sections]
+        self.truncatable = truncatable
+        self.system_instruction = system_instruction
+        self.system_tokens = estimate_tokens(system_instruction)
+        self.conditions = sorted({when for _, _, _, when in self.sections if when})
+        self._formats = {}  # which conditions are set -> whole prompt as one format string
+
+    def render(self, values: dict, budget: int = None) -> dict:
+        """
+        Fill in the prompt
+
+        Args:
+            values: Field values
+            budget: Maximum estimated input tokens (system instruction
+                included); None or 0 for no limit
+
+        Returns:
+            dict with text, tokens (estimated input incl. system
+            instruction), dropped (section names), truncated (bool) and
+            over_budget (still too big after trimming)
+        """
+        # Fast path: one format call, then check the budget
+        present = tuple(bool(values.get(condition)) for condition in self.conditions)
+        format_string = self._formats.get(present)
+        if format_string is None:
+            included = dict(zip(self.conditions, present))
+            format_string = self._formats[present] = "".join(
+                template.format_string for _, template, _, when in self.sections if not when or included[when])
+        text = format_string.format_map(values)
+        total = self.system_tokens + estimate_tokens(text)
+        if not budget or total <= budget:
+            with _stats_lock:
+                PROMPT_STATS["prompts"] += 1
+                PROMPT_STATS["input_tokens"] += total
+            return {"text": text, "tokens": total, "dropped": [], "truncated": False, "over_budget": False}
+
+        rendered = []
+        for name, template, drop, when in self.sections:
+            if when and not values.get(when):
+                continue
+            text, tokens = template.render(values)
+            rendered.append([name, template, drop, text, tokens])
+        total = self.system_tokens + sum(section[4] for section in rendered)
+
+        dropped = []
+        if budget and total > budget:
+            for section in sorted((s for s in rendered if s[2] is not None), key=lambda s: s[2]):
+                rendered.remove(section)
+                dropped.append(section[0])
+                total -= section[4]
+                if total <= budget:
+                    break
+
+        truncated = False
+        if budget and total > budget and self.truncatable and values.get(self.truncatable):
+            values = dict(values)
+            value = str(values[self.truncatable])
+            while total > budget and value:
+                # Cut roughly the excess (4 characters per token), at least one character
+                value = value[:max(0, len(value) - max(4 * (total - budget), 1) - 1)]
+                values[self.truncatable] = value + "…"
+                for section in rendered:
+                    if self.truncatable in section[1].fields:
+                        section[3], section[4] = section[1].render(values)
+                total = self.system_tokens + sum(section[4] for section in rendered)
+            truncated = True
+
+        over_budget = bool(budget) and total > budget
+        with _stats_lock:
+            PROMPT_STATS["prompts"] += 1
+            PROMPT_STATS["input_tokens"] += total
+            PROMPT_STATS["trimmed"] += bool(dropped or truncated)
+            PROMPT_STATS["over_budget"] += over_budget
+
+        return {
+            "text": "".join(section[3] for section in rendered),
+            "tokens": total,
+            "dropped": dropped,
+            "truncated": truncated,
+            "over_budget": over_budget,
+        }
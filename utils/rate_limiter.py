@@ -0,0 +1,176 @@
+"""
+Token-bucket rate limiting for the Twitter API, driven by response headers
+"""
+import threading
+import time
+from urllib.parse import urlparse
+from utils.logger import logger
+
+# Fallback (requests, window seconds) per endpoint until the API tells us
+# the real numbers through x-rate-limit-* headers
+DEFAULT_LIMITS = {
+    "create_tweet": (100, 900),
+    "get_users_mentions": (180, 900),
+    "media_upload": (415, 900),
+    "get_me": (75, 900),
+    "update_profile_image": (25, 900),
+}
+
+
+class TokenBucket:
+    """
+    One endpoint's request budget
+
+    Tokens refill continuously at limit/window. When the API reports its
+    own count (x-rate-limit-remaining) the bucket never holds more than
+    that, and once the API says the window is used up the bucket stays
+    empty until x-rate-limit-reset.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.blocked_until = 0.0
+        self.reset_at = None
+        self.updated = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now < self.blocked_until:
+            return
+        if self.blocked_until:
+            # The API's window has reset
+            self.tokens = float(self.limit)
+            self.blocked_until = 0.0
+        else:
+            self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.window)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one should be
+        """
+        with self._lock:
+            now = time.time()
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            return (1 - self.tokens) * self.window / self.limit
+
+    def update(self, remaining: int, reset_at: float = None, limit: int = None):
+        """
+        Sync with the API's view of this endpoint's window
+        """
+        with self._lock:
+            now = time.time()
+            self._refill(now)
+            if limit:
+                self.limit = limit
+            self.tokens = min(self.tokens, float(remaining))
+            self.reset_at = reset_at
+            if remaining <= 0:
+                self.blocked_until = reset_at or (now + self.window)
+
+
+class RateLimiter:
+    """
+    Per-endpoint token buckets shared by everything one Twitter account does
+
+    Callers acquire() before each request and sleep just long enough for a
+    token. Responses update the buckets from x-rate-limit-* headers via
+    on_response(), which is installed as a requests response hook.
+    """
+
+    def __init__(self, limits: dict = None):
+        limits = limits or DEFAULT_LIMITS
+        self.buckets = {endpoint: TokenBucket(*limit) for endpoint, limit in limits.items()}
+        self.waited = {endpoint: 0.0 for endpoint in self.buckets}
+
+    def acquire(self, endpoint: str):
+        """
+        Block until a request to this endpoint is allowed
+        """
+        bucket = self.buckets.get(endpoint)
+        if bucket is None:
+            return
+
+        while True:
+            wait = bucket.try_acquire()
+            if wait <= 0:
+                return
+            if wait > 5:
+                logger.warning(f"Rate limit: waiting {wait:.0f}s for {endpoint}")
+            self.waited[endpoint] += wait
+            time.sleep(wait)
+
+    def on_response(self, response, *args, **kwargs):
+        """
+        requests response hook: read x-rate-limit-* headers
+        """
+        endpoint = endpoint_for(response.request.method, response.url)
+        bucket = self.buckets.get(endpoint)
+        if bucket is None:
+            return response
+
+        headers = response.headers
+        remaining = headers.get("x-rate-limit-remaining")
+        reset = headers.get("x-rate-limit-reset")
+        limit = headers.get("x-rate-limit-limit")
+
+        if response.status_code == 429:
+            remaining = 0
+        if remaining is not None:
+            bucket.update(int(remaining), float(reset) if reset else None, int(limit) if limit else None)
+            if response.status_code == 429:
+                logger.warning(f"Rate limited on {endpoint} until {reset or 'window end'}")
+        return response
+
+    def install(self, session):
+        """Attach the header hook to a requests.Session"""
+        if self.on_response not in session.hooks["response"]:
+            session.hooks["response"].append(self.on_response)
+
+    def remaining(self) -> dict:
+        """
+        Remaining quota per endpoint (for metrics)
+
+        Returns:
+            {endpoint: {"remaining", "limit", "reset_at", "waited_seconds"}}
+        """
+        now = time.time()
+        snapshot = {}
+        for endpoint, bucket in self.buckets.items():
+            with bucket._lock:
+                bucket._refill(now)
+                snapshot[endpoint] = {
+                    "remaining": int(bucket.tokens),
+                    "limit": bucket.limit,
+                    "reset_at": bucket.reset_at,
+                    "waited_seconds": round(self.waited[endpoint], 3)
+                }
+        return snapshot
+
+
+def endpoint_for(method: str, url: str):
+    """
+    Map a Twitter API request to its rate-limit endpoint name
+    """
+    path = urlparse(url).path
+    if path.endswith("/media/upload.json"):
+        return "media_upload"
+    if path.endswith("/account/update_profile_image.json"):
+        return "update_profile_image"
+    if path == "/2/tweets" and method == "POST":
+        return "create_tweet"
+    if path == "/2/users/me":
+        return "get_me"
+    if path.startswith("/2/users/") and path.endswith("/mentions"):
+        return "get_users_mentions"
+    return None
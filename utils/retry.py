@@ -4,6 +4,7 @@ Retry decorator for API calls
 import time
 from functools import wraps
 from utils.logger import logger
+from utils.metrics import RETRIES, RETRIES_EXHAUSTED
 
 def retry(max_attempts=3, delay=5, backoff=2):
     """
@@ -26,11 +27,13 @@ def retry(max_attempts=3, delay=5, backoff=2):
                 except Exception as e:
                     attempts += 1
                     if attempts >= max_attempts:
+                        RETRIES_EXHAUSTED.inc(function=func.__name__)
                         logger.error(f"{func.__name__} failed after {max_attempts} attempts: {str(e)}")
                         raise
                     
                     logger.warning(f"{func.__name__} failed (attempt {attempts}/{max_attempts}): {str(e)}")
                     logger.info(f"Retrying in {current_delay} seconds...")
+                    RETRIES.inc(function=func.__name__)
                     time.sleep(current_delay)
                     current_delay *= backoff
             
@@ -0,0 +1,119 @@
+"""
+Batched JSON-RPC calls over a Web3 HTTP provider
+"""
+import json
+import threading
+import requests
+from utils.logger import logger
+from utils import metrics
+
+# Seconds per request unless the provider sets a timeout (web3's default)
+DEFAULT_TIMEOUT = 10
+
+_sessions = {}  # endpoint -> requests.Session, so batches reuse connections
+_sessions_lock = threading.Lock()
+
+
+class RPCError(Exception):
+    """
+    A JSON-RPC call inside a batch returned an error
+    """
+
+    def __init__(self, method: str, error: dict):
+        self.method = method
+        self.code = error.get("code")
+        super().__init__(f"{method} failed: {error.get('message', error)}")
+
+
+def batch_call(w3, calls: list, batch_size: int = 100) -> list:
+    """
+    Send many JSON-RPC calls in as few HTTP requests as possible
+
+    Calls go out in chunks of `batch_size`. If the node rejects a chunk as
+    too large (HTTP 413 or a single error object instead of a list), the
+    chunk is halved and retried. Requests go out with the provider's
+    headers and timeout, on one keep-alive session per endpoint.
+
+    Args:
+        w3: Web3 instance with an HTTPProvider
+        calls: List of (method, params) tuples
+        batch_size: Maximum calls per HTTP request
+
+    Returns:
+        Results in the same order as `calls`
+
+    Raises:
+        RPCError if any call returned an error
+    """
+    results = []
+    for start in range(0, len(calls), batch_size):
+        results.extend(_send_batch(w3.provider, calls[start:start + batch_size]))
+    return results
+
+
+def post_json(endpoint_uri: str, data: bytes, **kwargs) -> bytes:
+    """
+    POST a JSON-RPC body and return the raw response
+
+    Args:
+        endpoint_uri: Node URL
+        data: Encoded request body
+        **kwargs: requests options (the provider's headers, timeout, ...)
+
+    Raises:
+        requests.HTTPError on a non-2xx status
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    with _sessions_lock:
+        session = _sessions.get(endpoint_uri)
+        if session is None:
+            session = _sessions[endpoint_uri] = requests.Session()
+    response = session.post(endpoint_uri, data=data, **kwargs)
+    response.raise_for_status()
+    return response.content
+
+
+def _send_batch(provider, calls: list) -> list:
+    """
+    Send one batch, splitting it in half if the node refuses the size
+    """
+    payload = [
+        {"jsonrpc": "2.0", "id": index, "method": method, "params": params}
+        for index, (method, params) in enumerate(calls)
+    ]
+
+    try:
+        with metrics.timed("rpc", "batch"):
+            raw = post_json(
+                provider.endpoint_uri,
+                json.dumps(payload).encode("utf-8"),
+                **provider.get_request_kwargs()
+            )
+        response = json.loads(raw)
+        rejected = not isinstance(response, list)
+    except requests.HTTPError as e:
+        if e.response is None or e.response.status_code != 413:
+            raise
+        response = None
+        rejected = True
+
+    if rejected:
+        if len(calls) == 1:
+            error = response.get("error", {}) if isinstance(response, dict) else {"message": "HTTP 413"}
+            raise RPCError(calls[0][0], error)
+
+        middle = len(calls) // 2
+        logger.warning(f"RPC rejected batch of {len(calls)} - splitting")
+        return _send_batch(provider, calls[:middle]) + _send_batch(provider, calls[middle:])
+
+    by_id = {item.get("id"): item for item in response}
+    results = []
+    for index, (method, params) in enumerate(calls):
+        item = by_id.get(index)
+        if item is None:
+            raise RPCError(method, {"message": "missing from batch response"})
+        if "error" in item:
+            raise RPCError(method, item["error"])
+        results.append(item.get("result"))
+
+    return results
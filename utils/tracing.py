@@ -0,0 +1,286 @@
+"""
+Span timings for agent cycles, written to a rotating JSONL file
+
+    with tracing.trace("tweet_cycle", agent=name):   # a new trace (or a child of the current span)
+        with tracing.span("create_tweet"):           # child span - a no-op outside a trace
+            ...
+
+Summarize recent spans with:
+
+    python -m utils.tracing --window 24h             # p50/p95/p99 per span name
+"""
+import argparse
+import atexit
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from config.settings import settings
+
+# The span running in this thread/task (children attach to it)
+_current = contextvars.ContextVar("polypuff_span", default=None)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> logging.Logger:
+    """
+    Logger that appends one JSON line per span to TRACE_FILE (rotated by
+    size), from the logging thread so a span never waits on the disk
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _build_writer(settings.TRACE_FILE, settings.TRACE_MAX_MB * 1024 * 1024, settings.TRACE_BACKUPS)
+        return _writer
+
+
+def _build_writer(path: str, max_bytes: int, backups: int) -> logging.Logger:
+    from utils.logger import BackgroundHandler  # utils.logger tags records with the current span
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    writer = logging.getLogger(f"PolyPuff.traces.{path}")
+    writer.setLevel(logging.INFO)
+    writer.propagate = False  # spans don't belong in the console/app log
+    handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    writer.addHandler(BackgroundHandler([handler], settings.LOG_QUEUE_SIZE))
+    return writer
+
+
+def configure(path: str = None, max_bytes: int = None, backups: int = None):
+    """
+    Send spans somewhere else (tests, simulations)
+
+    Args:
+        path: JSONL file (TRACE_FILE by default)
+        max_bytes: Rotate after this size (TRACE_MAX_MB by default)
+        backups: Rotated files kept (TRACE_BACKUPS by default)
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _close_writer(_writer)
+        _writer = _build_writer(path or settings.TRACE_FILE,
+                                max_bytes or settings.TRACE_MAX_MB * 1024 * 1024,
+                                settings.TRACE_BACKUPS if backups is None else backups)
+
+
+def _close_writer(writer: logging.Logger):
+    for handler in list(writer.handlers):
+        writer.removeHandler(handler)
+        handler.close()  # drains the queue first
+
+
+def close():
+    """Write out every queued span and stop the writer thread (runs at exit)"""
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _close_writer(_writer)
+            _writer = None
+
+
+atexit.register(close)
+
+
+def flush():
+    """Block until every span ended so far is on disk"""
+    with _writer_lock:
+        writer = _writer
+    if writer is not None:
+        for handler in writer.handlers:
+            handler.flush()
+
+
+def export(record: dict):
+    try:
+        get_writer().info(json.dumps(record, default=str))
+    except Exception:
+        pass  # tracing must never break the agent
+
+
+@contextmanager
+def _span(name: str, parent: dict, attributes: dict):
+    record = {
+        "trace_id": parent["trace_id"] if parent else os.urandom(8).hex(),
+        "span_id": os.urandom(4).hex(),
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "start": round(time.time(), 6),
+        "duration_ms": None,
+        "status": "ok",
+        "attributes": attributes,
+    }
+    token = _current.set(record)
+    started = time.perf_counter()
+    try:
+        yield attributes
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        _current.reset(token)
+        export(record)
+
+
+@contextmanager
+def trace(name: str, **attributes):
+    """
+    Span that starts a new trace when none is running (a cycle, a mention),
+    or nests under the current span
+
+    Yields the span's attributes dict, so more can be added while it runs.
+    """
+    if not settings.TRACING:
+        yield {}
+        return
+    with _span(name, _current.get(), attributes) as span_attributes:
+        yield span_attributes
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Child span of the current one - does nothing outside a trace, so
+    shared code (benchmarks, the tweet buffer thread) isn't traced on its own
+    """
+    parent = _current.get()
+    if parent is None:
+        yield {}
+        return
+    with _span(name, parent, attributes) as span_attributes:
+        yield span_attributes
+
+
+def current_span():
+    """The span running here (its record dict), or None outside a trace"""
+    return _current.get()
+
+
+def record_error(error: Exception):
+    """Mark the current span failed for an error that was caught inside it"""
+    record = _current.get()
+    if record is not None:
+        record["status"] = "error"
+        record["error"] = f"{type(error).__name__}: {error}"
+
+
+def in_context(func):
+    """
+    func bound to the current span, for running on a worker thread
+    (call once per submit - a context can't be entered twice at once)
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+# --- summary CLI ------------------------------------------------------------------
+
+def parse_window(text: str) -> float:
+    """'90s', '15m', '24h', '7d' (or plain seconds) -> seconds"""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def read_spans(path: str = None, since: float = None) -> list:
+    """
+    Spans from the trace file and its rotated backups
+
+    Args:
+        path: TRACE_FILE by default
+        since: Only spans that started at or after this epoch time
+    """
+    path = path or settings.TRACE_FILE
+    flush()
+    # Oldest backup (highest number) first, the live file last
+    backups = [name for name in glob.glob(f"{glob.escape(path)}.*") if name[len(path) + 1:].isdigit()]
+    backups.sort(key=lambda name: int(name[len(path) + 1:]), reverse=True)
+
+    spans = []
+    for file_path in backups + [path]:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of a crashed run
+                if since is None or record.get("start", 0) >= since:
+                    spans.append(record)
+    return spans
+
+
+def percentile(values: list, q: float) -> float:
+    """q-th percentile (0-100) of sorted values, linearly interpolated"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(spans: list) -> list:
+    """
+    Returns:
+        [{"name", "count", "errors", "p50", "p95", "p99", "max", "total"}]
+        (milliseconds), slowest total first
+    """
+    durations, errors = {}, {}
+    for record in spans:
+        durations.setdefault(record["name"], []).append(record["duration_ms"])
+        errors[record["name"]] = errors.get(record["name"], 0) + (record.get("status") == "error")
+
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append({"name": name, "count": len(values), "errors": errors[name],
+                     "p50": percentile(values, 50), "p95": percentile(values, 95), "p99": percentile(values, 99),
+                     "max": values[-1], "total": sum(values)})
+    rows.sort(key=lambda row: row["total"], reverse=True)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Span latency percentiles from the PolyPuff trace file")
+    parser.add_argument("--file", help=f"Trace file (default {settings.TRACE_FILE})")
+    parser.add_argument("--window", default="24h", help="How far back to look: 90s, 15m, 24h, 7d (default 24h)")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="Only span names containing this")
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args(argv)
+
+    spans = read_spans(args.file, since=time.time() - parse_window(args.window))
+    if args.filter:
+        spans = [record for record in spans if any(pattern in record["name"] for pattern in args.filter)]
+    rows = summarize(spans)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return rows
+    if not rows:
+        print(f"No spans in the last {args.window}")
+        return rows
+
+    print(f"{'span':<28} {'count':>7} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for row in rows:
+        print(f"{row['name']:<28} {row['count']:>7} {row['errors']:>7} {row['p50']:>10.1f} "
+              f"{row['p95']:>10.1f} {row['p99']:>10.1f} {row['max']:>10.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()